@@ -0,0 +1,56 @@
+"""add ingestion ledger and natural key
+
+Revision ID: 3f1c9a7d2b54
+Revises: 67a9808a43dc
+Create Date: 2026-10-18 10:10:42.318514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b54'
+down_revision: Union[str, None] = '67a9808a43dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('spimex_ingestion_ledger',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('trade_date', sa.Date(), nullable=False),
+    sa.Column('content_hash', sa.String(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('ingested_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_spimex_ingestion_ledger')),
+    sa.UniqueConstraint('url', name=op.f('uq_spimex_ingestion_ledger_url'))
+    )
+    op.create_index(op.f('ix_spimex_ingestion_ledger_trade_date'), 'spimex_ingestion_ledger', ['trade_date'], unique=False)
+
+    # Повторные запуски парсера дублировали строки - оставляем последнюю загруженную строку по естественному ключу
+    op.execute(
+        """
+        DELETE FROM spimex_trading_results AS older
+        USING spimex_trading_results AS newer
+        WHERE older.exchange_product_id = newer.exchange_product_id
+          AND older.date = newer.date
+          AND older.id < newer.id
+        """
+    )
+    op.create_unique_constraint(
+        op.f('uq_spimex_trading_results_exchange_product_id_date'),
+        'spimex_trading_results',
+        ['exchange_product_id', 'date'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        op.f('uq_spimex_trading_results_exchange_product_id_date'), 'spimex_trading_results', type_='unique'
+    )
+    op.drop_index(op.f('ix_spimex_ingestion_ledger_trade_date'), table_name='spimex_ingestion_ledger')
+    op.drop_table('spimex_ingestion_ledger')
@@ -0,0 +1,42 @@
+"""add spimex_trading_results read indexes
+
+Revision ID: a4e27c5b9d13
+Revises: 3f1c9a7d2b54
+Create Date: 2026-10-18 11:25:07.640213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e27c5b9d13'
+down_revision: Union[str, None] = '3f1c9a7d2b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    'ix_spimex_trading_results_date': ['date'],
+    'ix_spimex_trading_results_instrument_date': ['oil_id', 'delivery_basis_id', 'delivery_type_id', 'date'],
+    'ix_spimex_trading_results_delivery_basis_id_date': ['delivery_basis_id', 'date'],
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись парсера, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name, 'spimex_trading_results', columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(
+                name, table_name='spimex_trading_results', postgresql_concurrently=True, if_exists=True
+            )
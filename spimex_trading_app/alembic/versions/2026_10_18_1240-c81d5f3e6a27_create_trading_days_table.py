@@ -0,0 +1,41 @@
+"""create trading_days table
+
+Revision ID: c81d5f3e6a27
+Revises: a4e27c5b9d13
+Create Date: 2026-10-18 12:40:19.082746
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81d5f3e6a27'
+down_revision: Union[str, None] = 'a4e27c5b9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('trading_days',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('total_volume', sa.Float(), nullable=False),
+    sa.Column('total_value', sa.Float(), nullable=False),
+    sa.Column('ingested_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('date', name=op.f('pk_trading_days'))
+    )
+    op.execute(
+        """
+        INSERT INTO trading_days (date, row_count, total_volume, total_value)
+        SELECT date, count(*), sum(volume), sum(total)
+        FROM spimex_trading_results
+        GROUP BY date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('trading_days')
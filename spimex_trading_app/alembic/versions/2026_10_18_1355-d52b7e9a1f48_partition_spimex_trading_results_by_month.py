@@ -0,0 +1,119 @@
+"""partition spimex_trading_results by month
+
+Revision ID: d52b7e9a1f48
+Revises: c81d5f3e6a27
+Create Date: 2026-10-18 13:55:31.207164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd52b7e9a1f48'
+down_revision: Union[str, None] = 'c81d5f3e6a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLE = 'spimex_trading_results'
+HEAP_TABLE = 'spimex_trading_results_heap'
+SEQUENCE = 'spimex_trading_results_id_seq'
+
+INDEXES = {
+    'ix_spimex_trading_results_date': ['date'],
+    'ix_spimex_trading_results_instrument_date': ['oil_id', 'delivery_basis_id', 'delivery_type_id', 'date'],
+    'ix_spimex_trading_results_delivery_basis_id_date': ['delivery_basis_id', 'date'],
+}
+
+COLUMNS = (
+    'id, exchange_product_id, exchange_product_name, oil_id, delivery_basis_id, delivery_basis_name, '
+    'delivery_type_id, volume, total, count, date, created_on, updated_on'
+)
+
+# Создаёт месячную секцию для даты, если её ещё нет. Вызывается парсером перед записью бюллетеня
+# в отдельной короткой транзакции: создание секции блокирует родительскую таблицу
+ENSURE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_spimex_trading_results_partition(trade_date date) RETURNS text
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start date := date_trunc('month', trade_date)::date;
+    partition_name text := format('spimex_trading_results_p%s', to_char(month_start, 'YYYY_MM'));
+BEGIN
+    IF to_regclass(partition_name) IS NULL THEN
+        -- Несколько воркеров парсера могут одновременно встретить новый месяц
+        PERFORM pg_advisory_xact_lock(hashtext(partition_name));
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF spimex_trading_results FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, (month_start + interval '1 month')::date
+        );
+    END IF;
+    RETURN partition_name;
+END
+$$
+"""
+
+
+def create_fact_table(**kwargs) -> None:
+    op.create_table(TABLE,
+    sa.Column('id', sa.Integer(), server_default=sa.text(f"nextval('{SEQUENCE}'::regclass)"), nullable=False),
+    sa.Column('exchange_product_id', sa.String(), nullable=False),
+    sa.Column('exchange_product_name', sa.String(), nullable=False),
+    sa.Column('oil_id', sa.String(), nullable=False),
+    sa.Column('delivery_basis_id', sa.String(), nullable=False),
+    sa.Column('delivery_basis_name', sa.String(), nullable=False),
+    sa.Column('delivery_type_id', sa.String(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Float(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('created_on', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_on', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint(*kwargs.pop('primary_key'), name=op.f('pk_spimex_trading_results')),
+    sa.UniqueConstraint(
+        'exchange_product_id', 'date', name=op.f('uq_spimex_trading_results_exchange_product_id_date')
+    ),
+    **kwargs,
+    )
+    for name, columns in INDEXES.items():
+        op.create_index(name, TABLE, columns, unique=False)
+    op.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+
+
+def detach_heap_table() -> None:
+    # Имена ограничений и индексов общие для схемы, поэтому освобождаются до создания новой таблицы
+    op.rename_table(TABLE, HEAP_TABLE)
+    op.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY NONE')
+    op.execute(f'ALTER TABLE {HEAP_TABLE} ALTER COLUMN id DROP DEFAULT')
+    for name in INDEXES:
+        op.drop_index(name, table_name=HEAP_TABLE)
+    op.drop_constraint(op.f('uq_spimex_trading_results_exchange_product_id_date'), HEAP_TABLE, type_='unique')
+    op.drop_constraint(op.f('pk_spimex_trading_results'), HEAP_TABLE, type_='primary')
+
+
+def upgrade() -> None:
+    # Таблица переписывается целиком и блокируется на время миграции - запускать при остановленном парсере
+    detach_heap_table()
+    # Ключ секционирования должен входить в первичный ключ и во все уникальные ограничения
+    create_fact_table(primary_key=('id', 'date'), postgresql_partition_by='RANGE (date)')
+    op.execute(ENSURE_PARTITION_FUNCTION)
+    op.execute(
+        f"""
+        SELECT ensure_spimex_trading_results_partition(month)
+        FROM (SELECT DISTINCT date_trunc('month', date)::date AS month FROM {HEAP_TABLE}) AS months
+        """
+    )
+    op.execute(f'INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {HEAP_TABLE}')
+    op.drop_table(HEAP_TABLE)
+    op.execute(f'ANALYZE {TABLE}')
+
+
+def downgrade() -> None:
+    detach_heap_table()
+    create_fact_table(primary_key=('id',))
+    op.execute(f'INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {HEAP_TABLE}')
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table(HEAP_TABLE)
+    op.execute('DROP FUNCTION ensure_spimex_trading_results_partition(date)')
@@ -0,0 +1,95 @@
+"""move instrument names to dimension tables
+
+Revision ID: e6f1a93c0d72
+Revises: d52b7e9a1f48
+Create Date: 2026-10-18 14:50:12.845390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f1a93c0d72'
+down_revision: Union[str, None] = 'd52b7e9a1f48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('spimex_delivery_bases',
+    sa.Column('delivery_basis_id', sa.String(), nullable=False),
+    sa.Column('delivery_basis_name', sa.String(), nullable=False),
+    sa.Column('updated_on', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('delivery_basis_id', name=op.f('pk_spimex_delivery_bases'))
+    )
+    op.create_table('spimex_instruments',
+    sa.Column('exchange_product_id', sa.String(), nullable=False),
+    sa.Column('exchange_product_name', sa.String(), nullable=False),
+    sa.Column('oil_id', sa.String(), nullable=False),
+    sa.Column('delivery_basis_id', sa.String(), nullable=False),
+    sa.Column('delivery_type_id', sa.String(), nullable=False),
+    sa.Column('updated_on', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(
+        ['delivery_basis_id'], ['spimex_delivery_bases.delivery_basis_id'],
+        name=op.f('fk_spimex_instruments_delivery_basis_id_spimex_delivery_bases'),
+    ),
+    sa.PrimaryKeyConstraint('exchange_product_id', name=op.f('pk_spimex_instruments'))
+    )
+
+    # Наименования берутся из самых свежих торгов каждого кода
+    op.execute(
+        """
+        INSERT INTO spimex_delivery_bases (delivery_basis_id, delivery_basis_name)
+        SELECT DISTINCT ON (delivery_basis_id) delivery_basis_id, delivery_basis_name
+        FROM spimex_trading_results
+        ORDER BY delivery_basis_id, date DESC, id DESC
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO spimex_instruments (
+            exchange_product_id, exchange_product_name, oil_id, delivery_basis_id, delivery_type_id
+        )
+        SELECT DISTINCT ON (exchange_product_id)
+            exchange_product_id, exchange_product_name, oil_id, delivery_basis_id, delivery_type_id
+        FROM spimex_trading_results
+        ORDER BY exchange_product_id, date DESC, id DESC
+        """
+    )
+
+    op.create_foreign_key(
+        op.f('fk_spimex_trading_results_exchange_product_id_spimex_instruments'),
+        'spimex_trading_results', 'spimex_instruments',
+        ['exchange_product_id'], ['exchange_product_id'],
+    )
+    op.drop_column('spimex_trading_results', 'exchange_product_name')
+    op.drop_column('spimex_trading_results', 'delivery_basis_name')
+    # DROP COLUMN только скрывает столбцы; место освобождается при перезаписи секций
+    with op.get_context().autocommit_block():
+        op.execute('VACUUM (FULL, ANALYZE) spimex_trading_results')
+
+
+def downgrade() -> None:
+    op.add_column('spimex_trading_results', sa.Column('exchange_product_name', sa.String(), nullable=True))
+    op.add_column('spimex_trading_results', sa.Column('delivery_basis_name', sa.String(), nullable=True))
+    op.execute(
+        """
+        UPDATE spimex_trading_results AS results
+        SET exchange_product_name = instruments.exchange_product_name,
+            delivery_basis_name = bases.delivery_basis_name
+        FROM spimex_instruments AS instruments, spimex_delivery_bases AS bases
+        WHERE instruments.exchange_product_id = results.exchange_product_id
+          AND bases.delivery_basis_id = results.delivery_basis_id
+        """
+    )
+    op.alter_column('spimex_trading_results', 'exchange_product_name', existing_type=sa.String(), nullable=False)
+    op.alter_column('spimex_trading_results', 'delivery_basis_name', existing_type=sa.String(), nullable=False)
+    op.drop_constraint(
+        op.f('fk_spimex_trading_results_exchange_product_id_spimex_instruments'),
+        'spimex_trading_results', type_='foreignkey',
+    )
+    op.drop_table('spimex_instruments')
+    op.drop_table('spimex_delivery_bases')
@@ -0,0 +1,31 @@
+"""add ingestion watermarks
+
+Revision ID: 7b3e2d9c4f15
+Revises: e6f1a93c0d72
+Create Date: 2026-10-18 16:20:37.502114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e2d9c4f15'
+down_revision: Union[str, None] = 'e6f1a93c0d72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('spimex_ingestion_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('trade_date', sa.Date(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name', name=op.f('pk_spimex_ingestion_watermarks'))
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('spimex_ingestion_watermarks')
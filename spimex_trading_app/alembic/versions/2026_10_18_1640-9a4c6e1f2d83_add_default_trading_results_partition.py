@@ -0,0 +1,103 @@
+"""add default trading results partition
+
+Revision ID: 9a4c6e1f2d83
+Revises: 7b3e2d9c4f15
+Create Date: 2026-10-18 16:40:11.936027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c6e1f2d83'
+down_revision: Union[str, None] = '7b3e2d9c4f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLE = 'spimex_trading_results'
+DEFAULT_PARTITION = 'spimex_trading_results_default'
+
+# Строки месяца, для которого секция ещё не создана, попадают в секцию DEFAULT, а не обрывают
+# транзакцию загрузки. Создание месячной секции переносит такие строки из DEFAULT в новую секцию:
+# иначе Postgres не даст создать секцию, пока в DEFAULT есть строки её диапазона
+ENSURE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_spimex_trading_results_partition(trade_date date) RETURNS text
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start date := date_trunc('month', trade_date)::date;
+    month_end date := (date_trunc('month', trade_date) + interval '1 month')::date;
+    partition_name text := format('spimex_trading_results_p%s', to_char(month_start, 'YYYY_MM'));
+BEGIN
+    IF to_regclass(partition_name) IS NULL THEN
+        -- Несколько воркеров парсера могут одновременно встретить новый месяц
+        PERFORM pg_advisory_xact_lock(hashtext(partition_name));
+        IF to_regclass(partition_name) IS NOT NULL THEN
+            RETURN partition_name;
+        END IF;
+        IF EXISTS (
+            SELECT 1 FROM spimex_trading_results_default WHERE date >= month_start AND date < month_end
+        ) THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE spimex_trading_results INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM spimex_trading_results_default '
+                'WHERE date >= %L AND date < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE spimex_trading_results ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+        ELSE
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF spimex_trading_results FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+        END IF;
+    END IF;
+    RETURN partition_name;
+END
+$$
+"""
+
+PREVIOUS_ENSURE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_spimex_trading_results_partition(trade_date date) RETURNS text
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start date := date_trunc('month', trade_date)::date;
+    partition_name text := format('spimex_trading_results_p%s', to_char(month_start, 'YYYY_MM'));
+BEGIN
+    IF to_regclass(partition_name) IS NULL THEN
+        -- Несколько воркеров парсера могут одновременно встретить новый месяц
+        PERFORM pg_advisory_xact_lock(hashtext(partition_name));
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF spimex_trading_results FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, (month_start + interval '1 month')::date
+        );
+    END IF;
+    RETURN partition_name;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+    op.execute(ENSURE_PARTITION_FUNCTION)
+
+
+def downgrade() -> None:
+    # Строки из DEFAULT переносятся в месячные секции, чтобы не потерять их вместе с ней
+    op.execute(
+        f"""
+        SELECT ensure_spimex_trading_results_partition(month)
+        FROM (SELECT DISTINCT date_trunc('month', date)::date AS month FROM {DEFAULT_PARTITION}) AS months
+        """
+    )
+    op.execute(f'DROP TABLE {DEFAULT_PARTITION}')
+    op.execute(PREVIOUS_ENSURE_PARTITION_FUNCTION)
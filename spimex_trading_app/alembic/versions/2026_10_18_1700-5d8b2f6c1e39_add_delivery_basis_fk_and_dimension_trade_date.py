@@ -0,0 +1,70 @@
+"""add delivery basis fk and dimension trade date
+
+Revision ID: 5d8b2f6c1e39
+Revises: 9a4c6e1f2d83
+Create Date: 2026-10-18 17:00:41.218764
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8b2f6c1e39'
+down_revision: Union[str, None] = '9a4c6e1f2d83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Дата бюллетеня, из которого взяты наименования: бюллетени загружаются параллельно и не по порядку,
+    # и более старый бюллетень не должен перезаписывать наименования из более свежего
+    op.add_column('spimex_delivery_bases', sa.Column('trade_date', sa.Date(), nullable=True))
+    op.add_column('spimex_instruments', sa.Column('trade_date', sa.Date(), nullable=True))
+    op.execute(
+        """
+        UPDATE spimex_delivery_bases AS bases
+        SET trade_date = latest.trade_date
+        FROM (
+            SELECT delivery_basis_id, max(date) AS trade_date
+            FROM spimex_trading_results
+            GROUP BY delivery_basis_id
+        ) AS latest
+        WHERE latest.delivery_basis_id = bases.delivery_basis_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE spimex_instruments AS instruments
+        SET trade_date = latest.trade_date
+        FROM (
+            SELECT exchange_product_id, max(date) AS trade_date
+            FROM spimex_trading_results
+            GROUP BY exchange_product_id
+        ) AS latest
+        WHERE latest.exchange_product_id = instruments.exchange_product_id
+        """
+    )
+    # Записи без торгов уступают наименованиям из любого загруженного позже бюллетеня
+    op.execute("UPDATE spimex_delivery_bases SET trade_date = '-infinity' WHERE trade_date IS NULL")
+    op.execute("UPDATE spimex_instruments SET trade_date = '-infinity' WHERE trade_date IS NULL")
+    op.alter_column('spimex_delivery_bases', 'trade_date', nullable=False)
+    op.alter_column('spimex_instruments', 'trade_date', nullable=False)
+
+    # Базисы из торгов попали в справочник при его заполнении, поэтому ограничение проверяется без ошибок
+    op.create_foreign_key(
+        op.f('fk_spimex_trading_results_delivery_basis_id_spimex_delivery_bases'),
+        'spimex_trading_results', 'spimex_delivery_bases',
+        ['delivery_basis_id'], ['delivery_basis_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        op.f('fk_spimex_trading_results_delivery_basis_id_spimex_delivery_bases'),
+        'spimex_trading_results', type_='foreignkey',
+    )
+    op.drop_column('spimex_instruments', 'trade_date')
+    op.drop_column('spimex_delivery_bases', 'trade_date')
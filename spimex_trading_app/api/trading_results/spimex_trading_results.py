@@ -1,11 +1,23 @@
 from datetime import date
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, Query
-from fastapi_cache.decorator import cache
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache.keys import (
+    AGGREGATED_DYNAMICS_NAMESPACE,
+    LAST_TRADING_DATES_NAMESPACE,
+    LAST_TRADINGS_NAMESPACE,
+)
+from core.cache.single_flight import cached
+from core.cache.tiles import dynamics_page
+from core.config import settings
+from core.export import check_export, export_filename, export_media_type, export_rows
 from core.models import db_helper
+from core.pagination import decode_cursor
+from core.schemas.spimex_trading_results import AggregationDimension, ExportCompression, ExportFormat
 from filters.trading_filters import SpimexTradingResultsFilter
 from repository.trading_result_repository import SpimexTradingResultsRepository
 
@@ -13,31 +25,105 @@ router = APIRouter(tags=["Tradings"])
 
 
 @router.get("/last_trading_dates/{days}")
-@cache(expire=3600 * 24)
-async def get_last_trading_dates(session: Annotated[AsyncSession, Depends(db_helper.session_getter),], days: int):
+@cached(namespace=LAST_TRADING_DATES_NAMESPACE)
+async def get_last_trading_dates(session: Annotated[AsyncSession, Depends(db_helper.read_session_getter),], days: int):
     last_trading_dates = await SpimexTradingResultsRepository(session=session).get_last_trading_dates(days)
     return last_trading_dates
     
 
 @router.get("/dynamics")
-@cache(expire=3600 * 24)
 async def get_dynamics(
+        request: Request,
         start_date: Annotated[date, Query(..., description="Start date in format YYYY-MM-DD")],
         end_date: Annotated[date, Query(..., description="End date in format YYYY-MM-DD")],
         str_filter: Annotated[SpimexTradingResultsFilter, Depends(SpimexTradingResultsFilter)],
-        session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+        session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
+        limit: Annotated[int, Query(ge=1, le=settings.pagination.max_page_size, description="Page size")] = (
+            settings.pagination.default_page_size
+        ),
+        cursor: Annotated[Optional[str], Query(description="next_cursor from the previous page")] = None,
 ):
-    last_trading_dates = await SpimexTradingResultsRepository(session=session).get_dynamics(
-        start_date, end_date, str_filter
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Страница собирается из помесячных фрагментов кэша, общих для пересекающихся периодов
+    return await dynamics_page(request, session, start_date, end_date, str_filter, limit, after)
+
+
+@router.get("/dynamics/stream")
+async def stream_dynamics(
+        start_date: Annotated[date, Query(..., description="Start date in format YYYY-MM-DD")],
+        end_date: Annotated[date, Query(..., description="End date in format YYYY-MM-DD")],
+        str_filter: Annotated[SpimexTradingResultsFilter, Depends(SpimexTradingResultsFilter)],
+):
+    async def ndjson_lines():
+        # Сессия живёт столько же, сколько отдаётся ответ, поэтому открывается внутри генератора
+        async with db_helper.read_session_factory() as session:
+            batches = SpimexTradingResultsRepository(session=session).stream_dynamics(
+                start_date, end_date, str_filter, batch_size=settings.pagination.stream_batch_size
+            )
+            async for batch in batches:
+                yield b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in batch)
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@router.get("/dynamics/export")
+async def export_dynamics(
+        start_date: Annotated[date, Query(..., description="Start date in format YYYY-MM-DD")],
+        end_date: Annotated[date, Query(..., description="End date in format YYYY-MM-DD")],
+        str_filter: Annotated[SpimexTradingResultsFilter, Depends(SpimexTradingResultsFilter)],
+        export_format: Annotated[ExportFormat, Query(alias="format", description="File format")] = ExportFormat.csv,
+        compression: Annotated[ExportCompression, Query(description="Compression codec")] = ExportCompression.none,
+):
+    try:
+        check_export(export_format, compression)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ImportError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+
+    async def file_chunks():
+        # Строки читаются серверным курсором пачками, поэтому выгрузка любого периода не копится в памяти
+        async with db_helper.read_session_factory() as session:
+            batches = SpimexTradingResultsRepository(session=session).stream_dynamics(
+                start_date, end_date, str_filter, batch_size=settings.pagination.export_batch_size
+            )
+            async for chunk in export_rows(batches, export_format, compression):
+                yield chunk
+
+    filename = export_filename(f"spimex_{start_date.isoformat()}_{end_date.isoformat()}", export_format, compression)
+    return StreamingResponse(
+        file_chunks(),
+        media_type=export_media_type(export_format, compression),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    return last_trading_dates
+
+
+@router.get("/dynamics/aggregate")
+@cached(namespace=AGGREGATED_DYNAMICS_NAMESPACE)
+async def get_aggregated_dynamics(
+        start_date: Annotated[date, Query(..., description="Start date in format YYYY-MM-DD")],
+        end_date: Annotated[date, Query(..., description="End date in format YYYY-MM-DD")],
+        str_filter: Annotated[SpimexTradingResultsFilter, Depends(SpimexTradingResultsFilter)],
+        session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
+        group_by: Annotated[list[AggregationDimension], Query(description="Grouping dimensions")] = (
+            [AggregationDimension.date]
+        ),
+):
+    aggregated_dynamics = await SpimexTradingResultsRepository(session=session).get_aggregated_dynamics(
+        start_date, end_date, str_filter, group_by
+    )
+    return aggregated_dynamics
 
 
 @router.get("/last_tradings")
-@cache(expire=3600 * 24)
+@cached(namespace=LAST_TRADINGS_NAMESPACE)
 async def get_last_trading(
         str_filter: Annotated[SpimexTradingResultsFilter, Depends(SpimexTradingResultsFilter)],
-        session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+        session: Annotated[AsyncSession, Depends(db_helper.read_session_getter)],
 ):
     last_tradings = await SpimexTradingResultsRepository(session=session).get_trading_results(str_filter)
     return last_tradings
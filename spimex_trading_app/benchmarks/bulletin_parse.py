@@ -0,0 +1,147 @@
+"""
+Бенчмарк разбора Excel-бюллетеня: время разбора одного файла и прирост пикового RSS процесса за разбор.
+
+Сравнивает прежний разбор (pd.read_excel всего листа в DataFrame) с разбором parsing.excel:
+из содержимого в памяти и из временного файла на диске, куда парсер переносит крупные загрузки.
+Каждый замер выполняется в отдельном процессе, поэтому пиковый RSS (ru_maxrss) не накапливается
+между замерами. ru_maxrss - пик за всё время жизни процесса, поэтому до разбора снимается базовый
+пик процесса с загруженными модулями, а расход на разбор - разница пиков после и до него.
+Без --file бюллетень генерируется (нужен xlwt).
+
+Запуск из папки spimex_trading_app:
+
+    python -m benchmarks.bulletin_parse --rows 5000
+    python -m benchmarks.bulletin_parse --file oil_xls_20240105162000.xls
+"""
+import argparse
+import datetime
+import io
+import multiprocessing
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from parsing.excel import (
+    BASIS_COLUMN,
+    CODE_COLUMN,
+    COUNT_COLUMN,
+    HEADER_MARKER,
+    NAME_COLUMN,
+    TOTAL_COLUMN,
+    VOLUME_COLUMN,
+    parse_bulletin,
+)
+
+TRADE_DATE = datetime.date(2024, 1, 5)
+
+
+def make_bulletin_xls(rows: int, trade_date: datetime.date = TRADE_DATE) -> bytes:
+    """
+    Создаёт XLS-файл с разметкой бюллетеня СПбМТСБ: шапка, строка с единицей измерения,
+    заголовок таблицы, строки инструментов (каждая третья без сделок) и строка итогов.
+    :param rows: Количество строк инструментов.
+    :param trade_date: Дата торгов в шапке бюллетеня.
+    """
+    import xlwt
+
+    workbook = xlwt.Workbook(encoding='utf-8')
+    sheet = workbook.add_sheet('TRADE_SUMMARY')
+    sheet.write(2, 1, 'Бюллетень по итогам торгов в Секции «Нефтепродукты»')
+    sheet.write(3, 1, f'Дата торгов: {trade_date:%d.%m.%Y}')
+    sheet.write(5, 1, HEADER_MARKER)
+    headers = ('№', CODE_COLUMN, NAME_COLUMN, BASIS_COLUMN, VOLUME_COLUMN, TOTAL_COLUMN,
+               'Изменение рыночной\nцены к цене\nпредыдуего\nдня', COUNT_COLUMN)
+    for column, header in enumerate(headers, start=1):
+        sheet.write(6, column, header)
+    for row in range(rows):
+        code = f'A{row % 1000:03d}{"ANK" if row % 2 else "NVY"}{row // 1000 % 1000:03d}F'
+        values = (row + 1, code, f'Бензин (АИ-92-К5), инструмент {row}', 'Ангарск-группа станций',
+                  60 + row % 100, 4_000_000.0 + row, 0, row % 3 or '-')
+        for column, value in enumerate(values, start=1):
+            sheet.write(7 + row, column, value)
+    sheet.write(7 + rows, 2, 'Итого:')
+    sheet.write(7 + rows, 8, rows)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def parse_whole_sheet(file_content: bytes, trade_date: datetime.date):
+    """
+    Прежний разбор: весь лист в DataFrame, затем поиск заголовка и фильтрация.
+    """
+    import pandas as pd
+
+    raw_df = pd.read_excel(io.BytesIO(file_content), header=None)
+    marker_rows = raw_df.apply(
+        lambda column: column.astype(str).str.contains(HEADER_MARKER, regex=False, na=False)
+    ).any(axis=1)
+    header_position = raw_df.index.get_loc(marker_rows.idxmax()) + 1
+    df = raw_df.iloc[header_position + 1:]
+    df.columns = raw_df.iloc[header_position]
+    count = pd.to_numeric(df[COUNT_COLUMN], errors='coerce')
+    return df[(count > 0) & df[NAME_COLUMN].notna()][[CODE_COLUMN, TOTAL_COLUMN]].assign(date=trade_date)
+
+
+def measure(strategy: str, path: str) -> tuple[float, int, int, int]:
+    """
+    Выполняется в отдельном процессе.
+
+    :return: (время разбора в мс, строк, пиковый RSS процесса до разбора в КиБ,
+             пиковый RSS процесса после разбора в КиБ).
+    """
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if strategy == 'file':
+        result = parse_bulletin(path, TRADE_DATE)
+    else:
+        with open(path, 'rb') as file:
+            content = file.read()
+        parse = parse_whole_sheet if strategy == 'read_excel' else parse_bulletin
+        result = parse(content, TRADE_DATE)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return elapsed_ms, len(result), baseline_kb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+STRATEGIES = {
+    'read_excel': 'pd.read_excel всего листа',
+    'bytes': 'xlrd, нужные столбцы, из памяти',
+    'file': 'xlrd, нужные столбцы, из файла',
+}
+
+
+def write_bulletin_xls(path: str, rows: int) -> None:
+    with open(path, 'wb') as file:
+        file.write(make_bulletin_xls(rows))
+
+
+def run(path: str) -> None:
+    # spawn: процесс замера не наследует память родителя. Пиковый RSS в Linux сохраняется
+    # и после exec, поэтому родитель не должен сам разбирать или генерировать большие файлы
+    context = multiprocessing.get_context('spawn')
+    print(f'{"разбор":<36} {"мс":>8} {"строк":>7} {"пик до, МиБ":>12} {"пик после, МиБ":>15} {"прирост, МиБ":>13}')
+    for strategy, name in STRATEGIES.items():
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            elapsed_ms, rows, baseline_kb, peak_kb = executor.submit(measure, strategy, path).result()
+        print(f'{name:<36} {elapsed_ms:8.1f} {rows:7d} {baseline_kb / 1024:12.1f} {peak_kb / 1024:15.1f} '
+              f'{(peak_kb - baseline_kb) / 1024:13.1f}')
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--file', help='Путь к XLS-файлу бюллетеня')
+    arg_parser.add_argument('--rows', type=int, default=5000, help='Строк в сгенерированном бюллетене')
+    args = arg_parser.parse_args()
+    if args.file:
+        run(args.file)
+        return
+    with tempfile.NamedTemporaryFile(suffix='.xls') as file:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            executor.submit(write_bulletin_xls, file.name, args.rows).result()
+        run(file.name)
+
+
+if __name__ == '__main__':
+    main()
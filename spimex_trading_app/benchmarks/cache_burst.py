@@ -0,0 +1,134 @@
+"""
+Нагрузочная проверка объединения промахов кэша.
+
+Отправляет пачку одновременных одинаковых запросов к маршруту с холодным кэшем и считает,
+сколько запросов дошло до Postgres: с fastapi_cache.decorator.cache (до) и с
+core.cache.single_flight.cached (после).
+
+Запуск из папки spimex_trading_app (нужны локальные Postgres и Redis из настроек):
+
+    python -m benchmarks.cache_burst --requests 200
+"""
+import argparse
+import asyncio
+import time
+from typing import Annotated
+
+from fastapi import Depends, FastAPI
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache
+from redis import asyncio as aioredis
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache.keys import trading_key_builder
+from core.cache.single_flight import cached
+from core.config import settings
+from core.models import db_helper
+from filters.trading_filters import SpimexTradingResultsFilter
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+BEFORE_NAMESPACE = "benchmark_before"
+AFTER_NAMESPACE = "benchmark_after"
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before")
+    @cache(namespace=BEFORE_NAMESPACE)
+    async def before(
+            str_filter: Annotated[SpimexTradingResultsFilter, Depends(SpimexTradingResultsFilter)],
+            session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    ):
+        return await SpimexTradingResultsRepository(session=session).get_trading_results(str_filter)
+
+    @app.get("/after")
+    @cached(namespace=AFTER_NAMESPACE)
+    async def after(
+            str_filter: Annotated[SpimexTradingResultsFilter, Depends(SpimexTradingResultsFilter)],
+            session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    ):
+        return await SpimexTradingResultsRepository(session=session).get_trading_results(str_filter)
+
+    return app
+
+
+async def asgi_get(app: FastAPI, path: str) -> int:
+    """
+    Выполняет GET-запрос к ASGI-приложению в том же процессе.
+
+    :return: HTTP-статус ответа.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return next(message["status"] for message in messages if message["type"] == "http.response.start")
+
+
+async def burst(app: FastAPI, path: str, namespace: str, requests: int) -> None:
+    await FastAPICache.clear(namespace=namespace)
+    queries = 0
+
+    def count_query(*_):
+        nonlocal queries
+        queries += 1
+
+    event.listen(db_helper.engine.sync_engine, "before_cursor_execute", count_query)
+    try:
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(asgi_get(app, path) for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(db_helper.engine.sync_engine, "before_cursor_execute", count_query)
+    failed = sum(status != 200 for status in statuses)
+    print(f"{path:>8}: {requests} запросов, {queries} запросов к БД, {failed} ошибок, {elapsed * 1000:.0f} мс")
+
+
+async def run(requests: int) -> None:
+    FastAPICache.init(
+        RedisBackend(aioredis.from_url(settings.cache.url)),
+        prefix=settings.cache.prefix,
+        expire=settings.cache.expire,
+        key_builder=trading_key_builder,
+    )
+    app = create_app()
+    try:
+        await burst(app, "/before", BEFORE_NAMESPACE, requests)
+        await burst(app, "/after", AFTER_NAMESPACE, requests)
+    finally:
+        await FastAPICache.clear(namespace=BEFORE_NAMESPACE)
+        await FastAPICache.clear(namespace=AFTER_NAMESPACE)
+        await db_helper.dispose()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--requests", type=int, default=200, help="Количество одновременных запросов")
+    args = arg_parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
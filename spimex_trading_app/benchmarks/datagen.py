@@ -0,0 +1,235 @@
+"""
+Генерация синтетических результатов торгов прямо в Postgres через generate_series.
+
+Синтетические торги датируются ранее SYNTHETIC_DATE_LIMIT, поэтому не пересекаются
+с реальными бюллетенями (с 2023 года) и удаляются функцией cleanup.
+
+Заполнение готовым объёмом для бенчмарков (данные остаются до запуска с --cleanup),
+из папки spimex_trading_app:
+
+    python -m benchmarks.datagen --scale 1M
+    python -m benchmarks.datagen --scale 10M
+    python -m benchmarks.datagen --cleanup
+"""
+import argparse
+import asyncio
+import datetime
+import time
+
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.models import IngestionLedger, TradingDay
+from core.models.db_helper import create_ingestion_db_helper
+
+SYNTHETIC_START_DATE = datetime.date(1990, 1, 1)
+SYNTHETIC_DATE_LIMIT = datetime.date(2000, 1, 1)
+MAX_DAYS = (SYNTHETIC_DATE_LIMIT - SYNTHETIC_START_DATE).days
+
+# Готовые объёмы: (дней, инструментов в дне). Каждый календарный день - торговый
+SCALES = {
+    '100K': (100, 1000),
+    '1M': (1000, 1000),
+    '10M': (3334, 3000),
+}
+
+# Коды устроены как в реальных бюллетенях (tests/fixtures/trading_results.py, например A100ANK060F):
+# 4 символа вида продукта, 3 буквы базиса поставки, 3 цифры лота и вид поставки.
+# Около 150 видов продукта, до 100 базисов поставки и 2 вида поставки, как в реальных бюллетенях;
+# первые базисы - реальные базисы из фикстур
+SYNTHETIC_INSTRUMENTS_SQL = """generate_series(0, CAST(:instruments AS integer) - 1) AS i,
+         LATERAL (
+             SELECT
+                 (ARRAY['A', 'D', 'M', 'P', 'T'])[i % 150 % 5 + 1] || lpad((i % 150)::text, 3, '0') AS oil_id,
+                 CASE
+                     WHEN i / 150 % 100 < 4 THEN (ARRAY['UFM', 'ANK', 'NVY', 'STI'])[i / 150 % 100 + 1]
+                     ELSE 'B' || chr(65 + i / 150 % 100 / 26) || chr(65 + i / 150 % 100 % 26)
+                 END AS delivery_basis_id,
+                 lpad((i / 15000 % 1000)::text, 3, '0') AS lot,
+                 (ARRAY['F', 'S'])[i % 2 + 1] AS delivery_type_id
+         ) AS instrument"""
+
+# Фильтр, которому соответствует один синтетический инструмент (i = 1) в каждом дне
+SAMPLE_OIL_ID = 'D001'
+SAMPLE_DELIVERY_BASIS_ID = 'UFM'
+SAMPLE_DELIVERY_TYPE_ID = 'S'
+
+SEED_DELIVERY_BASES_SQL = text(
+    f"""
+    INSERT INTO spimex_delivery_bases (delivery_basis_id, delivery_basis_name, trade_date)
+    SELECT DISTINCT delivery_basis_id, 'Синтетический базис ' || delivery_basis_id, CAST(:start_date AS date)
+    FROM {SYNTHETIC_INSTRUMENTS_SQL}
+    ON CONFLICT DO NOTHING
+    """
+)
+
+SEED_INSTRUMENTS_SQL = text(
+    f"""
+    INSERT INTO spimex_instruments (
+        exchange_product_id, exchange_product_name, oil_id, delivery_basis_id, delivery_type_id, trade_date
+    )
+    SELECT
+        oil_id || delivery_basis_id || lot || delivery_type_id,
+        'Синтетический продукт ' || oil_id || ', базис ' || delivery_basis_id,
+        oil_id,
+        delivery_basis_id,
+        delivery_type_id,
+        CAST(:start_date AS date)
+    FROM {SYNTHETIC_INSTRUMENTS_SQL}
+    ON CONFLICT DO NOTHING
+    """
+)
+
+SEED_SQL = text(
+    f"""
+    INSERT INTO spimex_trading_results (
+        exchange_product_id, oil_id, delivery_basis_id, delivery_type_id, volume, total, count, date
+    )
+    SELECT
+        oil_id || delivery_basis_id || lot || delivery_type_id,
+        oil_id,
+        delivery_basis_id,
+        delivery_type_id,
+        volume,
+        volume * (40000 + (i * 37 + d) % 20000),
+        1 + (i + d) % 5,
+        CAST(:start_date AS date) + d
+    FROM generate_series(0, CAST(:days AS integer) - 1) AS d,
+         {SYNTHETIC_INSTRUMENTS_SQL},
+         LATERAL (SELECT (60 + (i * 7 + d) % 500)::float AS volume) AS trade
+    """
+)
+
+# Справочники без торгов: синтетические и оставшиеся от бенчмарка записи бюллетеней
+DELETE_ORPHAN_INSTRUMENTS_SQL = text(
+    """
+    DELETE FROM spimex_instruments AS instruments
+    WHERE NOT EXISTS (
+        SELECT 1 FROM spimex_trading_results AS results
+        WHERE results.exchange_product_id = instruments.exchange_product_id
+    )
+    """
+)
+
+DELETE_ORPHAN_DELIVERY_BASES_SQL = text(
+    """
+    DELETE FROM spimex_delivery_bases AS bases
+    WHERE NOT EXISTS (
+        SELECT 1 FROM spimex_instruments AS instruments
+        WHERE instruments.delivery_basis_id = bases.delivery_basis_id
+    ) AND NOT EXISTS (
+        SELECT 1 FROM spimex_trading_results AS results
+        WHERE results.delivery_basis_id = bases.delivery_basis_id
+    )
+    """
+)
+
+# Месячные секции под синтетический период; SYNTHETIC_START_DATE - первое число месяца
+SEED_PARTITIONS_SQL = text(
+    """
+    SELECT ensure_spimex_trading_results_partition(CAST(month AS date))
+    FROM generate_series(
+        CAST(:start_date AS date), CAST(:start_date AS date) + CAST(:days AS integer) - 1, interval '1 month'
+    ) AS month
+    """
+)
+
+# Удаление секции целиком быстрее DELETE и не оставляет мёртвых строк
+DROP_PARTITIONS_SQL = text(
+    f"""
+    DO $$
+    DECLARE
+        partition_name text;
+    BEGIN
+        FOR partition_name IN
+            SELECT format('spimex_trading_results_p%s', to_char(month, 'YYYY_MM'))
+            FROM generate_series(
+                DATE '{SYNTHETIC_START_DATE.isoformat()}', DATE '{SYNTHETIC_DATE_LIMIT.isoformat()}' - 1, interval '1 month'
+            ) AS month
+        LOOP
+            EXECUTE format('DROP TABLE IF EXISTS %I', partition_name);
+        END LOOP;
+    END
+    $$
+    """
+)
+
+SEED_TRADING_DAYS_SQL = text(
+    """
+    INSERT INTO trading_days (date, row_count, total_volume, total_value)
+    SELECT date, count(*), sum(volume), sum(total)
+    FROM spimex_trading_results
+    WHERE date < :date_limit
+    GROUP BY date
+    """
+)
+
+
+async def seed(connection: AsyncConnection, days: int, instruments: int) -> int:
+    """
+    Заполняет справочники синтетическими инструментами и базисами поставки,
+    spimex_trading_results - синтетическими торгами: instruments строк на каждый из days дней,
+    и календарь торгов trading_days итогами этих дней.
+
+    :param connection: Соединение с БД.
+    :param days: Количество торговых дней начиная с SYNTHETIC_START_DATE.
+    :param instruments: Количество инструментов в каждом дне.
+    :return: Количество добавленных строк.
+    :raises ValueError: если период выходит за SYNTHETIC_DATE_LIMIT.
+    """
+    if days > MAX_DAYS:
+        raise ValueError(f'Синтетический период не длиннее {MAX_DAYS} дней')
+    await connection.execute(SEED_PARTITIONS_SQL, {'start_date': SYNTHETIC_START_DATE, 'days': days})
+    dimension_params = {'start_date': SYNTHETIC_START_DATE, 'instruments': instruments}
+    await connection.execute(SEED_DELIVERY_BASES_SQL, dimension_params)
+    await connection.execute(SEED_INSTRUMENTS_SQL, dimension_params)
+    await connection.execute(SEED_SQL, {'start_date': SYNTHETIC_START_DATE, 'days': days, 'instruments': instruments})
+    await connection.execute(SEED_TRADING_DAYS_SQL, {'date_limit': SYNTHETIC_DATE_LIMIT})
+    await connection.execute(text('ANALYZE spimex_trading_results'))
+    return days * instruments
+
+
+async def cleanup(connection: AsyncConnection) -> None:
+    """
+    Удаляет синтетические торги вместе с их секциями, итогами, записями журнала загрузок
+    и записями справочников, на которые больше не ссылаются торги.
+
+    :param connection: Соединение с БД.
+    """
+    await connection.execute(DROP_PARTITIONS_SQL)
+    await connection.execute(DELETE_ORPHAN_INSTRUMENTS_SQL)
+    await connection.execute(DELETE_ORPHAN_DELIVERY_BASES_SQL)
+    await connection.execute(delete(TradingDay).where(TradingDay.date < SYNTHETIC_DATE_LIMIT))
+    await connection.execute(delete(IngestionLedger).where(IngestionLedger.trade_date < SYNTHETIC_DATE_LIMIT))
+
+
+async def run(days: int, instruments: int, cleanup_only: bool) -> None:
+    # Пул API открывает транзакции только на чтение, данные заполняются через профиль загрузки
+    ingestion_db_helper = create_ingestion_db_helper()
+    try:
+        async with ingestion_db_helper.engine.begin() as connection:
+            await cleanup(connection)
+            if cleanup_only:
+                print('Синтетические данные удалены')
+                return
+            started = time.perf_counter()
+            rows = await seed(connection, days, instruments)
+        print(f'Добавлено {rows} синтетических строк ({days} дней по {instruments} инструментов) '
+              f'за {time.perf_counter() - started:.1f} с')
+    finally:
+        await ingestion_db_helper.dispose()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--scale', choices=SCALES, default='1M', help='Готовый объём данных')
+    arg_parser.add_argument('--days', type=int, help='Количество торговых дней вместо --scale')
+    arg_parser.add_argument('--instruments', type=int, help='Количество инструментов в дне вместо --scale')
+    arg_parser.add_argument('--cleanup', action='store_true', help='Только удалить синтетические данные')
+    args = arg_parser.parse_args()
+    days, instruments = SCALES[args.scale]
+    asyncio.run(run(args.days or days, args.instruments or instruments, args.cleanup))
+
+
+if __name__ == '__main__':
+    main()
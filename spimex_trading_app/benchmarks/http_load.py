@@ -0,0 +1,199 @@
+"""
+Нагрузочный сценарий HTTP API: задержки p50/p95/p99 и RPS при холодном и прогретом кэше.
+
+Запросы идут к запущенному API (uvicorn с локальными Postgres и Redis) по синтетическим данным
+из python -m benchmarks.datagen. Сценарии:
+
+- cold: кэш очищается, каждый запрос уникален (свой месяц и фильтр /dynamics, свой days
+  у /last_trading_dates), поэтому все ответы строятся по БД;
+- warm: небольшой набор популярных запросов прогревается одним проходом, затем запрашивается по кругу;
+- mixed: случайная смесь маршрутов, периодов и фильтров, где популярные фильтры встречаются чаще, -
+  часть запросов попадает в кэш, часть нет.
+
+Для каждого сценария выводятся задержки, RPS, доля ошибок и распределение статусов кэша
+из заголовка X-FastAPI-Cache; результаты сохраняются в JSON (см. benchmarks.results).
+
+Запуск из папки spimex_trading_app:
+
+    python -m benchmarks.datagen --scale 1M
+    uvicorn main:main_app --workers 4 &
+    python -m benchmarks.http_load --base-url http://localhost:8000 --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+import aiohttp
+from redis import Redis
+
+from benchmarks import datagen, results
+from core.cache.invalidation import clear_namespace
+from core.cache.tiles import month_end, month_starts
+from core.config import settings
+
+CACHE_STATUS_HEADER = 'X-FastAPI-Cache'
+SCENARIOS = ('cold', 'warm', 'mixed')
+# Виды продукта синтетических данных в порядке популярности: первые запрашиваются чаще
+OIL_IDS = [f'{"ADMPT"[n % 5]}{n:03d}' for n in range(150)]
+BASIS_IDS = ['UFM', 'ANK', 'NVY', 'STI']
+
+
+def route(path: str, **params) -> str:
+    query = urlencode({name: value for name, value in params.items() if value is not None})
+    prefix = f'{settings.api.prefix}{settings.api.smt.trading_results}'
+    return f'{prefix}{path}?{query}' if query else f'{prefix}{path}'
+
+
+def synthetic_months(days: int) -> list[datetime.date]:
+    last_date = datagen.SYNTHETIC_START_DATE + datetime.timedelta(days=days - 1)
+    return month_starts(datagen.SYNTHETIC_START_DATE, last_date)
+
+
+def cold_paths(count: int, days: int) -> list[str]:
+    """
+    Уникальные запросы: ни один не использует ответ или фрагмент кэша другого.
+    """
+    months = synthetic_months(days)
+    paths = []
+    for i in range(count):
+        if i % 10 == 0:
+            # /last_trading_dates/{days} с уникальным days - отдельный ключ кэша
+            paths.append(route(f'/last_trading_dates/{i // 10 + 1}'))
+            continue
+        month = months[i % len(months)]
+        oil_id = OIL_IDS[i // len(months) % len(OIL_IDS)]
+        paths.append(route('/dynamics', start_date=month, end_date=month_end(month), oil_id=oil_id))
+    return paths
+
+
+def warm_paths(days: int) -> list[str]:
+    """
+    Популярные запросы: последние даты, последние торги и первые страницы /dynamics за неделю.
+    """
+    middle = datagen.SYNTHETIC_START_DATE + datetime.timedelta(days=days // 2)
+    week_end = middle + datetime.timedelta(days=6)
+    return [
+        route('/last_trading_dates/5'),
+        route('/last_trading_dates/10'),
+        route('/last_tradings'),
+        route('/last_tradings', oil_id=datagen.SAMPLE_OIL_ID),
+        route('/dynamics', start_date=middle, end_date=week_end),
+        route('/dynamics', start_date=middle, end_date=week_end, oil_id=datagen.SAMPLE_OIL_ID),
+        route('/dynamics', start_date=middle, end_date=week_end, delivery_basis_id=datagen.SAMPLE_DELIVERY_BASIS_ID),
+    ]
+
+
+def mixed_paths(count: int, days: int, seed: int) -> list[str]:
+    """
+    Случайная смесь маршрутов и фильтров. Популярность видов продукта убывает как 1/ранг,
+    поэтому частые фильтры попадают в кэш, а редкие - нет.
+    """
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(OIL_IDS) + 1)]
+    paths = []
+    for _ in range(count):
+        kind = rng.random()
+        oil_id = rng.choices(OIL_IDS, weights)[0] if rng.random() < 0.7 else None
+        basis_id = rng.choice(BASIS_IDS) if rng.random() < 0.3 else None
+        if kind < 0.15:
+            paths.append(route(f'/last_trading_dates/{rng.choice((5, 10, 30))}'))
+        elif kind < 0.35:
+            paths.append(route('/last_tradings', oil_id=oil_id, delivery_basis_id=basis_id))
+        elif kind < 0.45:
+            start = datagen.SYNTHETIC_START_DATE + datetime.timedelta(days=rng.randrange(max(days - 90, 1)))
+            paths.append(route('/dynamics/aggregate', start_date=start, end_date=start + datetime.timedelta(days=90),
+                               oil_id=oil_id))
+        else:
+            start = datagen.SYNTHETIC_START_DATE + datetime.timedelta(days=rng.randrange(max(days - 30, 1)))
+            length = rng.choice((1, 7, 30))
+            paths.append(route('/dynamics', start_date=start, end_date=start + datetime.timedelta(days=length - 1),
+                               oil_id=oil_id, delivery_basis_id=basis_id))
+    return paths
+
+
+async def load(base_url: str, paths: list[str], concurrency: int, timeout: float) -> dict:
+    """
+    Выполняет запросы по списку в concurrency параллельных потоков.
+
+    :return: Сводка задержек (benchmarks.results.summarize) со статусами ответов и кэша.
+    """
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    cache_statuses: Counter = Counter()
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        while not queue.empty():
+            path = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                async with session.get(f'{base_url}{path}') as response:
+                    await response.read()
+                    statuses[str(response.status)] += 1
+                    cache_statuses[response.headers.get(CACHE_STATUS_HEADER, 'none')] += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                statuses[type(e).__name__] += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    summary = results.summarize(latencies, elapsed)
+    errors = sum(count for status, count in statuses.items() if not status.startswith('2'))
+    summary['errors'] = errors
+    summary['statuses'] = dict(statuses)
+    summary['cache'] = dict(cache_statuses)
+    return summary
+
+
+def clear_cache() -> int:
+    # Сброс публикуется в канал инвалидации, поэтому кэш в памяти воркеров API тоже очищается
+    return clear_namespace(Redis.from_url(settings.cache.url), settings.cache.prefix, settings.cache.invalidation_channel)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    summaries = {}
+    for scenario in args.scenarios:
+        if scenario == 'cold':
+            print(f'Очищено ключей кэша: {clear_cache()}')
+            paths = cold_paths(args.requests, args.days)
+        elif scenario == 'warm':
+            paths = warm_paths(args.days)
+            await load(args.base_url, paths, args.concurrency, args.timeout)
+            paths = [paths[i % len(paths)] for i in range(args.requests)]
+        else:
+            paths = mixed_paths(args.requests, args.days, args.seed)
+        summary = await load(args.base_url, paths, args.concurrency, args.timeout)
+        summaries[scenario] = summary
+        print(f'{scenario:<6} p50 {summary["p50_ms"]:8.2f} мс  p95 {summary["p95_ms"]:8.2f} мс  '
+              f'p99 {summary["p99_ms"]:8.2f} мс  {summary["rps"]:8.1f} RPS  ошибок {summary["errors"]}  '
+              f'кэш {summary["cache"]}')
+    return summaries
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--base-url', default='http://localhost:8000', help='Адрес запущенного API')
+    arg_parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    arg_parser.add_argument('--requests', type=int, default=2000, help='Запросов в сценарии')
+    arg_parser.add_argument('--concurrency', type=int, default=32, help='Параллельных запросов')
+    arg_parser.add_argument('--days', type=int, default=1000, help='Количество синтетических торговых дней в БД')
+    arg_parser.add_argument('--timeout', type=float, default=60.0, help='Таймаут запроса, секунды')
+    arg_parser.add_argument('--seed', type=int, default=42, help='Зерно случайной смеси запросов')
+    arg_parser.add_argument('--output', help='Папка для JSON с результатами')
+    args = arg_parser.parse_args()
+    summaries = asyncio.run(run(args))
+    results.save('http_load', vars(args), summaries, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Бенчмарк записи результатов торгов в БД: COPY через временную таблицу против многострочных INSERT.
+
+Запуск из папки spimex_trading_app (нужен локальный Postgres из APP_CONFIG__DB__URL
+с применёнными миграциями):
+
+    python -m benchmarks.ingestion --rows 50000 --files 10
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import time
+
+import pandas as pd
+
+from benchmarks import datagen
+from benchmarks.datagen import SYNTHETIC_START_DATE
+from core.config import settings
+from parser import Parser
+
+INSTRUMENTS = (
+    ('PCS7UFM040S', 'Ацетон технический высший сорт, Уфа-группа станций (самовывоз ж/д)', 'Уфа-группа станций'),
+    ('A100ANK060F', 'Бензин (АИ-100-К5), Ангарск-группа станций (ст. отправления)', 'Ангарск-группа станций'),
+    ('A100NVY060F', 'Бензин (АИ-100-К5), ст. Новоярославская (ст. отправления)', 'ст. Новоярославская'),
+    ('A100STI060F', 'Бензин (АИ-100-К5), ст. Стенькино II (ст. отправления)', 'ст. Стенькино II'),
+)
+
+
+def make_bulletin(rows: int, trade_date: datetime.date) -> pd.DataFrame:
+    """
+    Создаёт DataFrame той же структуры, что возвращает Parser.get_data_from_excel.
+    :param rows: Количество строк в бюллетене.
+    :param trade_date: Дата торговли.
+    :return: DataFrame с синтетическими данными торговли.
+    """
+    instruments = [INSTRUMENTS[i % len(INSTRUMENTS)] for i in range(rows)]
+    # Код инструмента уникален в пределах бюллетеня, иначе строки схлопнутся по ключу (exchange_product_id, date)
+    codes = pd.Series([f'{code[:7]}{i:06d}{code[-1]}' for i, (code, _, _) in enumerate(instruments)])
+    names = [name for _, name, _ in instruments]
+    bases = [basis for _, _, basis in instruments]
+    return pd.DataFrame({
+        'exchange_product_id': codes,
+        'exchange_product_name': names,
+        'oil_id': codes.str[:4],
+        'delivery_basis_id': codes.str[4:7],
+        'delivery_basis_name': bases,
+        'delivery_type_id': codes.str[-1],
+        'volume': [float(60 + i % 100) for i in range(rows)],
+        'total': [float(4_000_000 + i) for i in range(rows)],
+        'count': [float(1 + i % 5) for i in range(rows)],
+        'date': trade_date,
+    })
+
+
+def content_hash(bulletin: pd.DataFrame) -> str:
+    """
+    Хеш содержимого бюллетеня для журнала загрузок: у синтетического бюллетеня нет файла,
+    поэтому хешируются его строки.
+    """
+    return hashlib.sha256(pd.util.hash_pandas_object(bulletin, index=False).values.tobytes()).hexdigest()
+
+
+async def cleanup(parser: Parser) -> None:
+    """
+    Удаляет синтетические данные бенчмарка.
+    :param parser: Экземпляр парсера, через движок которого выполняется удаление.
+    """
+    async with parser.engine.begin() as connection:
+        await datagen.cleanup(connection)
+    # Секции синтетических месяцев и записи справочников удалены, парсер должен создать их заново
+    parser.partition_months.clear()
+    parser.known_instruments.clear()
+    parser.known_delivery_bases.clear()
+
+
+async def run(rows: int, files: int) -> None:
+    parser = Parser()
+    rows_per_file = max(rows // files, 1)
+    bulletins = [
+        make_bulletin(rows_per_file, SYNTHETIC_START_DATE + datetime.timedelta(days=i)) for i in range(files)
+    ]
+    total_rows = rows_per_file * files
+    hashes = [content_hash(bulletin) for bulletin in bulletins]
+
+    try:
+        for mode in ('insert', 'copy'):
+            await cleanup(parser)
+            settings.parser.save_mode = mode
+            started = time.perf_counter()
+            for number, bulletin in enumerate(bulletins):
+                await parser.save_data_to_db(
+                    bulletin, f'benchmark://bulletin/{number}', content_hash=hashes[number]
+                )
+            elapsed = time.perf_counter() - started
+            print(f"{mode:>5}: {total_rows} строк за {elapsed:.2f} с, {total_rows / elapsed:,.0f} строк/с")
+    finally:
+        await cleanup(parser)
+        await parser.engine.dispose()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, default=50_000, help='Общее количество строк')
+    arg_parser.add_argument('--files', type=int, default=10, help='Количество бюллетеней, на которые делятся строки')
+    args = arg_parser.parse_args()
+    asyncio.run(run(args.rows, args.files))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Бенчмарк обхода списка бюллетеней.
+
+Поднимает в том же процессе локальную замену сайта (benchmarks.spimex_server) с задержкой ответов
+и обходит все страницы списка методом Parser.get_trading_all_dates_and_files: по одной странице
+(окно 1, как прежний обход) и окном из --window страниц. Ограничения частоты запросов по умолчанию
+берутся из настроек парсера, как в рабочем запуске. Отдельно сравнивается разбор одной страницы
+полным деревом BeautifulSoup и деревом только из нужных ссылок (SoupStrainer).
+Бюллетени не скачиваются, БД не нужна.
+
+Запуск из папки spimex_trading_app:
+
+    python -m benchmarks.listing_crawl --pages 300 --latency 0.2 --window 16
+"""
+import argparse
+import asyncio
+import time
+
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+from benchmarks.spimex_server import LISTING_PATH, PER_PAGE, create_app, listing_html, trade_dates
+from core.config import settings
+from parser import BULLETIN_LINK_CLASS, Parser
+from parsing.http import create_http_session
+
+
+async def crawl(parser: Parser, window: int) -> tuple[float, int]:
+    """
+    :return: (время обхода в секундах, найдено бюллетеней).
+    """
+    settings.parser.listing_window = window
+    queue = asyncio.Queue()
+    async with create_http_session(settings.parser.connection_limit, 30.0, 60.0) as session:
+        client = parser.create_http_client(session)
+        started = time.perf_counter()
+        await parser.get_trading_all_dates_and_files(client, queue, {})
+        return time.perf_counter() - started, queue.qsize()
+
+
+def compare_parsing(parser: Parser, repeat: int) -> None:
+    html = listing_html(trade_dates(PER_PAGE * 40)[:PER_PAGE], 20, 40)
+    # Страница сайта содержит меню, шапку и подвал; без них разбор полного дерева выглядел бы дешевле
+    html = html.replace('<body>', '<body>' + '<div class="menu"><ul>' + '<li><a href="/x">пункт</a></li>' * 300
+                        + '</ul></div>' + '<p>текст</p>' * 500)
+
+    def full_tree():
+        soup = BeautifulSoup(html, 'html.parser')
+        soup.find_all('a', class_=BULLETIN_LINK_CLASS)
+        soup.select_one('.bx-pag-next a')
+
+    for name, parse in (('полное дерево', full_tree), ('SoupStrainer', lambda: parser.parse_listing(html, 20))):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            parse()
+        print(f'Разбор страницы, {name}: {(time.perf_counter() - started) / repeat * 1000:.2f} мс')
+
+
+async def run(args: argparse.Namespace) -> None:
+    app = create_app(args.pages * PER_PAGE, rows=1, latency=args.latency)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', args.port)
+    await site.start()
+    settings.parser.base_url = f'http://127.0.0.1:{args.port}{LISTING_PATH}'
+    settings.parser.requests_per_second = args.requests_per_second
+    settings.parser.listing_requests_per_second = args.listing_requests_per_second
+    parser = Parser()
+    try:
+        compare_parsing(parser, args.parse_repeat)
+        for window in (1, args.window):
+            elapsed, bulletins = await crawl(parser, window)
+            print(f'Окно {window}: {args.pages} страниц, {bulletins} бюллетеней за {elapsed:.2f} с')
+    finally:
+        parser.parse_executor.shutdown()
+        await parser.db_helper.dispose()
+        await runner.cleanup()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--pages', type=int, default=300, help='Страниц в списке')
+    arg_parser.add_argument('--latency', type=float, default=0.2, help='Средняя задержка ответа, секунды')
+    arg_parser.add_argument('--window', type=int, default=settings.parser.listing_window, help='Окно загрузки страниц')
+    arg_parser.add_argument('--requests-per-second', type=float, default=settings.parser.requests_per_second,
+                            help='Ограничение частоты скачивания файлов, 0 - без ограничения')
+    arg_parser.add_argument('--listing-requests-per-second', type=float,
+                            default=settings.parser.listing_requests_per_second,
+                            help='Ограничение частоты загрузки страниц списка, 0 - без ограничения')
+    arg_parser.add_argument('--parse-repeat', type=int, default=50, help='Повторов разбора страницы')
+    arg_parser.add_argument('--port', type=int, default=8082)
+    args = arg_parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Сквозной офлайн-бенчмарк парсера: parser.main() против локальной замены сайта benchmarks.spimex_server.
+
+Запускает сервер в отдельном процессе (генерация XLS не влияет на пиковый RSS парсера),
+направляет на него settings.parser.base_url, удаляет из журнала загрузок записи о его бюллетенях,
+чтобы каждый запуск скачивал все файлы, и выполняет полный цикл обхода списка, скачивания,
+разбора и записи в БД. Выводит файлы/с, строки/с, пиковый RSS парсера и процессов разбора,
+время этапов и число повторов запросов; результаты сохраняются в JSON (см. benchmarks.results).
+
+Бюллетени сервера датируются последними рабочими днями перед datagen.SYNTHETIC_DATE_LIMIT,
+как синтетические торги benchmarks.datagen, и не пересекаются с реальными бюллетенями.
+Если за эти даты в БД уже есть торги (например, от datagen --scale 10M), бенчмарк не запускается.
+После запуска записанные парсером торги, созданные им месячные секции, итоги дней, записи журнала загрузок
+и справочников удаляются, а отметка завершённого обхода возвращается к прежнему значению.
+Событие о загруженных датах в Celery не отправляется: синтетические даты не должны сбрасывать кэш API.
+
+Запуск из папки spimex_trading_app:
+
+    python -m benchmarks.parser_e2e --files 100 --rows 1000 --latency 0.02 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Optional
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from sqlalchemy import delete, exists, func, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import parser
+from benchmarks import datagen, results
+from benchmarks.spimex_server import LISTING_PATH, trade_dates
+from core.config import settings
+from core.models import IngestionLedger, IngestionWatermark, SpimexTradingResults, TradingDay
+from core.models.db_helper import create_ingestion_db_helper
+from parser import CRAWL_WATERMARK
+from parsing.stats import STAGES
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def first_trade_date(files: int) -> datetime.date:
+    """
+    Дата самого старого из files бюллетеней, последний из которых - последний рабочий день
+    перед datagen.SYNTHETIC_DATE_LIMIT.
+    """
+    day = datagen.SYNTHETIC_DATE_LIMIT
+    for _ in range(files):
+        day -= datetime.timedelta(days=1)
+        while day.weekday() >= 5:
+            day -= datetime.timedelta(days=1)
+    if day < datagen.SYNTHETIC_START_DATE:
+        raise ValueError('Бюллетени не помещаются в синтетический период benchmarks.datagen')
+    return day
+
+
+def months(first_date: datetime.date, last_date: datetime.date) -> list[datetime.date]:
+    month = first_date.replace(day=1)
+    result = []
+    while month <= last_date:
+        result.append(month)
+        month = (month + datetime.timedelta(days=32)).replace(day=1)
+    return result
+
+
+def partition_name(month: datetime.date) -> str:
+    # Имя секции задаёт функция ensure_spimex_trading_results_partition из миграции секционирования
+    return f'spimex_trading_results_p{month:%Y_%m}'
+
+
+def start_server(args: argparse.Namespace, first_date: datetime.date) -> subprocess.Popen:
+    command = [
+        sys.executable, '-m', 'benchmarks.spimex_server',
+        '--port', str(args.port),
+        '--files', str(args.files),
+        '--rows', str(args.rows),
+        '--per-page', str(args.per_page),
+        '--latency', str(args.latency),
+        '--error-rate', str(args.error_rate),
+        '--first-date', first_date.isoformat(),
+    ]
+    server = subprocess.Popen(command, cwd=APP_DIR, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + args.startup_timeout
+    while True:
+        try:
+            with urlopen(f'{origin(args.port)}/stats', timeout=1):
+                return server
+        except (URLError, OSError):
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise RuntimeError('Сервер benchmarks.spimex_server не запустился')
+            time.sleep(0.2)
+
+
+def origin(port: int) -> str:
+    return f'http://127.0.0.1:{port}'
+
+
+def server_stats(port: int) -> dict:
+    with urlopen(f'{origin(port)}/stats', timeout=5) as response:
+        return json.load(response)
+
+
+def ledger_entries(port: int, first_date: datetime.date, last_date: datetime.date):
+    return or_(
+        IngestionLedger.url.startswith(f'{origin(port)}/'),
+        IngestionLedger.trade_date.between(first_date, last_date),
+    )
+
+
+async def prepare(
+    session: AsyncSession, port: int, first_date: datetime.date, last_date: datetime.date
+) -> tuple[Optional[datetime.date], list[str]]:
+    """
+    Проверяет, что за даты бюллетеней сервера в БД нет торгов, и удаляет из журнала загрузок
+    записи о бюллетенях локального сервера.
+
+    :return: Отметка завершённого обхода до запуска и секции месяцев бюллетеней, которых ещё нет.
+    :raises RuntimeError: если за эти даты в БД уже есть торги.
+    """
+    occupied = await session.scalar(
+        select(exists().where(SpimexTradingResults.date.between(first_date, last_date)))
+    )
+    if occupied:
+        raise RuntimeError(
+            f'В БД уже есть торги за {first_date}..{last_date}; '
+            f'удалите синтетические данные: python -m benchmarks.datagen --cleanup'
+        )
+    await session.execute(delete(IngestionLedger).where(ledger_entries(port, first_date, last_date)))
+    await session.commit()
+    watermark = await session.scalar(
+        select(IngestionWatermark.trade_date).where(IngestionWatermark.name == CRAWL_WATERMARK)
+    )
+    missing_partitions = [
+        name for name in map(partition_name, months(first_date, last_date))
+        if await session.scalar(select(func.to_regclass(name))) is None
+    ]
+    return watermark, missing_partitions
+
+
+async def cleanup(
+    session: AsyncSession,
+    port: int,
+    first_date: datetime.date,
+    last_date: datetime.date,
+    watermark: Optional[datetime.date],
+    created_partitions: list[str],
+) -> None:
+    """
+    Удаляет всё, что записал парсер за даты бюллетеней сервера, и возвращает прежнюю отметку обхода.
+    Секции, созданные парсером за время запуска, удаляются целиком: кроме торгов бенчмарка в них ничего нет.
+    """
+    await session.execute(
+        delete(SpimexTradingResults).where(SpimexTradingResults.date.between(first_date, last_date))
+    )
+    for name in created_partitions:
+        await session.execute(text(f'DROP TABLE IF EXISTS {name}'))
+    await session.execute(delete(TradingDay).where(TradingDay.date.between(first_date, last_date)))
+    await session.execute(delete(IngestionLedger).where(ledger_entries(port, first_date, last_date)))
+    await session.execute(datagen.DELETE_ORPHAN_INSTRUMENTS_SQL)
+    await session.execute(datagen.DELETE_ORPHAN_DELIVERY_BASES_SQL)
+    if watermark is None:
+        await session.execute(delete(IngestionWatermark).where(IngestionWatermark.name == CRAWL_WATERMARK))
+    else:
+        await session.execute(
+            update(IngestionWatermark).where(IngestionWatermark.name == CRAWL_WATERMARK).values(trade_date=watermark)
+        )
+    await session.commit()
+
+
+async def run(port: int, first_date: datetime.date, last_date: datetime.date) -> dict:
+    ingestion_db_helper = create_ingestion_db_helper()
+    try:
+        async with ingestion_db_helper.session_factory() as session:
+            watermark, missing_partitions = await prepare(session, port, first_date, last_date)
+        publish_ingested_dates = parser.publish_ingested_dates
+        # Задача invalidate_trading_dates сбросила бы кэш API настроенного Redis
+        parser.publish_ingested_dates = lambda *args: None
+        try:
+            stats = await parser.main()
+        finally:
+            parser.publish_ingested_dates = publish_ingested_dates
+            async with ingestion_db_helper.session_factory() as session:
+                await cleanup(session, port, first_date, last_date, watermark, missing_partitions)
+    finally:
+        await ingestion_db_helper.dispose()
+    return stats.as_dict()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--port', type=int, default=8081, help='Порт локального сервера')
+    arg_parser.add_argument('--files', type=int, default=100, help='Бюллетеней на сервере')
+    arg_parser.add_argument('--rows', type=int, default=1000, help='Строк инструментов в бюллетене')
+    arg_parser.add_argument('--per-page', type=int, default=10, help='Бюллетеней на странице списка')
+    arg_parser.add_argument('--latency', type=float, default=0.0, help='Средняя задержка ответа сервера, секунды')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 503')
+    arg_parser.add_argument('--workers', type=int, default=settings.parser.workers, help='Воркеров загрузки')
+    arg_parser.add_argument('--requests-per-second', type=float, default=settings.parser.requests_per_second,
+                            help='Ограничение частоты скачивания файлов, 0 - без ограничения')
+    arg_parser.add_argument('--listing-requests-per-second', type=float,
+                            default=settings.parser.listing_requests_per_second,
+                            help='Ограничение частоты загрузки страниц списка, 0 - без ограничения')
+    arg_parser.add_argument('--save-mode', choices=('copy', 'insert'), default=settings.parser.save_mode)
+    arg_parser.add_argument('--startup-timeout', type=float, default=60.0, help='Ожидание запуска сервера, секунды')
+    arg_parser.add_argument('--output', help='Папка для JSON с результатами')
+    args = arg_parser.parse_args()
+
+    first_date = first_trade_date(args.files)
+    last_date = trade_dates(args.files, first_date)[0]
+    settings.parser.base_url = f'{origin(args.port)}{LISTING_PATH}'
+    settings.parser.start_date = first_date
+    settings.parser.workers = args.workers
+    settings.parser.requests_per_second = args.requests_per_second
+    settings.parser.listing_requests_per_second = args.listing_requests_per_second
+    settings.parser.save_mode = args.save_mode
+
+    server = start_server(args, first_date)
+    try:
+        stats = asyncio.run(run(args.port, first_date, last_date))
+        served = server_stats(args.port)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f'Файлов: {stats["files_saved"]}/{args.files}, ошибок: {stats["files_failed"]}, '
+          f'повторов запросов: {stats["retries"]} (сервер ответил 503: {served.get("errors", 0)})')
+    print(f'{stats["files_per_second"]} файлов/с, {stats["rows_per_second"]} строк/с '
+          f'за {stats["elapsed_seconds"]} с')
+    print(f'Пиковый RSS за запуск: процесс парсера {stats["peak_rss_kb"] / 1024:.1f} МиБ, '
+          f'процессы разбора {stats["parse_process_peak_rss_kb"] / 1024:.1f} МиБ')
+    print('Этапы, с: ' + ', '.join(f'{stage} {stats[f"{stage}_seconds"]}' for stage in STAGES))
+    results.save('parser_e2e', vars(args), {'parser': stats, 'server': served}, args.output)
+    sys.exit(0 if stats['files_saved'] == args.files else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Бенчмарк секционирования spimex_trading_results по месяцам.
+
+Заполняет секционированную таблицу синтетическими торгами за несколько лет, копирует их
+в обычную таблицу с теми же индексами в схеме benchmark_heap и сравнивает задержку запросов
+репозитория к обеим таблицам на узких и широких периодах. Запросы к копии выполняются
+тем же кодом репозитория через schema_translate_map.
+
+Запуск из папки spimex_trading_app (нужен локальный Postgres из APP_CONFIG__DB__URL
+с применёнными миграциями):
+
+    python -m benchmarks.partitioning --days 2500 --instruments 1000
+"""
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks import datagen
+from core.models import db_helper
+from core.models.db_helper import create_ingestion_db_helper
+from core.schemas.spimex_trading_results import AggregationDimension
+from filters.trading_filters import SpimexTradingResultsFilter
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+HEAP_SCHEMA = 'benchmark_heap'
+
+CREATE_HEAP_SQL = (
+    f'DROP SCHEMA IF EXISTS {HEAP_SCHEMA} CASCADE',
+    f'CREATE SCHEMA {HEAP_SCHEMA}',
+    f'CREATE TABLE {HEAP_SCHEMA}.spimex_trading_results '
+    f'(LIKE public.spimex_trading_results INCLUDING DEFAULTS INCLUDING INDEXES)',
+)
+
+
+def benchmark_cases(start_date: datetime.date, end_date: datetime.date):
+    """
+    Возвращает сравниваемые вызовы репозитория: (название, функция от репозитория).
+    """
+    middle = start_date + (end_date - start_date) / 2
+    week_end = middle + datetime.timedelta(days=6)
+    return [
+        ('неделя, oil_id', lambda repo: repo.get_dynamics(
+            middle, week_end, SpimexTradingResultsFilter(oil_id=datagen.SAMPLE_OIL_ID))),
+        ('неделя, без фильтров, 1000 строк', lambda repo: repo.get_dynamics(
+            middle, week_end, SpimexTradingResultsFilter(), limit=1000)),
+        ('месяц, агрегация по дням', lambda repo: repo.get_aggregated_dynamics(
+            middle, middle + datetime.timedelta(days=30), SpimexTradingResultsFilter(), [AggregationDimension.date])),
+        ('весь период, oil_id, 10000 строк', lambda repo: repo.get_dynamics(
+            start_date, end_date, SpimexTradingResultsFilter(oil_id=datagen.SAMPLE_OIL_ID), limit=10000)),
+        ('весь период, агрегация по месяцам', lambda repo: repo.get_aggregated_dynamics(
+            start_date, end_date, SpimexTradingResultsFilter(), [AggregationDimension.month])),
+        # Фильтр оставляет только синтетические инструменты, которых нет в реальных бюллетенях
+        ('последний день, oil_id', lambda repo: repo.get_trading_results(SpimexTradingResultsFilter(oil_id=datagen.SAMPLE_OIL_ID))),
+    ]
+
+
+async def measure(call, schema: str, repeat: int) -> float:
+    """
+    Выполняет вызов репозитория repeat раз в указанной схеме.
+
+    :return: Медиана задержки, мс.
+    """
+    async with db_helper.engine.connect() as connection:
+        if schema != 'public':
+            await connection.execution_options(schema_translate_map={None: schema})
+        async with AsyncSession(bind=connection) as session:
+            repository = SpimexTradingResultsRepository(session=session)
+            await call(repository)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await call(repository)
+                timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def run(days: int, instruments: int, repeat: int, keep: bool) -> None:
+    # Пул API открывает транзакции только на чтение, данные заполняются через профиль загрузки
+    ingestion_db_helper = create_ingestion_db_helper()
+    async with ingestion_db_helper.engine.begin() as connection:
+        await datagen.cleanup(connection)
+        started = time.perf_counter()
+        rows = await datagen.seed(connection, days, instruments)
+        print(f'Добавлено {rows} синтетических строк за {time.perf_counter() - started:.1f} с')
+        for statement in CREATE_HEAP_SQL:
+            await connection.execute(text(statement))
+        await connection.execute(
+            text(f'INSERT INTO {HEAP_SCHEMA}.spimex_trading_results SELECT * FROM spimex_trading_results '
+                 f'WHERE date < :date_limit'),
+            {'date_limit': datagen.SYNTHETIC_DATE_LIMIT},
+        )
+        await connection.execute(text(f'ANALYZE {HEAP_SCHEMA}.spimex_trading_results'))
+
+    start_date = datagen.SYNTHETIC_START_DATE
+    end_date = start_date + datetime.timedelta(days=days - 1)
+    try:
+        print(f'{"запрос":<40} {"обычная, мс":>12} {"секции, мс":>12}')
+        for name, call in benchmark_cases(start_date, end_date):
+            heap_ms = await measure(call, HEAP_SCHEMA, repeat)
+            partitioned_ms = await measure(call, 'public', repeat)
+            print(f'{name:<40} {heap_ms:12.1f} {partitioned_ms:12.1f}')
+    finally:
+        async with ingestion_db_helper.engine.begin() as connection:
+            await connection.execute(text(f'DROP SCHEMA IF EXISTS {HEAP_SCHEMA} CASCADE'))
+            if not keep:
+                await datagen.cleanup(connection)
+        await db_helper.dispose()
+        await ingestion_db_helper.dispose()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--days', type=int, default=2500, help='Количество синтетических торговых дней')
+    arg_parser.add_argument('--instruments', type=int, default=1000, help='Количество инструментов в дне')
+    arg_parser.add_argument('--repeat', type=int, default=20, help='Количество повторов каждого запроса')
+    arg_parser.add_argument('--keep', action='store_true', help='Не удалять синтетические данные после замеров')
+    args = arg_parser.parse_args()
+    asyncio.run(run(args.days, args.instruments, args.repeat, args.keep))
+
+
+if __name__ == '__main__':
+    main()
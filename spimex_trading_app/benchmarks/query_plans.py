@@ -0,0 +1,140 @@
+"""
+Проверка планов запросов репозитория на синтетических данных.
+
+Заполняет spimex_trading_results несколькими миллионами синтетических строк, вызывает методы
+SpimexTradingResultsRepository, перехватывает выполненный SQL и проверяет через EXPLAIN,
+что ни один запрос не читает таблицу последовательным сканированием.
+
+Запуск из папки spimex_trading_app (нужен локальный Postgres из APP_CONFIG__DB__URL
+с применёнными миграциями):
+
+    python -m benchmarks.query_plans --days 1000 --instruments 3000
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import sys
+import time
+
+from sqlalchemy import event
+
+from benchmarks import datagen
+from core.models import db_helper
+from core.models.db_helper import create_ingestion_db_helper
+from filters.trading_filters import SpimexTradingResultsFilter
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+TABLE_NAME = 'spimex_trading_results'
+
+
+def iter_plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from iter_plan_nodes(child)
+
+
+def scanned_relations(plan: dict) -> list[tuple[str, str, str]]:
+    """
+    Возвращает узлы плана, читающие таблицы: (тип узла, таблица, индекс).
+    """
+    return [
+        (node['Node Type'], node['Relation Name'], node.get('Index Name', ''))
+        for node in iter_plan_nodes(plan)
+        if 'Relation Name' in node
+    ]
+
+
+def repository_calls(start_date: datetime.date):
+    """
+    Возвращает проверяемые вызовы репозитория: (название, функция от репозитория).
+    """
+    narrow_end = start_date + datetime.timedelta(days=30)
+    return [
+        ('get_last_trading_dates', lambda repo: repo.get_last_trading_dates(10)),
+        ('get_dynamics oil_id', lambda repo: repo.get_dynamics(
+            start_date, narrow_end, SpimexTradingResultsFilter(oil_id=datagen.SAMPLE_OIL_ID))),
+        ('get_dynamics oil_id+basis+type', lambda repo: repo.get_dynamics(
+            start_date, narrow_end,
+            SpimexTradingResultsFilter(oil_id=datagen.SAMPLE_OIL_ID, delivery_basis_id=datagen.SAMPLE_DELIVERY_BASIS_ID,
+                                       delivery_type_id=datagen.SAMPLE_DELIVERY_TYPE_ID))),
+        ('get_dynamics delivery_basis_id', lambda repo: repo.get_dynamics(
+            start_date, narrow_end, SpimexTradingResultsFilter(delivery_basis_id='NVY'))),
+        ('get_dynamics без фильтров', lambda repo: repo.get_dynamics(
+            start_date, start_date + datetime.timedelta(days=3), SpimexTradingResultsFilter())),
+        ('get_trading_results без фильтров', lambda repo: repo.get_trading_results(SpimexTradingResultsFilter())),
+        ('get_trading_results oil_id', lambda repo: repo.get_trading_results(
+            SpimexTradingResultsFilter(oil_id=datagen.SAMPLE_OIL_ID))),
+    ]
+
+
+async def explain_calls(start_date: datetime.date) -> bool:
+    """
+    Выполняет вызовы репозитория и проверяет планы их запросов.
+
+    :return: True, если ни один запрос не читает таблицу последовательным сканированием.
+    """
+    captured: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith('EXPLAIN'):
+            captured.append((statement, parameters))
+
+    event.listen(db_helper.engine.sync_engine, 'before_cursor_execute', capture)
+    ok = True
+    try:
+        async with db_helper.session_factory() as session:
+            repository = SpimexTradingResultsRepository(session=session)
+            for name, call in repository_calls(start_date):
+                captured.clear()
+                started = time.perf_counter()
+                await call(repository)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                connection = await session.connection()
+                for statement, parameters in list(captured):
+                    result = await connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters)
+                    plan = result.scalar_one()
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    relations = scanned_relations(plan[0]['Plan'])
+                    seq_scans = [
+                        relation for node_type, relation, _ in relations
+                        if node_type == 'Seq Scan' and relation.startswith(TABLE_NAME)
+                    ]
+                    status = 'FAIL' if seq_scans else 'ok'
+                    ok = ok and not seq_scans
+                    nodes = ', '.join(f'{node_type} {relation} {index}'.strip() for node_type, relation, index in relations)
+                    print(f'[{status}] {name} ({elapsed_ms:.1f} мс): {nodes}')
+    finally:
+        event.remove(db_helper.engine.sync_engine, 'before_cursor_execute', capture)
+    return ok
+
+
+async def run(days: int, instruments: int, keep: bool) -> bool:
+    # Пул API открывает транзакции только на чтение, данные заполняются через профиль загрузки
+    ingestion_db_helper = create_ingestion_db_helper()
+    async with ingestion_db_helper.engine.begin() as connection:
+        await datagen.cleanup(connection)
+        started = time.perf_counter()
+        rows = await datagen.seed(connection, days, instruments)
+        print(f'Добавлено {rows} синтетических строк за {time.perf_counter() - started:.1f} с')
+    try:
+        return await explain_calls(datagen.SYNTHETIC_START_DATE + datetime.timedelta(days=days // 2))
+    finally:
+        if not keep:
+            async with ingestion_db_helper.engine.begin() as connection:
+                await datagen.cleanup(connection)
+        await db_helper.dispose()
+        await ingestion_db_helper.dispose()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--days', type=int, default=1000, help='Количество синтетических торговых дней')
+    arg_parser.add_argument('--instruments', type=int, default=3000, help='Количество инструментов в дне')
+    arg_parser.add_argument('--keep', action='store_true', help='Не удалять синтетические данные после проверки')
+    args = arg_parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.days, args.instruments, args.keep)) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Микробенчмарки методов SpimexTradingResultsRepository на синтетических данных.
+
+Каждый вызов выполняется --repeat раз после --warmup прогревочных вызовов в сессии профиля API;
+в результатах - p50/p95/p99 задержки вызова. Данные готовятся заранее через
+python -m benchmarks.datagen --scale 1M (или 10M) либо флагом --seed.
+
+Запуск из папки spimex_trading_app (нужен локальный Postgres из APP_CONFIG__DB__URL
+с применёнными миграциями):
+
+    python -m benchmarks.datagen --scale 1M
+    python -m benchmarks.repository --days 1000 --repeat 50
+"""
+import argparse
+import asyncio
+import datetime
+import time
+
+from benchmarks import datagen, results
+from core.models import db_helper
+from core.models.db_helper import create_ingestion_db_helper
+from filters.trading_filters import SpimexTradingResultsFilter
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+
+def repository_calls(days: int):
+    """
+    Возвращает замеряемые вызовы репозитория: (название, функция от репозитория).
+    :param days: Количество синтетических торговых дней: периоды берутся из их середины.
+    """
+    middle = datagen.SYNTHETIC_START_DATE + datetime.timedelta(days=days // 2)
+    week_end = middle + datetime.timedelta(days=6)
+    quarter_end = middle + datetime.timedelta(days=90)
+    sample = SpimexTradingResultsFilter(oil_id=datagen.SAMPLE_OIL_ID)
+    instrument = SpimexTradingResultsFilter(
+        oil_id=datagen.SAMPLE_OIL_ID,
+        delivery_basis_id=datagen.SAMPLE_DELIVERY_BASIS_ID,
+        delivery_type_id=datagen.SAMPLE_DELIVERY_TYPE_ID,
+    )
+    return [
+        ('get_last_trading_dates 5', lambda repo: repo.get_last_trading_dates(5)),
+        ('get_last_trading_dates 30', lambda repo: repo.get_last_trading_dates(30)),
+        ('get_dynamics день, страница 100', lambda repo: repo.get_dynamics(
+            middle, middle, SpimexTradingResultsFilter(), limit=100)),
+        ('get_dynamics неделя, страница 1000', lambda repo: repo.get_dynamics(
+            middle, week_end, SpimexTradingResultsFilter(), limit=1000)),
+        ('get_dynamics неделя, курсор', lambda repo: repo.get_dynamics(
+            middle, week_end, SpimexTradingResultsFilter(), limit=1000,
+            after=(middle + datetime.timedelta(days=3), 0))),
+        ('get_dynamics квартал, oil_id', lambda repo: repo.get_dynamics(middle, quarter_end, sample)),
+        ('get_dynamics квартал, инструмент', lambda repo: repo.get_dynamics(middle, quarter_end, instrument)),
+        ('get_trading_results без фильтров', lambda repo: repo.get_trading_results(SpimexTradingResultsFilter())),
+        ('get_trading_results oil_id', lambda repo: repo.get_trading_results(sample)),
+    ]
+
+
+async def measure(days: int, warmup: int, repeat: int) -> dict:
+    summaries = {}
+    print(f'{"вызов":<40} {"строк":>7} {"p50, мс":>9} {"p95, мс":>9} {"p99, мс":>9}')
+    async with db_helper.session_factory() as session:
+        repository = SpimexTradingResultsRepository(session=session)
+        for name, call in repository_calls(days):
+            for _ in range(warmup):
+                await call(repository)
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = await call(repository)
+                latencies.append((time.perf_counter() - started) * 1000)
+            summary = results.summarize(latencies)
+            summary['rows'] = len(rows)
+            summaries[name] = summary
+            print(f'{name:<40} {len(rows):7d} {summary["p50_ms"]:9.2f} {summary["p95_ms"]:9.2f} {summary["p99_ms"]:9.2f}')
+    return summaries
+
+
+async def run(days: int, instruments: int, seed: bool, warmup: int, repeat: int) -> dict:
+    ingestion_db_helper = create_ingestion_db_helper()
+    try:
+        if seed:
+            async with ingestion_db_helper.engine.begin() as connection:
+                await datagen.cleanup(connection)
+                rows = await datagen.seed(connection, days, instruments)
+            print(f'Добавлено {rows} синтетических строк')
+        return await measure(days, warmup, repeat)
+    finally:
+        await db_helper.dispose()
+        await ingestion_db_helper.dispose()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--days', type=int, default=1000, help='Количество синтетических торговых дней в БД')
+    arg_parser.add_argument('--instruments', type=int, default=1000, help='Инструментов в дне (для --seed)')
+    arg_parser.add_argument('--seed', action='store_true', help='Заново заполнить синтетические данные')
+    arg_parser.add_argument('--warmup', type=int, default=3, help='Прогревочных вызовов')
+    arg_parser.add_argument('--repeat', type=int, default=50, help='Замеряемых вызовов')
+    arg_parser.add_argument('--output', help='Папка для JSON с результатами')
+    args = arg_parser.parse_args()
+    summaries = asyncio.run(run(args.days, args.instruments, args.seed, args.warmup, args.repeat))
+    results.save('repository', vars(args), summaries, args.output)
+
+
+if __name__ == '__main__':
+    main()
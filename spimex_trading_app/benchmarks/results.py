@@ -0,0 +1,138 @@
+"""
+Сохранение и сравнение результатов бенчмарков.
+
+Результаты пишутся в benchmarks/results/<бенчмарк>-<коммит>-<время>.json вместе с коммитом,
+на котором сделан замер, поэтому прогоны до и после изменения можно сравнить:
+
+    python -m benchmarks.results benchmarks/results/http_load-1a2b3c4-....json benchmarks/results/http_load-5d6e7f8-....json
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+from typing import Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# Метрики, по которым сравниваются прогоны; у всех меньшее значение лучше, кроме rps
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'rps')
+
+
+def percentile(sorted_values: list[float], share: float) -> float:
+    """
+    Перцентиль методом ближайшего ранга.
+    :param sorted_values: Отсортированные значения.
+    :param share: Доля от 0 до 1.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(share * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms: list[float], elapsed: Optional[float] = None) -> dict:
+    """
+    Сводка задержек: количество, среднее, p50/p95/p99, максимум и RPS, если задана длительность прогона.
+    :param latencies_ms: Задержки запросов в миллисекундах.
+    :param elapsed: Длительность прогона в секундах.
+    """
+    values = sorted(latencies_ms)
+    summary = {
+        'requests': len(values),
+        'mean_ms': round(statistics.fmean(values), 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 0.5), 3),
+        'p95_ms': round(percentile(values, 0.95), 3),
+        'p99_ms': round(percentile(values, 0.99), 3),
+        'max_ms': round(values[-1], 3) if values else 0.0,
+    }
+    if elapsed is not None:
+        summary['elapsed_s'] = round(elapsed, 3)
+        summary['rps'] = round(len(values) / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+def git_commit() -> str:
+    """
+    Короткий хеш текущего коммита; с суффиксом -dirty, если есть незакоммиченные изменения.
+    """
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+
+def save(benchmark: str, parameters: dict, results: dict, directory: Optional[str] = None) -> str:
+    """
+    Сохраняет результаты прогона в JSON.
+    :param benchmark: Название бенчмарка, начало имени файла.
+    :param parameters: Параметры прогона: объём данных, параллельность и т.п.
+    :param results: Сводки по сценариям: {сценарий: summarize(...)}.
+    :param directory: Папка результатов, по умолчанию benchmarks/results.
+    :return: Путь к сохранённому файлу.
+    """
+    directory = directory or RESULTS_DIR
+    os.makedirs(directory, exist_ok=True)
+    commit = git_commit()
+    created_at = datetime.datetime.now(datetime.timezone.utc)
+    path = os.path.join(directory, f'{benchmark}-{commit}-{created_at:%Y%m%dT%H%M%SZ}.json')
+    document = {
+        'benchmark': benchmark,
+        'commit': commit,
+        'created_at': created_at.isoformat(),
+        'python': platform.python_version(),
+        'host': platform.node(),
+        'parameters': parameters,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, ensure_ascii=False, indent=2, default=str)
+    print(f'Результаты сохранены в {path}')
+    return path
+
+
+def load(path: str) -> dict:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """
+    Строки таблицы сравнения двух прогонов по сценариям, общим для обоих.
+    """
+    lines = [f'{"сценарий":<40} {"метрика":<8} {baseline["commit"]:>14} {current["commit"]:>14} {"изменение":>10}']
+    for scenario, summary in current['results'].items():
+        before = baseline['results'].get(scenario)
+        if before is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in summary or metric not in before:
+                continue
+            change = (summary[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            lines.append(
+                f'{scenario:<40} {metric:<8} {before[metric]:>14.2f} {summary[metric]:>14.2f} {change:>+9.1f}%'
+            )
+    return lines
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('baseline', help='JSON прогона до изменения')
+    arg_parser.add_argument('current', help='JSON прогона после изменения')
+    args = arg_parser.parse_args()
+    baseline, current = load(args.baseline), load(args.current)
+    if baseline['benchmark'] != current['benchmark']:
+        arg_parser.error(f'Разные бенчмарки: {baseline["benchmark"]} и {current["benchmark"]}')
+    print('\n'.join(compare(baseline, current)))
+
+
+if __name__ == '__main__':
+    main()
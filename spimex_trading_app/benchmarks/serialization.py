@@ -0,0 +1,106 @@
+"""
+Бенчмарк сериализации ответа /dynamics.
+
+Сравнивает стоимость одного запроса на странице из N строк:
+- до: ORM-объекты -> jsonable_encoder -> json для ответа, JsonCoder для Redis при промахе;
+  при попадании JsonCoder.decode -> jsonable_encoder -> json;
+- после: строки SpimexTradingResultRow -> orjson один раз при промахе; при попадании байты отдаются как есть.
+
+БД и Redis не нужны. Запуск из папки spimex_trading_app:
+
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+import argparse
+import datetime
+import json
+import time
+from typing import Any, Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi_cache.coder import JsonCoder
+
+from benchmarks.datagen import SYNTHETIC_START_DATE
+from core.models import SpimexTradingResults
+from core.schemas.spimex_trading_results import SpimexTradingResultRow
+
+
+def make_rows(rows: int) -> list[SpimexTradingResultRow]:
+    loaded_at = datetime.datetime(2026, 10, 18, 14, 11)
+    return [
+        SpimexTradingResultRow(
+            id=i,
+            exchange_product_id=f'A100{i % 1000:03d}060F',
+            exchange_product_name='Бензин (АИ-100-К5), Ангарск-группа станций (ст. отправления)',
+            oil_id='A100',
+            delivery_basis_id=f'{i % 1000:03d}',
+            delivery_basis_name='Ангарск-группа станций',
+            delivery_type_id='F',
+            volume=float(60 + i % 100),
+            total=float(4_000_000 + i),
+            count=float(1 + i % 5),
+            date=SYNTHETIC_START_DATE + datetime.timedelta(days=i // 1000),
+            created_on=loaded_at,
+            updated_on=loaded_at,
+        )
+        for i in range(rows)
+    ]
+
+
+def make_orm_objects(rows: list[SpimexTradingResultRow]) -> list[SpimexTradingResults]:
+    # Наименования теперь в справочниках; в ORM-объект они кладутся обычными атрибутами,
+    # чтобы ответ «до» содержал те же поля
+    columns = SpimexTradingResults.__table__.columns.keys()
+    objects = []
+    for row in rows:
+        orm_object = SpimexTradingResults(**{name: getattr(row, name) for name in columns})
+        orm_object.exchange_product_name = row.exchange_product_name
+        orm_object.delivery_basis_name = row.delivery_basis_name
+        objects.append(orm_object)
+    return objects
+
+
+def render(content: Any) -> bytes:
+    # Так FastAPI кодирует возвращённый из маршрута объект без response_model
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def measure(name: str, call: Callable[[], Any], repeat: int) -> float:
+    call()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+    print(f'{name:<45} {elapsed_ms:9.2f} мс')
+    return elapsed_ms
+
+
+def run(rows: int, repeat: int) -> None:
+    dataclass_rows = make_rows(rows)
+    orm_objects = make_orm_objects(dataclass_rows)
+    before_payload = {'items': orm_objects, 'next_cursor': None}
+    after_payload = {'items': dataclass_rows, 'next_cursor': None}
+    cached_before = JsonCoder.encode(before_payload)
+    cached_after = orjson.dumps(after_payload)
+
+    print(f'Страница /dynamics из {rows} строк, среднее по {repeat} повторам:')
+    before_miss = measure('до, промах (ответ + запись в кэш)', lambda: (
+        render(before_payload), JsonCoder.encode(before_payload)), repeat)
+    before_hit = measure('до, попадание (декодирование + ответ)', lambda: render(
+        JsonCoder.decode(cached_before)), repeat)
+    after_miss = measure('после, промах (orjson один раз)', lambda: orjson.dumps(after_payload), repeat)
+    measure('после, попадание (байты как есть)', lambda: bytes(cached_after), repeat)
+    print(f'Промах быстрее в {before_miss / after_miss:.1f} раз, попадание экономит {before_hit:.0f} мс CPU на запрос')
+    print(f'Размер в кэше: до {len(cached_before)} байт, после {len(cached_after)} байт')
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, default=10000, help='Количество строк на странице')
+    arg_parser.add_argument('--repeat', type=int, default=20, help='Количество повторов каждого замера')
+    args = arg_parser.parse_args()
+    run(args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Локальная замена сайта СПбМТСБ для офлайн-запусков парсера.
+
+Отдаёт постраничный список бюллетеней в разметке сайта (ссылки accordeon-inner__item-title link xls,
+пагинация Bitrix с номерами страниц и переходом .bx-pag-next) и сгенерированные XLS-бюллетени
+(benchmarks.bulletin_parse.make_bulletin_xls, нужен xlwt). Задержка ответов и доля ответов 503
+настраиваются, чтобы проверить поведение парсера на медленном и нестабильном сайте.
+Счётчики обслуженных запросов - GET /stats.
+
+Бюллетени датируются рабочими днями начиная с FIRST_TRADE_DATE (или --first-date), новые - на первой странице.
+Все файлы содержат одну и ту же таблицу: дату торгов парсер берёт из имени файла.
+
+Запуск из папки spimex_trading_app:
+
+    python -m benchmarks.spimex_server --port 8081 --files 200 --rows 1000 --latency 0.05 --error-rate 0.05
+    APP_CONFIG__PARSER__BASE_URL=http://127.0.0.1:8081/markets/oil_products/trades/results/ python parser.py
+"""
+import argparse
+import asyncio
+import datetime
+import random
+from collections import Counter
+
+from aiohttp import web
+
+from benchmarks.bulletin_parse import make_bulletin_xls
+
+LISTING_PATH = '/markets/oil_products/trades/results/'
+FILE_PATH = '/upload/reports/oil_xls/'
+FIRST_TRADE_DATE = datetime.date(2023, 1, 9)
+# Столько бюллетеней на странице показывает сайт
+PER_PAGE = 10
+
+
+def trade_dates(files: int, first_date: datetime.date = FIRST_TRADE_DATE) -> list[datetime.date]:
+    """
+    Рабочие дни начиная с first_date, от новых к старым, как в списке на сайте.
+    """
+    dates = []
+    day = first_date
+    while len(dates) < files:
+        if day.weekday() < 5:
+            dates.append(day)
+        day += datetime.timedelta(days=1)
+    return dates[::-1]
+
+
+def page_link(page: int, text: str) -> str:
+    return f'<a href="{LISTING_PATH}?page=page-{page}"><span>{text}</span></a>'
+
+
+def listing_html(dates: list[datetime.date], page: int, pages: int) -> str:
+    """
+    Страница списка с пагинацией Bitrix, как на сайте: первая и последняя страницы,
+    две страницы по обе стороны от текущей и ссылки «Назад»/«Вперед».
+    """
+    items = ''.join(
+        f'<div class="accordeon-inner__wrap-item">'
+        f'<a class="accordeon-inner__item-title link xls" '
+        f'href="{FILE_PATH}oil_xls_{trade_date:%Y%m%d}162000.xls?r={page}">'
+        f'Бюллетень по итогам торгов за {trade_date:%d.%m.%Y}</a></div>'
+        for trade_date in dates
+    )
+    numbers = sorted({1, pages, *range(max(1, page - 2), min(pages, page + 2) + 1)})
+    pagination = ''.join(
+        f'<li class="bx-active"><span>{number}</span></li>' if number == page
+        else f'<li>{page_link(number, str(number))}</li>'
+        for number in numbers
+    )
+    if page > 1:
+        pagination = f'<li class="bx-pag-prev">{page_link(page - 1, "Назад")}</li>' + pagination
+    if page < pages:
+        pagination += f'<li class="bx-pag-next">{page_link(page + 1, "Вперед")}</li>'
+    else:
+        pagination += '<li class="bx-pag-next"><span>Вперед</span></li>'
+    return (
+        f'<html><body><div class="accordeon-inner">{items}</div>'
+        f'<div class="bx-pagination"><div class="bx-pagination-container"><ul>{pagination}</ul></div></div>'
+        f'</body></html>'
+    )
+
+
+def create_app(
+    files: int,
+    rows: int,
+    per_page: int = PER_PAGE,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+    first_date: datetime.date = FIRST_TRADE_DATE,
+) -> web.Application:
+    """
+    Создаёт приложение aiohttp с заменой сайта.
+    :param files: Количество бюллетеней в списке.
+    :param rows: Строк инструментов в каждом бюллетене.
+    :param per_page: Бюллетеней на странице списка.
+    :param latency: Средняя задержка ответа, секунды; фактическая - от 0.5 до 1.5 средней.
+    :param error_rate: Доля запросов, на которые отвечается 503.
+    :param seed: Зерно генератора задержек и ошибок.
+    :param first_date: Дата самого старого бюллетеня.
+    """
+    dates = trade_dates(files, first_date)
+    pages = max(1, -(-files // per_page))
+    bulletin = make_bulletin_xls(rows)
+    rng = random.Random(seed)
+    counters: Counter = Counter()
+
+    @web.middleware
+    async def unreliable(request: web.Request, handler):
+        if request.path == '/stats':
+            return await handler(request)
+        counters['requests'] += 1
+        if latency:
+            await asyncio.sleep(latency * rng.uniform(0.5, 1.5))
+        if rng.random() < error_rate:
+            counters['errors'] += 1
+            raise web.HTTPServiceUnavailable()
+        return await handler(request)
+
+    async def listing(request: web.Request) -> web.Response:
+        try:
+            page = int(request.query.get('page', 'page-1').removeprefix('page-'))
+        except ValueError:
+            raise web.HTTPBadRequest()
+        counters['listing_pages'] += 1
+        page_dates = dates[(page - 1) * per_page:page * per_page]
+        return web.Response(text=listing_html(page_dates, page, pages), content_type='text/html')
+
+    async def bulletin_file(request: web.Request) -> web.Response:
+        counters['files'] += 1
+        counters['bytes'] += len(bulletin)
+        return web.Response(body=bulletin, content_type='application/vnd.ms-excel')
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(dict(counters))
+
+    app = web.Application(middlewares=[unreliable])
+    app.router.add_get(LISTING_PATH, listing)
+    app.router.add_get(FILE_PATH + '{name}', bulletin_file)
+    app.router.add_get('/stats', stats)
+    return app
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8081)
+    arg_parser.add_argument('--files', type=int, default=200, help='Бюллетеней в списке')
+    arg_parser.add_argument('--rows', type=int, default=1000, help='Строк инструментов в бюллетене')
+    arg_parser.add_argument('--per-page', type=int, default=PER_PAGE, help='Бюллетеней на странице списка')
+    arg_parser.add_argument('--latency', type=float, default=0.0, help='Средняя задержка ответа, секунды')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 503')
+    arg_parser.add_argument('--seed', type=int, default=0, help='Зерно задержек и ошибок')
+    arg_parser.add_argument('--first-date', type=datetime.date.fromisoformat, default=FIRST_TRADE_DATE,
+                            help='Дата самого старого бюллетеня, YYYY-MM-DD')
+    args = arg_parser.parse_args()
+    app = create_app(
+        args.files, args.rows, args.per_page, args.latency, args.error_rate, args.seed, args.first_date
+    )
+    web.run_app(app, host=args.host, port=args.port, print=lambda message: print(message, flush=True))
+
+
+if __name__ == '__main__':
+    main()
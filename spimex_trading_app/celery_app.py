@@ -1,7 +1,10 @@
+from datetime import date, datetime
+from typing import Optional
+
 from celery import Celery
-from celery.schedules import crontab
-from fastapi_cache import FastAPICache
+from redis import Redis
 
+from core.cache.invalidation import clear_namespace, invalidate_trade_dates, warm_up
 from core.config import settings
 
 celery_app = Celery(
@@ -13,10 +16,28 @@ celery_app = Celery(
 
 @celery_app.task
 def clear_cache():
-    FastAPICache.clear()
-    print("Cache cleared!")
+    deleted = clear_namespace(
+        Redis.from_url(settings.cache.url), settings.cache.prefix, settings.cache.invalidation_channel
+    )
+    print(f"Cache cleared! Deleted keys: {deleted}")
+
 
+@celery_app.task
+def invalidate_trading_dates(trade_dates: list[str], ingested_at: Optional[str] = None):
+    """
+    Обрабатывает событие парсера о загрузке торгов: сбрасывает только затронутые ключи кэша
+    и прогревает самые востребованные маршруты до прихода пользователей.
 
-@celery_app.on_after_configure.connect
-def setup_periodic_tasks(sender, **kwargs):
-    sender.add_periodic_task(crontab(hour='14', minute='11'), clear_cache.s(), name='Clear cache every day at 14:11')
+    :param trade_dates: Загруженные даты торгов в формате YYYY-MM-DD.
+    :param ingested_at: Время загрузки в формате ISO; становится версией загруженных месяцев.
+    """
+    deleted = invalidate_trade_dates(
+        Redis.from_url(settings.cache.url),
+        settings.cache.prefix,
+        [date.fromisoformat(trade_date) for trade_date in trade_dates],
+        settings.cache.invalidation_channel,
+        datetime.fromisoformat(ingested_at) if ingested_at else None,
+    )
+    print(f"Invalidated {deleted} cache keys for trade dates {', '.join(trade_dates)}")
+    routes_prefix = f"{settings.api.prefix}{settings.api.smt.trading_results}"
+    warm_up(settings.cache.warmup_base_url, [f"{routes_prefix}{path}" for path in settings.cache.warmup_paths])
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+
+class LocalCache:
+    """
+    Ограниченный по числу записей и суммарному размеру кэш в памяти процесса
+    с вытеснением давно не использованных записей (LRU) и временем жизни записей.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[tuple[int, bytes]]:
+        """
+        :return: Пара (оставшееся время жизни в секундах, значение) или None, если записи нет или она истекла.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        ttl = expires_at - time.monotonic()
+        if ttl <= 0:
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return int(ttl), value
+
+    def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        self.delete(key)
+        ttl = min(expire, self.ttl) if expire else self.ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size += len(value)
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self.delete(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TwoTierBackend(RedisBackend):
+    """
+    Бэкенд FastAPICache из двух уровней: L1 - LocalCache в памяти воркера, L2 - Redis.
+    Сброс ключей публикуется в канал Redis, и каждый воркер удаляет свои копии из L1.
+    """
+
+    def __init__(self, redis: aioredis.Redis, local_cache: LocalCache, channel: str) -> None:
+        super().__init__(redis)
+        self.local_cache = local_cache
+        self.channel = channel
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.l2_hits = 0
+        self.l2_misses = 0
+
+    async def get_with_ttl(self, key: str) -> tuple[int, Optional[bytes]]:
+        local = self.local_cache.get(key)
+        if local is not None:
+            self.l1_hits += 1
+            return local
+        self.l1_misses += 1
+        ttl, value = await super().get_with_ttl(key)
+        if value is None:
+            self.l2_misses += 1
+        else:
+            self.l2_hits += 1
+            self.local_cache.set(key, value, ttl if ttl > 0 else None)
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        await super().set(key, value, expire)
+        self.local_cache.set(key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        deleted = await super().clear(namespace, key)
+        if namespace:
+            self.local_cache.delete_prefix(f"{namespace}:")
+            await self.redis.publish(self.channel, json.dumps({"prefixes": [f"{namespace}:"]}))
+        elif key:
+            self.local_cache.delete(key)
+            await self.redis.publish(self.channel, json.dumps({"keys": [key]}))
+        return deleted
+
+    def apply_invalidation(self, message: dict) -> None:
+        """
+        Удаляет из L1 ключи и префиксы из сообщения о сбросе кэша.
+        """
+        for key in message.get("keys", ()):
+            self.local_cache.delete(key)
+        for prefix in message.get("prefixes", ()):
+            self.local_cache.delete_prefix(prefix)
+
+    async def listen_for_invalidations(self) -> None:
+        """
+        Слушает канал сброса кэша и удаляет устаревшие копии из L1. Выполняется фоновой задачей
+        воркера; после потери соединения L1 очищается целиком, так как сообщения могли быть пропущены.
+        """
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.apply_invalidation(json.loads(message["data"]))
+            except (RedisError, OSError) as e:
+                print(f"Потеряна подписка на сброс кэша: {e}")
+                self.local_cache.clear()
+                await asyncio.sleep(1)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "l1_hits": self.l1_hits,
+            "l1_misses": self.l1_misses,
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            "l1_entries": len(self.local_cache),
+            "l1_bytes": self.local_cache.size,
+        }
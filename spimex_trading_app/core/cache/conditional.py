@@ -0,0 +1,106 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi_cache import FastAPICache
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from core.cache.keys import DATA_VERSION_KEY
+from core.config import settings
+from core.models import db_helper
+from repository.trading_day_repository import TradingDayRepository
+
+# Версия данных, пока в БД нет ни одного торгового дня
+EMPTY_DATA_VERSION = b"empty"
+
+
+async def get_data_version() -> tuple[bytes, Optional[datetime]]:
+    """
+    Получает версию данных из бэкенда FastAPICache (при L1 - из памяти воркера).
+    Если версии там нет (задача сброса кэша удалила её после загрузки), она один раз
+    читается из trading_days и сохраняется в кэш.
+
+    :return: Пара (версия данных, время последней загрузки в UTC или None, если торгов ещё нет).
+    """
+    backend = FastAPICache.get_backend()
+    key = f"{FastAPICache.get_prefix()}:{DATA_VERSION_KEY}"
+    version = await backend.get(key)
+    if version is None:
+        async with db_helper.session_factory() as session:
+            data_version = await TradingDayRepository(session=session).get_data_version()
+        version = EMPTY_DATA_VERSION
+        if data_version is not None:
+            trade_date, ingested_at = data_version
+            version = f"{trade_date.isoformat()}|{ingested_at.isoformat()}".encode()
+        await backend.set(key, version, settings.cache.expire)
+    if version == EMPTY_DATA_VERSION:
+        return version, None
+    return version, parse_ingested_at(version.decode().split("|", 1)[1])
+
+
+async def is_current(session: AsyncSession, ingested_at: Optional[datetime]) -> bool:
+    """
+    Проверяет, что сессия видит загрузку, по которой построена версия данных.
+    Версия читается из основной БД; реплика видит загрузку только после её воспроизведения.
+
+    :param session: Сессия, в которой будет построено тело ответа.
+    :param ingested_at: Время последней загрузки из get_data_version.
+    """
+    if ingested_at is None or db_helper.is_primary(session):
+        return True
+    data_version = await TradingDayRepository(session=session).get_data_version()
+    return data_version is not None and _as_utc(data_version[1]) >= ingested_at
+
+
+def parse_ingested_at(value: str) -> datetime:
+    """
+    Разбирает время загрузки в формате ISO из версии данных или версии месяца.
+    """
+    return _as_utc(datetime.fromisoformat(value))
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # ingested_at хранится как TIMESTAMP без часового пояса, значения now() в БД - в UTC
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
+def validator_headers(version: bytes, ingested_at: Optional[datetime], cache_key: str) -> dict[str, str]:
+    """
+    Строит заголовки ETag, Last-Modified и Cache-Control ответа.
+
+    :param version: Версия данных.
+    :param ingested_at: Время последней загрузки.
+    :param cache_key: Ключ кэша ответа, в который уже входят маршрут и параметры фильтра.
+    """
+    etag = hashlib.md5(version + b":" + cache_key.encode()).hexdigest()  # noqa: S324
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": f"max-age={settings.cache.client_max_age}, must-revalidate",
+    }
+    if ingested_at is not None:
+        headers["Last-Modified"] = format_datetime(ingested_at.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, headers: dict[str, str]) -> bool:
+    """
+    Проверяет, совпадает ли копия клиента с текущей версией ответа (RFC 9110, раздел 13.1).
+    If-Modified-Since учитывается, только если клиент не прислал If-None-Match.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"] in tags
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
@@ -0,0 +1,115 @@
+import json
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from redis import Redis
+
+from core.cache.keys import (
+    DATA_VERSION_KEY,
+    DYNAMICS_TILE_VERSION_NAMESPACE,
+    LATEST_NAMESPACES,
+    MONTH_NAMESPACES,
+    RANGE_NAMESPACES,
+    VERSIONED_NAMESPACES,
+    parse_range_key,
+    tile_version_key,
+)
+
+
+def _delete_and_publish(
+    redis: Redis, keys: list[bytes], channel: Optional[str], replace: Optional[dict[str, str]] = None
+) -> int:
+    replace = replace or {}
+    if not keys and not replace:
+        return 0
+    # Новые значения записываются в одной транзакции с удалением
+    with redis.pipeline() as pipeline:
+        if replace:
+            pipeline.mset(replace)
+        if keys:
+            pipeline.delete(*keys)
+        results = pipeline.execute()
+    deleted = results[-1] if keys else 0
+    if channel:
+        # Воркеры API удаляют эти ключи из своего кэша в памяти (L1)
+        redis.publish(channel, json.dumps({"keys": [key.decode() for key in keys] + list(replace)}))
+    return deleted
+
+
+def invalidate_trade_dates(
+    redis: Redis,
+    prefix: str,
+    trade_dates: Iterable[date],
+    channel: Optional[str] = None,
+    ingested_at: Optional[datetime] = None,
+) -> int:
+    """
+    Удаляет из кэша ответы, на которые повлияла загрузка торгов за указанные даты:
+    все ответы о последних торгах, ответы за периоды, содержащие хотя бы одну из дат,
+    и помесячные фрагменты месяцев этих дат. Фрагменты закрытых месяцев при обычной
+    ежедневной загрузке не затрагиваются.
+    Вместе с ними удаляется версия данных, поэтому у новых ответов будет новый ETag,
+    а страницы /dynamics, в ключ которых входит прежняя версия, удаляются целиком.
+    Версией загруженных месяцев становится время загрузки: фрагмент, построенный по прежним
+    данным одновременно со сбросом, остаётся под ключом прежней версии месяца и уже не читается.
+
+    :param redis: Синхронный клиент Redis.
+    :param prefix: Префикс ключей FastAPICache.
+    :param trade_dates: Загруженные даты торгов.
+    :param channel: Канал, в который публикуются удалённые ключи для сброса кэша воркеров в памяти.
+    :param ingested_at: Время загрузки из trading_days. Без него версией месяцев становится текущее время,
+                        и фрагменты этих месяцев строятся только по основной БД.
+    :return: Количество удалённых ключей.
+    """
+    trade_dates = sorted(trade_dates)
+    # Удаляется одним DEL с ответами: новый ETag не может достаться старому телу ответа
+    stale_keys = [f"{prefix}:{DATA_VERSION_KEY}".encode()]
+    for namespace in (*LATEST_NAMESPACES, *VERSIONED_NAMESPACES):
+        stale_keys.extend(redis.scan_iter(match=f"{prefix}:{namespace}:*"))
+    for namespace in RANGE_NAMESPACES:
+        namespace = f"{prefix}:{namespace}"
+        for key in redis.scan_iter(match=f"{namespace}:*"):
+            period = parse_range_key(key.decode(), namespace)
+            if period is None or any(period[0] <= trade_date <= period[1] for trade_date in trade_dates):
+                stale_keys.append(key)
+    months = sorted({trade_date.replace(day=1) for trade_date in trade_dates})
+    for namespace in MONTH_NAMESPACES:
+        for month in months:
+            stale_keys.extend(redis.scan_iter(match=f"{prefix}:{namespace}:{month:%Y-%m}:*"))
+    month_version = (ingested_at or datetime.now(timezone.utc)).isoformat()
+    versions_namespace = f"{prefix}:{DYNAMICS_TILE_VERSION_NAMESPACE}"
+    month_versions = {tile_version_key(versions_namespace, month): month_version for month in months}
+    return _delete_and_publish(redis, stale_keys, channel, month_versions)
+
+
+def clear_namespace(redis: Redis, prefix: str, channel: Optional[str] = None) -> int:
+    """
+    Удаляет из кэша все ключи с указанным префиксом.
+
+    :param redis: Синхронный клиент Redis.
+    :param prefix: Префикс ключей FastAPICache.
+    :param channel: Канал, в который публикуется сброс для кэша воркеров в памяти.
+    :return: Количество удалённых ключей.
+    """
+    deleted = _delete_and_publish(redis, list(redis.scan_iter(match=f"{prefix}:*")), None)
+    if channel:
+        redis.publish(channel, json.dumps({"prefixes": [f"{prefix}:"]}))
+    return deleted
+
+
+def warm_up(base_url: str, paths: Iterable[str], timeout: float = 30.0) -> None:
+    """
+    Заново наполняет кэш, запрашивая самые востребованные маршруты.
+
+    :param base_url: Адрес API.
+    :param paths: Пути запросов относительно base_url.
+    :param timeout: Таймаут одного запроса, секунды.
+    """
+    for path in paths:
+        try:
+            with urlopen(f"{base_url}{path}", timeout=timeout) as response:
+                print(f"Прогрев кэша {path}: {response.status}")
+        except (URLError, OSError) as e:
+            print(f"Не удалось прогреть кэш {path}: {e}")
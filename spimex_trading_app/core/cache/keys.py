@@ -0,0 +1,113 @@
+import hashlib
+import json
+from datetime import date
+from enum import Enum
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Пространства имён кэша маршрутов торгов
+LAST_TRADING_DATES_NAMESPACE = "last_trading_dates"
+LAST_TRADINGS_NAMESPACE = "last_tradings"
+DYNAMICS_NAMESPACE = "dynamics"
+AGGREGATED_DYNAMICS_NAMESPACE = "aggregated_dynamics"
+# Помесячные фрагменты /dynamics: {namespace}:{YYYY-MM}:{hash фильтра и версии месяца}
+DYNAMICS_TILE_NAMESPACE = "dynamics_tile"
+# Версии месяцев фрагментов: {namespace}:{YYYY-MM} -> время последней загрузки торгов за этот месяц
+DYNAMICS_TILE_VERSION_NAMESPACE = "dynamics_tile_version"
+
+# Версия данных (последняя дата торгов и время загрузки), из которой строятся ETag и Last-Modified
+DATA_VERSION_KEY = "data_version"
+
+# Ответы, зависящие от последнего торгового дня: сбрасываются после любой загрузки
+LATEST_NAMESPACES = (LAST_TRADING_DATES_NAMESPACE, LAST_TRADINGS_NAMESPACE)
+# Ответы за период: сбрасываются, только если период содержит загруженную дату
+RANGE_NAMESPACES = (AGGREGATED_DYNAMICS_NAMESPACE,)
+# Страницы /dynamics: версия данных входит в ключ, поэтому после любой загрузки
+# они недостижимы и удаляются целиком, чтобы не занимать память до истечения срока
+VERSIONED_NAMESPACES = (DYNAMICS_NAMESPACE,)
+# Помесячные фрагменты: сбрасываются, только если месяц содержит загруженную дату
+MONTH_NAMESPACES = (DYNAMICS_TILE_NAMESPACE,)
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def params_digest(scope: str, params: dict[str, Any]) -> str:
+    """
+    Хеш параметров запроса, не зависящий от порядка параметров.
+
+    :param scope: Имя маршрута или другой области, к которой относятся параметры.
+    :param params: Параметры: фильтры, модели pydantic, перечисления.
+    """
+    canonical = json.dumps({name: _canonical(value) for name, value in params.items()}, sort_keys=True, default=str)
+    return hashlib.md5(f"{scope}:{canonical}".encode()).hexdigest()  # noqa: S324
+
+
+def trading_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> str:
+    """
+    Строит ключ кэша из параметров маршрута без учёта сессии БД, которая своя у каждого запроса.
+    Для маршрутов за период даты выносятся в ключ открытым текстом:
+    {namespace}:{start_date}:{end_date}:{hash}, чтобы кэш можно было сбросить по загруженной дате.
+    """
+    params = {name: value for name, value in kwargs.items() if not isinstance(value, AsyncSession)}
+    start_date = params.pop("start_date", None)
+    end_date = params.pop("end_date", None)
+    digest = params_digest(f"{func.__module__}:{func.__name__}", params)
+    if start_date is not None and end_date is not None:
+        return f"{namespace}:{start_date.isoformat()}:{end_date.isoformat()}:{digest}"
+    return f"{namespace}:{digest}"
+
+
+def parse_range_key(key: str, namespace: str) -> Optional[tuple[date, date]]:
+    """
+    Извлекает период из ключа, построенного trading_key_builder для маршрута за период.
+
+    :param key: Ключ кэша.
+    :param namespace: Пространство имён вместе с префиксом кэша.
+    :return: Пара (start_date, end_date) или None, если ключ другого формата.
+    """
+    try:
+        start_date, end_date, _ = key[len(namespace) + 1:].split(":")
+        return date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError:
+        return None
+
+
+def tile_key(namespace: str, month: date, digest: str) -> str:
+    """
+    Строит ключ помесячного фрагмента.
+
+    :param namespace: Пространство имён вместе с префиксом кэша.
+    :param month: Первый день месяца.
+    :param digest: Хеш фильтра и версии месяца.
+    """
+    return f"{namespace}:{month:%Y-%m}:{digest}"
+
+
+def tile_version_key(namespace: str, month: date) -> str:
+    """
+    Строит ключ версии месяца помесячных фрагментов.
+
+    :param namespace: Пространство имён версий вместе с префиксом кэша.
+    :param month: Первый день месяца.
+    """
+    return f"{namespace}:{month:%Y-%m}"
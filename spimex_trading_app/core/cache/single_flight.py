@@ -0,0 +1,223 @@
+import asyncio
+import time
+import uuid
+from functools import wraps
+from inspect import Parameter, signature
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+from fastapi_cache import FastAPICache
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.cache.conditional import get_data_version, is_current, is_not_modified, validator_headers
+from core.config import settings
+from core.metrics import record_cache
+from core.models import db_helper
+
+# Снимает блокировку, только если она всё ещё принадлежит этому вычислению
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные вычисления с одинаковым ключом внутри процесса:
+    первый вызов выполняет функцию, остальные ждут его результата.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(compute())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        # shield: отмена одного из ожидающих запросов не отменяет общее вычисление
+        return await asyncio.shield(call)
+
+
+single_flight = SingleFlight()
+
+
+def _pack(value: bytes, expire: int) -> bytes:
+    return f"{time.time() + expire:.3f}\n".encode() + value
+
+
+def _unpack(entry: bytes) -> tuple[float, bytes]:
+    fresh_until, value = entry.split(b"\n", 1)
+    return float(fresh_until), value
+
+
+def json_response(content: bytes, headers: Optional[dict[str, str]] = None) -> Response:
+    # Тело уже закодировано, поэтому FastAPI отдаёт его как есть, без jsonable_encoder и повторной сериализации
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def _with_session(kwargs: dict[str, Any], session: AsyncSession) -> dict[str, Any]:
+    return {name: session if isinstance(value, AsyncSession) else value for name, value in kwargs.items()}
+
+
+async def _wait_for_other_worker(backend, redis, key: str, lock_key: str) -> Optional[bytes]:
+    """
+    Ждёт, пока другой воркер, держащий блокировку, положит значение в кэш.
+
+    :return: Значение из кэша или None, если блокировка снята без значения или истекло время ожидания.
+    """
+    deadline = time.monotonic() + settings.cache.lock_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.cache.lock_poll_interval)
+        entry = await backend.get(key)
+        if entry is not None:
+            return entry
+        if not await redis.exists(lock_key):
+            return None
+    return None
+
+
+async def locked_compute(
+    backend,
+    key: str,
+    compute: Callable[[], Awaitable[bytes]],
+    unpack: Callable[[bytes], bytes] = lambda entry: entry,
+) -> bytes:
+    """
+    Выполняет вычисление значения ключа кэша не более одного раза на все воркеры uvicorn:
+    вычисляет тот, кто взял короткую блокировку в Redis, остальные ждут его значения в кэше.
+    Если бэкенд работает без Redis, вычисление выполняется сразу.
+
+    :param backend: Бэкенд FastAPICache.
+    :param key: Ключ кэша, под которым вычисление сохраняет значение.
+    :param compute: Вычисление, которое само сохраняет значение в кэш и возвращает его.
+    :param unpack: Извлекает значение из записи кэша, сохранённой другим воркером.
+    """
+    redis = getattr(backend, "redis", None)
+    if redis is None:
+        return await compute()
+
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex
+    lock_ms = int(settings.cache.lock_timeout * 1000)
+    if not await redis.set(lock_key, token, nx=True, px=lock_ms):
+        entry = await _wait_for_other_worker(backend, redis, key, lock_key)
+        if entry is not None:
+            return unpack(entry)
+    try:
+        return await compute()
+    finally:
+        await redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+
+def cached(
+    namespace: str,
+    expire: Optional[int] = None,
+    stale_ttl: Optional[int] = None,
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Кэширует ответ маршрута в бэкенде FastAPICache так же, как fastapi_cache.decorator.cache,
+    но одновременные промахи по одному ключу выполняют запрос к БД один раз:
+    внутри процесса - через общий Future, между воркерами uvicorn - через короткую блокировку в Redis.
+    Результат маршрута кодируется orjson один раз, в кэше хранятся готовые байты JSON,
+    и попадания отдают их клиенту без декодирования.
+    Ответ получает ETag и Last-Modified по версии данных; условный запрос с актуальной копией
+    получает 304 без обращения к кэшу ответов и к БД.
+    Если сессия маршрута открыта на реплике, которая ещё не воспроизвела последнюю загрузку,
+    тело строится по основной БД, чтобы в кэш и под новый ETag не попали старые данные.
+
+    :param namespace: Пространство имён ключей кэша.
+    :param expire: Время жизни свежего значения, секунды; по умолчанию FastAPICache.get_expire().
+    :param stale_ttl: Сколько секунд после устаревания значение ещё отдаётся клиентам, пока оно
+                      обновляется в фоне (stale-while-revalidate); по умолчанию settings.cache.stale_ttl.
+    """
+
+    def wrapper(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        func_signature = signature(func)
+        request_param = Parameter("__cache_request", Parameter.KEYWORD_ONLY, annotation=Request)
+        response_param = Parameter("__cache_response", Parameter.KEYWORD_ONLY, annotation=Response)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            request: Request = kwargs.pop(request_param.name)
+            response: Response = kwargs.pop(response_param.name)
+
+            if (
+                not FastAPICache.get_enable()
+                or request.method != "GET"
+                or request.headers.get("Cache-Control") == "no-store"
+            ):
+                record_cache(namespace, "bypass")
+                return json_response(orjson.dumps(await func(*args, **kwargs)))
+
+            backend = FastAPICache.get_backend()
+            fresh_ttl = expire or FastAPICache.get_expire()
+            stale_seconds = settings.cache.stale_ttl if stale_ttl is None else stale_ttl
+            key = FastAPICache.get_key_builder()(
+                func, f"{FastAPICache.get_prefix()}:{namespace}",
+                request=request, response=response, args=args, kwargs=kwargs,
+            )
+
+            async def store(value: bytes) -> None:
+                await backend.set(key, _pack(value, fresh_ttl), fresh_ttl + stale_seconds)
+
+            async def produce(call_kwargs: dict[str, Any]) -> bytes:
+                session = next((value for value in call_kwargs.values() if isinstance(value, AsyncSession)), None)
+                if session is None or await is_current(session, ingested_at):
+                    return orjson.dumps(await func(*args, **call_kwargs))
+                async with db_helper.session_factory() as primary_session:
+                    return orjson.dumps(await func(*args, **_with_session(call_kwargs, primary_session)))
+
+            async def compute(call_kwargs: dict[str, Any]) -> bytes:
+                async def produce_and_store() -> bytes:
+                    value = await produce(call_kwargs)
+                    await store(value)
+                    return value
+
+                return await locked_compute(backend, key, produce_and_store, lambda entry: _unpack(entry)[1])
+
+            async def refresh() -> bytes:
+                # Фоновое обновление переживает исходный запрос, поэтому открывает собственную сессию
+                async with db_helper.read_session_factory() as session:
+                    return await compute(_with_session(kwargs, session))
+
+            # Версия читается до тела ответа: задача сброса кэша удаляет их вместе,
+            # поэтому новый ETag никогда не достаётся старому телу
+            version, ingested_at = await get_data_version()
+            validators = validator_headers(version, ingested_at, key)
+            if is_not_modified(request, validators):
+                record_cache(namespace, "not_modified")
+                return Response(status_code=304, headers=validators)
+
+            entry = None
+            if request.headers.get("Cache-Control") != "no-cache":
+                entry = await backend.get(key)
+
+            if entry is not None:
+                fresh_until, value = _unpack(entry)
+                status = "HIT"
+                if fresh_until < time.time():
+                    status = "STALE"
+                    if not single_flight.in_flight(key):
+                        asyncio.create_task(single_flight.do(key, refresh))
+            else:
+                status = "MISS"
+                value = await single_flight.do(key, lambda: compute(kwargs))
+
+            record_cache(namespace, status.lower())
+            return json_response(value, {FastAPICache.get_cache_status_header(): status, **validators})
+
+        inner.__signature__ = func_signature.replace(
+            parameters=[*func_signature.parameters.values(), request_param, response_param]
+        )
+        return inner
+
+    return wrapper
@@ -0,0 +1,194 @@
+import asyncio
+import calendar
+from datetime import date, datetime
+from functools import partial
+from typing import Any, Optional
+
+import orjson
+from fastapi_cache import FastAPICache
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.cache.conditional import (
+    get_data_version,
+    is_current,
+    is_not_modified,
+    parse_ingested_at,
+    validator_headers,
+)
+from core.cache.keys import (
+    DYNAMICS_NAMESPACE,
+    DYNAMICS_TILE_NAMESPACE,
+    DYNAMICS_TILE_VERSION_NAMESPACE,
+    params_digest,
+    tile_key,
+    tile_version_key,
+)
+from core.cache.single_flight import json_response, locked_compute, single_flight
+from core.config import settings
+from core.metrics import record_cache
+from core.models import db_helper
+from core.pagination import encode_cursor
+from filters.trading_filters import SpimexTradingResultsFilter
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+
+def month_starts(start_date: date, end_date: date) -> list[date]:
+    """
+    Первые дни месяцев, которые пересекает период.
+    """
+    months = []
+    month = start_date.replace(day=1)
+    while month <= end_date:
+        months.append(month)
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return months
+
+
+def month_end(month: date) -> date:
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+
+def _page_body(items: list, next_cursor: Optional[str]) -> bytes:
+    return orjson.dumps({"items": items, "next_cursor": next_cursor})
+
+
+async def _build_tile(
+        session: AsyncSession,
+        month: date,
+        str_filter: SpimexTradingResultsFilter,
+        key: str,
+        ingested_at: Optional[datetime],
+) -> bytes:
+    """
+    Читает из БД все строки месяца по фильтру и сохраняет их в кэш фрагментом.
+    Ключ фрагмента содержит версию месяца, поэтому фрагмент, построенный по прежним данным
+    одновременно со сбросом кэша, уже не будет прочитан после загрузки торгов за этот месяц.
+
+    :param ingested_at: Время загрузки, которую должна видеть сессия: последняя загрузка месяца,
+                        а если версии месяца в кэше нет - последняя загрузка вообще.
+    """
+
+    async def month_rows(tile_session: AsyncSession) -> bytes:
+        rows = await SpimexTradingResultsRepository(session=tile_session).get_dynamics(
+            month, month_end(month), str_filter
+        )
+        return orjson.dumps(rows)
+
+    # Фрагмент живёт неделю, поэтому строится только по данным, которые видит версия ответа
+    if await is_current(session, ingested_at):
+        tile = await month_rows(session)
+    else:
+        async with db_helper.session_factory() as primary_session:
+            tile = await month_rows(primary_session)
+    await FastAPICache.get_backend().set(key, tile, settings.cache.tile_expire)
+    return tile
+
+
+async def dynamics_page(
+        request: Request,
+        session: AsyncSession,
+        start_date: date,
+        end_date: date,
+        str_filter: SpimexTradingResultsFilter,
+        limit: int,
+        after: Optional[tuple[date, int]] = None,
+) -> Response:
+    """
+    Отдаёт страницу /dynamics из кэша готовых страниц, а при промахе собирает её из помесячных
+    фрагментов кэша. Фрагмент содержит все строки месяца по фильтру и не зависит от границ периода,
+    размера страницы и курсора, поэтому пересекающиеся запросы используют одни и те же фрагменты.
+    Фрагменты читаются по порядку, пока не наберётся limit + 1 строк, поэтому длинный период
+    с первой страницей не читает фрагменты дальних месяцев. Собранная страница сохраняется
+    в кэш уже закодированной, и повторный запрос не разбирает фрагменты заново.
+    Версия данных входит в ключи страниц, а в ключи фрагментов - только версия их месяца,
+    поэтому загрузка торгов за текущий месяц не сбрасывает фрагменты закрытых месяцев.
+    Недостающий фрагмент строит один запрос на все воркеры: внутри процесса через общий Future,
+    между воркерами - через блокировку в Redis, как в декораторе cached.
+    Ответ получает ETag и Last-Modified по версии данных, как маршруты с декоратором cached.
+
+    :param request: Запрос: заголовки Cache-Control и условного запроса.
+    :param session: Сессия для построения недостающих фрагментов.
+    :param start_date: Начало периода.
+    :param end_date: Конец периода.
+    :param str_filter: Фильтр торгов.
+    :param limit: Размер страницы.
+    :param after: Ключ (date, id) последней записи предыдущей страницы.
+    """
+    cache_control = request.headers.get("Cache-Control")
+    if not FastAPICache.get_enable() or cache_control == "no-store":
+        record_cache(DYNAMICS_NAMESPACE, "bypass")
+        rows = await SpimexTradingResultsRepository(session=session).get_dynamics(
+            start_date, end_date, str_filter, limit=limit + 1, after=after
+        )
+        items = rows[:limit]
+        next_cursor = encode_cursor(items[-1].date, items[-1].id) if len(rows) > limit else None
+        return json_response(_page_body(items, next_cursor))
+
+    backend = FastAPICache.get_backend()
+    prefix = FastAPICache.get_prefix()
+    version, ingested_at = await get_data_version()
+    page_key = f"{prefix}:{DYNAMICS_NAMESPACE}:{start_date.isoformat()}:{end_date.isoformat()}:" + params_digest(
+        DYNAMICS_NAMESPACE, {"filter": str_filter, "limit": limit, "after": after, "version": version.decode()}
+    )
+    validators = validator_headers(version, ingested_at, page_key)
+    if is_not_modified(request, validators):
+        record_cache(DYNAMICS_NAMESPACE, "not_modified")
+        return Response(status_code=304, headers=validators)
+    if cache_control != "no-cache":
+        body = await backend.get(page_key)
+        if body is not None:
+            record_cache(DYNAMICS_NAMESPACE, "hit")
+            return json_response(body, {FastAPICache.get_cache_status_header(): "HIT", **validators})
+
+    tile_namespace = f"{prefix}:{DYNAMICS_TILE_NAMESPACE}"
+    versions_namespace = f"{prefix}:{DYNAMICS_TILE_VERSION_NAMESPACE}"
+    # Строки фрагмента уже декодированы из JSON: даты сравниваются как строки ISO
+    lower = (start_date.isoformat(), 0)
+    if after is not None:
+        lower = max(lower, (after[0].isoformat(), after[1] + 1))
+    upper = end_date.isoformat()
+
+    months = month_starts(date.fromisoformat(lower[0]), end_date)
+    items: list[dict[str, Any]] = []
+    status = "HIT"
+    for window_start in range(0, len(months), settings.cache.tile_window):
+        window = months[window_start:window_start + settings.cache.tile_window]
+        month_versions = await asyncio.gather(
+            *(backend.get(tile_version_key(versions_namespace, month)) for month in window)
+        )
+        keys = [
+            tile_key(tile_namespace, month, params_digest(
+                DYNAMICS_TILE_NAMESPACE, {"filter": str_filter, "version": (month_version or b"").decode()}
+            ))
+            for month, month_version in zip(window, month_versions)
+        ]
+        if cache_control == "no-cache":
+            tiles = [None] * len(keys)
+        else:
+            tiles = await asyncio.gather(*(backend.get(key) for key in keys))
+        for month, month_version, key, tile in zip(window, month_versions, keys, tiles):
+            record_cache(DYNAMICS_TILE_NAMESPACE, "hit" if tile is not None else "miss")
+            if tile is None:
+                status = "MISS"
+                tile_ingested_at = parse_ingested_at(month_version.decode()) if month_version else ingested_at
+                build = partial(_build_tile, session, month, str_filter, key, tile_ingested_at)
+                tile = await single_flight.do(key, partial(locked_compute, backend, key, build))
+            items.extend(
+                row for row in orjson.loads(tile)
+                if (row["date"], row["id"]) >= lower and row["date"] <= upper
+            )
+            if len(items) > limit:
+                break
+        if len(items) > limit:
+            break
+
+    record_cache(DYNAMICS_NAMESPACE, "miss")
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(date.fromisoformat(items[-1]["date"]), items[-1]["id"])
+    body = _page_body(items, next_cursor)
+    await backend.set(page_key, body, settings.cache.expire)
+    return json_response(body, {FastAPICache.get_cache_status_header(): status, **validators})
@@ -1,3 +1,6 @@
+import datetime
+from typing import Literal, Optional
+
 from pydantic import BaseModel, PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -5,6 +8,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class RunConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
+    # Количество процессов uvicorn: по нему делится бюджет соединений с БД
+    workers: int = 1
 
 
 class ApiSMTPrefix(BaseModel):
@@ -16,12 +21,34 @@ class ApiPrefix(BaseModel):
     smt: ApiSMTPrefix = ApiSMTPrefix()
 
 
+class PaginationConfig(BaseModel):
+    default_page_size: int = 1000
+    max_page_size: int = 10000
+    stream_batch_size: int = 1000
+    # Строк в одной пачке выгрузки; для parquet это размер группы строк
+    export_batch_size: int = 10000
+
+
 class DatabaseConfig(BaseModel):
     url: PostgresDsn
     echo: bool = False
     echo_pool: bool = False
-    pool_size: int = 50
-    max_overflow: int = 10
+    # Бюджет соединений API на все процессы uvicorn; pool_size по умолчанию выводится из него
+    max_connections: int = 60
+    pool_size: Optional[int] = None
+    max_overflow: int = 5
+    pool_timeout: float = 10.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # Размер кэша подготовленных операторов на соединение
+    statement_cache_size: int = 500
+    # Транзакции API только на чтение: случайная запись из обработчика завершится ошибкой
+    read_only: bool = True
+    # Реплики для чтения API; при пустом списке все запросы идут в основную БД
+    replica_urls: list[PostgresDsn] = []
+    # Реплика с большим отставанием, секунды, или недоступная реплика исключается до следующей проверки
+    replica_max_lag: float = 30.0
+    replica_check_interval: float = 5.0
 
     naming_convention: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
@@ -38,6 +65,66 @@ class CeleryConfig(BaseModel):
     port: int = 6379
 
 
+class CacheConfig(BaseModel):
+    url: str = "redis://redis:6379"
+    prefix: str = "fastapi-cache"
+    expire: int = 3600 * 24
+    # Сколько секунд устаревший ответ ещё отдаётся, пока он обновляется в фоне; 0 - не отдавать
+    stale_ttl: int = 0
+    lock_timeout: float = 10.0
+    lock_poll_interval: float = 0.05
+    # max-age для клиентов: 0 - клиент перепроверяет ответ каждым запросом с If-None-Match и получает 304
+    client_max_age: int = 0
+    # Помесячные фрагменты /dynamics: закрытые месяцы не меняются, месяц последней загрузки сбрасывается после неё
+    tile_expire: int = 7 * 3600 * 24
+    # Сколько фрагментов запрашивается из кэша одновременно при сборке страницы
+    tile_window: int = 3
+    # Кэш в памяти воркера (L1) перед Redis (L2)
+    l1_enabled: bool = True
+    l1_max_entries: int = 1024
+    l1_max_bytes: int = 32 * 1024 * 1024
+    l1_ttl: int = 60
+    invalidation_channel: str = "fastapi-cache:invalidations"
+    warmup_base_url: str = "http://app:8000"
+    # Пути относительно префикса маршрутов торгов, которые прогреваются после загрузки новых торгов
+    warmup_paths: list[str] = ["/last_trading_dates/5", "/last_trading_dates/10", "/last_tradings"]
+
+
+class ParserConfig(BaseModel):
+    # Страница результатов торгов; для бенчмарков подменяется адресом локального сервера benchmarks.spimex_server
+    base_url: str = "https://spimex.com/markets/oil_products/trades/results/"
+    # Бюллетени ранее этой даты не загружаются: обход списка на них останавливается
+    start_date: datetime.date = datetime.date(2023, 1, 1)
+    save_mode: Literal["copy", "insert"] = "copy"
+    workers: int = 4
+    # Сколько страниц списка бюллетеней загружается одновременно
+    listing_window: int = 8
+    connection_limit: int = 8
+    keepalive_timeout: float = 30.0
+    request_timeout: float = 60.0
+    # Ограничение частоты скачивания бюллетеней
+    requests_per_second: float = 5.0
+    # Отдельное ограничение для страниц списка: при общем лимите окно listing_window ждало бы своей очереди
+    # вместе с файлами и загружало страницы по одной. Полный список обходится только при первой загрузке,
+    # затем - одна-две страницы за запуск, поэтому более высокий лимит почти не добавляет нагрузки на сайт
+    listing_requests_per_second: float = 20.0
+    retries: int = 3
+    retry_backoff: float = 0.5
+    parse_processes: Optional[int] = None
+    # Строк в одном INSERT ... VALUES режима "insert"; ограничивается 32767 параметрами запроса
+    insert_batch_size: int = 4000
+    # "off" ускоряет фиксацию транзакций загрузки ценой потери последних транзакций при сбое сервера БД;
+    # загрузка идемпотентна, поэтому потерянные бюллетени скачаются при следующем запуске
+    synchronous_commit: Literal["on", "off", "local"] = "on"
+    # Скачиваемый бюллетень держится в памяти до spool_memory_limit байт, дальше - во временном файле
+    spool_memory_limit: int = 4 * 1024 * 1024
+    max_file_size: int = 64 * 1024 * 1024
+    download_chunk_size: int = 64 * 1024
+    spool_dir: Optional[str] = None
+    # Файл .prom для textfile collector node_exporter со статистикой последнего запуска
+    metrics_textfile: Optional[str] = None
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=(".env",),
@@ -47,8 +134,11 @@ class Settings(BaseSettings):
     )
     run: RunConfig = RunConfig()
     api: ApiPrefix = ApiPrefix()
+    pagination: PaginationConfig = PaginationConfig()
     db: DatabaseConfig
     celery: CeleryConfig = CeleryConfig()
+    cache: CacheConfig = CacheConfig()
+    parser: ParserConfig = ParserConfig()
     mode: str = "DEV"
 
 
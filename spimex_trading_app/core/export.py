@@ -0,0 +1,179 @@
+import csv
+import io
+import zlib
+from dataclasses import fields
+from importlib.util import find_spec
+from operator import attrgetter
+from typing import AsyncIterator, Iterator
+
+from core.schemas.spimex_trading_results import ExportCompression, ExportFormat, SpimexTradingResultRow
+
+COLUMNS = [field.name for field in fields(SpimexTradingResultRow)]
+
+SUPPORTED_COMPRESSION = {
+    ExportFormat.csv: {ExportCompression.none, ExportCompression.gzip},
+    ExportFormat.arrow: {ExportCompression.none, ExportCompression.lz4, ExportCompression.zstd},
+    ExportFormat.parquet: {
+        ExportCompression.none, ExportCompression.snappy, ExportCompression.gzip,
+        ExportCompression.zstd, ExportCompression.lz4,
+    },
+}
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.arrow: "application/vnd.apache.arrow.stream",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+}
+
+EXTENSIONS = {
+    ExportFormat.csv: "csv",
+    ExportFormat.arrow: "arrows",
+    ExportFormat.parquet: "parquet",
+}
+
+_row_values = attrgetter(*COLUMNS)
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Файловый объект для писателей pyarrow: копит записанные байты, пока их не заберут через drain.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def check_export(export_format: ExportFormat, compression: ExportCompression) -> None:
+    """
+    Проверяет, что выгрузку в указанном формате можно построить.
+
+    :raises ValueError: если формат не поддерживает сжатие.
+    :raises ImportError: если для формата не установлен pyarrow.
+    """
+    if compression not in SUPPORTED_COMPRESSION[export_format]:
+        supported = ", ".join(sorted(item.value for item in SUPPORTED_COMPRESSION[export_format]))
+        raise ValueError(f"Формат {export_format.value} поддерживает сжатие: {supported}")
+    if export_format != ExportFormat.csv and find_spec("pyarrow") is None:
+        raise ImportError(f"Для выгрузки в формате {export_format.value} нужен пакет pyarrow")
+
+
+def export_media_type(export_format: ExportFormat, compression: ExportCompression) -> str:
+    if export_format == ExportFormat.csv and compression == ExportCompression.gzip:
+        return "application/gzip"
+    return MEDIA_TYPES[export_format]
+
+
+def export_filename(name: str, export_format: ExportFormat, compression: ExportCompression) -> str:
+    if export_format == ExportFormat.csv and compression == ExportCompression.gzip:
+        return f"{name}.csv.gz"
+    return f"{name}.{EXTENSIONS[export_format]}"
+
+
+async def export_rows(
+        batches: AsyncIterator[list[SpimexTradingResultRow]],
+        export_format: ExportFormat,
+        compression: ExportCompression,
+) -> AsyncIterator[bytes]:
+    """
+    Кодирует пачки строк в поток байтов выгрузки. В памяти держится одна пачка,
+    поэтому расход памяти не зависит от размера периода.
+
+    :param batches: Асинхронный итератор пачек строк, например SpimexTradingResultsRepository.stream_dynamics.
+    :param export_format: Формат выгрузки.
+    :param compression: Сжатие выгрузки.
+    :return: Асинхронный итератор фрагментов файла выгрузки.
+    """
+    if export_format == ExportFormat.csv:
+        chunks = _csv_chunks(batches, compression)
+    else:
+        chunks = _arrow_chunks(batches, export_format, compression)
+    async for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+async def _csv_chunks(
+        batches: AsyncIterator[list[SpimexTradingResultRow]], compression: ExportCompression
+) -> AsyncIterator[bytes]:
+    # wbits=31 - формат gzip, поток сжимается по мере выгрузки
+    compressor = zlib.compressobj(wbits=31) if compression == ExportCompression.gzip else None
+
+    def encode(rows: Iterator[tuple]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        data = buffer.getvalue().encode()
+        return compressor.compress(data) if compressor else data
+
+    yield encode(iter([COLUMNS]))
+    async for batch in batches:
+        yield encode(map(_row_values, batch))
+    if compressor:
+        yield compressor.flush()
+
+
+def _arrow_schema(pa):
+    return pa.schema([
+        ("id", pa.int64()),
+        ("exchange_product_id", pa.string()),
+        ("exchange_product_name", pa.string()),
+        ("oil_id", pa.string()),
+        ("delivery_basis_id", pa.string()),
+        ("delivery_basis_name", pa.string()),
+        ("delivery_type_id", pa.string()),
+        ("volume", pa.float64()),
+        ("total", pa.float64()),
+        ("count", pa.float64()),
+        ("date", pa.date32()),
+        ("created_on", pa.timestamp("us")),
+        ("updated_on", pa.timestamp("us")),
+    ])
+
+
+async def _arrow_chunks(
+        batches: AsyncIterator[list[SpimexTradingResultRow]],
+        export_format: ExportFormat,
+        compression: ExportCompression,
+) -> AsyncIterator[bytes]:
+    # pyarrow тяжёлый и нужен только выгрузкам, поэтому импортируется при первом обращении
+    import pyarrow as pa
+
+    schema = _arrow_schema(pa)
+    codec = None if compression == ExportCompression.none else compression.value
+    sink = _ChunkSink()
+    if export_format == ExportFormat.arrow:
+        writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+    else:
+        import pyarrow.parquet as pq
+
+        # Каждая пачка становится отдельной группой строк файла
+        writer = pq.ParquetWriter(sink, schema, compression=codec or "none")
+    try:
+        async for batch in batches:
+            if not batch:
+                continue
+            columns = zip(*map(_row_values, batch))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=column.type) for values, column in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,157 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Задержки API - от миллисекунд (попадание в кэш) до секунд (выгрузки)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса до отправки последнего байта ответа",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Обращения к кэшу маршрутов: hit, stale, miss, not_modified, bypass",
+    ["namespace", "result"],
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание соединения из пула, включая открытие нового соединения",
+    ["pool"],
+    buckets=LATENCY_BUCKETS,
+)
+POOL_CONNECTIONS_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Соединения, выданные из пула",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения SQL-запроса",
+    ["pool", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, замеряющий ожидание свободного соединения.
+    """
+
+    metrics_label = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(pool=self.metrics_label).observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine, label: str) -> None:
+    """
+    Подключает к движку метрики пула и длительности запросов.
+    Движок должен быть создан с poolclass=TimedQueuePool.
+
+    :param engine: Асинхронный движок.
+    :param label: Значение метки pool: primary, replica-0, ...
+    """
+    pool = engine.sync_engine.pool
+    if isinstance(pool, TimedQueuePool):
+        pool.metrics_label = label
+    in_use = POOL_CONNECTIONS_IN_USE.labels(pool=label)
+
+    def update_in_use(*_) -> None:
+        in_use.set(pool.checkedout())
+
+    event.listen(pool, "checkout", update_in_use)
+    event.listen(pool, "checkin", update_in_use)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info["query_started_at"].pop()
+        # Метка - первое слово запроса, а не его текст: иначе число временных рядов не ограничено
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "unknown"
+        QUERY_DURATION.labels(pool=label, operation=operation).observe(time.perf_counter() - started)
+
+    def handle_error(context) -> None:
+        if context.connection is not None and context.connection.info.get("query_started_at"):
+            context.connection.info["query_started_at"].pop()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", handle_error)
+
+
+def record_cache(namespace: str, result: str) -> None:
+    CACHE_REQUESTS.labels(namespace=namespace, result=result).inc()
+
+
+def _route_label(scope: Scope) -> str:
+    # Маршрут подключённого роутера хранит путь без префикса; полный шаблон FastAPI кладёт в контекст маршрута
+    route = scope.get("fastapi", {}).get("effective_route_context") or scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware гистограммы задержки маршрутов. Метка route - шаблон пути маршрута
+    (/api/trading_results/last_trading_dates/{days}), а не сам путь, поэтому число рядов ограничено.
+    Время считается до последнего фрагмента тела, так что потоковые ответы учитываются целиком.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_DURATION.labels(
+                method=scope["method"], route=_route_label(scope), status=str(status_code),
+            ).observe(time.perf_counter() - started)
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    """
+    Метрики в текстовом формате Prometheus. Если задан PROMETHEUS_MULTIPROC_DIR,
+    метрики собираются со всех процессов uvicorn.
+
+    :return: Пара (тело ответа, Content-Type).
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
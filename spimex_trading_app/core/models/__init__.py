@@ -2,8 +2,18 @@ __all__ = (
     "db_helper",
     "Base",
     "SpimexTradingResults",
+    "IngestionLedger",
+    "IngestionWatermark",
+    "TradingDay",
+    "Instrument",
+    "DeliveryBasis",
 )
 
 from .db_helper import db_helper
 from .base import Base
 from .spimex_trading_results import SpimexTradingResults
+from .ingestion_ledger import IngestionLedger
+from .ingestion_watermark import IngestionWatermark
+from .trading_day import TradingDay
+from .instrument import Instrument
+from .delivery_basis import DeliveryBasis
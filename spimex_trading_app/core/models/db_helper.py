@@ -1,5 +1,9 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+from typing import Any, AsyncGenerator, Optional, Sequence
 
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncEngine,
@@ -8,6 +12,19 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from core.config import settings
+from core.metrics import TimedQueuePool, instrument_engine
+
+# Отставание реплики в секундах; для сервера, который не в режиме восстановления, - ноль.
+# Если реплика догнала основную БД, время последней транзакции не означает отставания
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
 
 
 class DatabaseHelper:
@@ -18,33 +35,183 @@ class DatabaseHelper:
         echo_pool: bool = False,
         pool_size: int = 5,
         max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: Optional[int] = None,
+        server_settings: Optional[dict[str, str]] = None,
+        replica_urls: Sequence[str] = (),
+        replica_max_lag: float = 30.0,
+        metrics: bool = False,
     ) -> None:
-        self.engine: AsyncEngine = create_async_engine(
-            url=url,
+        connect_args: dict[str, Any] = {}
+        if statement_cache_size is not None:
+            connect_args["statement_cache_size"] = statement_cache_size
+        if server_settings:
+            connect_args["server_settings"] = server_settings
+        self.statement_cache_size = statement_cache_size
+        self.engine_options: dict[str, Any] = dict(
+            # Пул с замером ожидания соединения для метрик Prometheus
+            **({"poolclass": TimedQueuePool} if metrics else {}),
             echo=echo,
             echo_pool=echo_pool,
             pool_size=pool_size,
             max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            connect_args=connect_args,
         )
+        self.engine: AsyncEngine = self.create_engine(url)
         self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
+        # Реплики получают такой же пул, как основная БД: бюджет соединений задаётся на сервер
+        self.replicas: list[AsyncEngine] = [self.create_engine(replica_url) for replica_url in replica_urls]
+        if metrics:
+            instrument_engine(self.engine, "primary")
+            for number, replica in enumerate(self.replicas):
+                instrument_engine(replica, f"replica-{number}")
+        self.replica_max_lag = replica_max_lag
+        # До первой проверки чтение идёт в основную БД
+        self.healthy_replicas: list[AsyncEngine] = []
+        self.replica_lags: dict[AsyncEngine, Optional[float]] = {replica: None for replica in self.replicas}
+        self._replica_turn = itertools.count()
+        for replica in self.replicas:
+            event.listen(replica.sync_engine, "handle_error", self._on_replica_error)
+
+    def create_engine(self, url: str) -> AsyncEngine:
+        if self.statement_cache_size is not None:
+            # Кэш SQLAlchemy для подготовленных операторов asyncpg задаётся параметром URL,
+            # собственный кэш asyncpg - аргументом соединения
+            url = make_url(url).update_query_dict(
+                {"prepared_statement_cache_size": str(self.statement_cache_size)}
+            ).render_as_string(hide_password=False)
+        return create_async_engine(url=url, **self.engine_options)
 
     async def dispose(self) -> None:
         await self.engine.dispose()
+        for replica in self.replicas:
+            await replica.dispose()
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
+    def read_engine(self) -> AsyncEngine:
+        """
+        Движок для запросов только на чтение: исправные реплики по очереди,
+        основная БД - если реплик нет или все отстают.
+        """
+        healthy = self.healthy_replicas
+        if not healthy:
+            return self.engine
+        return healthy[next(self._replica_turn) % len(healthy)]
+
+    def read_session_factory(self) -> AsyncSession:
+        return self.session_factory(bind=self.read_engine())
+
+    async def read_session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.read_session_factory() as session:
+            yield session
+
+    def is_primary(self, session: AsyncSession) -> bool:
+        return session.bind is self.engine
+
+    async def check_replicas(self, timeout: float = 5.0) -> dict[AsyncEngine, Optional[float]]:
+        """
+        Измеряет отставание реплик и обновляет список исправных. Реплика исключается,
+        если недоступна, не ответила за timeout секунд или отстаёт больше replica_max_lag.
+
+        :return: Словарь {движок реплики: отставание в секундах или None для недоступной}.
+        """
+
+        async def query_lag(replica: AsyncEngine) -> float:
+            async with replica.connect() as connection:
+                return float(await connection.scalar(REPLICA_LAG_SQL))
+
+        async def replica_lag(replica: AsyncEngine) -> Optional[float]:
+            try:
+                return await asyncio.wait_for(query_lag(replica), timeout)
+            except Exception as error:
+                print(f"Реплика {replica.url.render_as_string()} недоступна: {error!r}")
+                return None
+
+        lags = await asyncio.gather(*(replica_lag(replica) for replica in self.replicas))
+        self.replica_lags = dict(zip(self.replicas, lags))
+        self.healthy_replicas = [
+            replica for replica, lag in self.replica_lags.items()
+            if lag is not None and lag <= self.replica_max_lag
+        ]
+        return self.replica_lags
+
+    async def monitor_replicas(self, interval: float) -> None:
+        """
+        Периодически проверяет реплики. Запускается фоновой задачей процесса API.
+        """
+        while True:
+            await self.check_replicas(timeout=interval)
+            await asyncio.sleep(interval)
+
+    def _on_replica_error(self, context) -> None:
+        # Потерянное соединение исключает реплику сразу, не дожидаясь следующей проверки
+        if context.is_disconnect and context.engine is not None:
+            self.healthy_replicas = [
+                replica for replica in self.healthy_replicas if replica.sync_engine is not context.engine
+            ]
+
+
+def api_pool_size() -> int:
+    """
+    Размер пула одного процесса uvicorn: бюджет соединений делится между процессами
+    с учётом соединений сверх пула (max_overflow).
+    """
+    if settings.db.pool_size is not None:
+        return settings.db.pool_size
+    per_worker = settings.db.max_connections // max(settings.run.workers, 1)
+    return max(per_worker - settings.db.max_overflow, 1)
+
+
+def create_api_db_helper() -> DatabaseHelper:
+    """
+    Профиль API: транзакции только на чтение, кэш подготовленных операторов,
+    проверка и пересоздание соединений, пул по числу процессов uvicorn.
+    """
+    return DatabaseHelper(
+        url=str(settings.db.url),
+        echo=settings.db.echo,
+        echo_pool=settings.db.echo_pool,
+        pool_size=api_pool_size(),
+        max_overflow=settings.db.max_overflow,
+        pool_timeout=settings.db.pool_timeout,
+        pool_recycle=settings.db.pool_recycle,
+        pool_pre_ping=settings.db.pool_pre_ping,
+        statement_cache_size=settings.db.statement_cache_size,
+        server_settings={"default_transaction_read_only": "on"} if settings.db.read_only else None,
+        replica_urls=[str(replica_url) for replica_url in settings.db.replica_urls],
+        replica_max_lag=settings.db.replica_max_lag,
+        metrics=True,
+    )
+
+
+def create_ingestion_db_helper() -> DatabaseHelper:
+    """
+    Профиль загрузки: без логирования SQL, пул на всех воркеров парсера
+    и необязательный synchronous_commit=off для транзакций загрузки.
+    """
+    return DatabaseHelper(
+        url=str(settings.db.url),
+        # Служебные сессии парсера (справочники, секции) открываются в дополнение к сессиям воркеров
+        pool_size=settings.parser.workers + 1,
+        max_overflow=settings.parser.workers,
+        pool_recycle=settings.db.pool_recycle,
+        pool_pre_ping=settings.db.pool_pre_ping,
+        statement_cache_size=settings.db.statement_cache_size,
+        server_settings={"synchronous_commit": settings.parser.synchronous_commit},
+    )
+
 
-db_helper = DatabaseHelper(
-    url=str(settings.db.url),
-    echo=settings.db.echo,
-    echo_pool=settings.db.echo_pool,
-    pool_size=settings.db.pool_size,
-    max_overflow=settings.db.max_overflow,
-)
\ No newline at end of file
+db_helper = create_api_db_helper()
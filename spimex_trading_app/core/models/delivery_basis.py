@@ -0,0 +1,18 @@
+import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.base import Base
+
+
+class DeliveryBasis(Base):
+    __tablename__ = 'spimex_delivery_bases'
+
+    delivery_basis_id: Mapped[str] = mapped_column(primary_key=True)
+    delivery_basis_name: Mapped[str]
+    # Дата бюллетеня, из которого взяты значения записи
+    trade_date: Mapped[datetime.date]
+    updated_on: Mapped[datetime.datetime] = mapped_column(
+        server_default=func.now(), server_onupdate=func.now()
+    )
@@ -0,0 +1,17 @@
+import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.base import Base
+
+
+class IngestionLedger(Base):
+    __tablename__ = 'spimex_ingestion_ledger'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    url: Mapped[str] = mapped_column(unique=True)
+    trade_date: Mapped[datetime.date] = mapped_column(index=True)
+    content_hash: Mapped[str]
+    row_count: Mapped[int]
+    ingested_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
@@ -0,0 +1,14 @@
+import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.base import Base
+
+
+class IngestionWatermark(Base):
+    __tablename__ = 'spimex_ingestion_watermarks'
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    trade_date: Mapped[datetime.date]
+    updated_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
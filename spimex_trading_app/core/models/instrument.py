@@ -0,0 +1,21 @@
+import datetime
+
+from sqlalchemy import ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.base import Base
+
+
+class Instrument(Base):
+    __tablename__ = 'spimex_instruments'
+
+    exchange_product_id: Mapped[str] = mapped_column(primary_key=True)
+    exchange_product_name: Mapped[str]
+    oil_id: Mapped[str]
+    delivery_basis_id: Mapped[str] = mapped_column(ForeignKey('spimex_delivery_bases.delivery_basis_id'))
+    delivery_type_id: Mapped[str]
+    # Дата бюллетеня, из которого взяты значения записи
+    trade_date: Mapped[datetime.date]
+    updated_on: Mapped[datetime.datetime] = mapped_column(
+        server_default=func.now(), server_onupdate=func.now()
+    )
@@ -1,7 +1,7 @@
 import datetime
 from typing import Annotated
 
-from sqlalchemy import func, Float
+from sqlalchemy import ForeignKey, func, Float, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from core.models.base import Base
@@ -9,18 +9,32 @@ from core.models.base import Base
 
 class SpimexTradingResults(Base):
     __tablename__ = 'spimex_trading_results'
+    __table_args__ = (
+        UniqueConstraint('exchange_product_id', 'date'),
+        # get_trading_results: max(date) и все строки за последнюю дату
+        Index('ix_spimex_trading_results_date', 'date'),
+        # get_dynamics: диапазон дат с фильтрами по oil_id / delivery_basis_id / delivery_type_id
+        Index(
+            'ix_spimex_trading_results_instrument_date', 'oil_id', 'delivery_basis_id', 'delivery_type_id', 'date'
+        ),
+        # get_dynamics с фильтром только по delivery_basis_id
+        Index('ix_spimex_trading_results_delivery_basis_id_date', 'delivery_basis_id', 'date'),
+        # Месячные секции создаёт функция ensure_spimex_trading_results_partition при загрузке
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    exchange_product_id: Mapped[str]
-    exchange_product_name: Mapped[str]
+    # Ключ секционирования date входит в первичный ключ
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Наименования инструмента и базиса поставки хранятся в справочниках spimex_instruments
+    # и spimex_delivery_bases; в таблице торгов остаются только короткие коды для фильтров и индексов
+    exchange_product_id: Mapped[str] = mapped_column(ForeignKey('spimex_instruments.exchange_product_id'))
     oil_id: Mapped[str]
-    delivery_basis_id: Mapped[str]
-    delivery_basis_name: Mapped[str]
+    delivery_basis_id: Mapped[str] = mapped_column(ForeignKey('spimex_delivery_bases.delivery_basis_id'))
     delivery_type_id: Mapped[str]
     volume: Mapped[float] = mapped_column(Float, nullable=False)
     total: Mapped[float] = mapped_column(Float, nullable=False)
     count: Mapped[float] = mapped_column(Float, nullable=False)
-    date: Mapped[datetime.date]
+    date: Mapped[datetime.date] = mapped_column(primary_key=True)
     created_on: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
     updated_on: Mapped[datetime.datetime] = mapped_column(
         server_default=func.now(), server_onupdate=func.now()
@@ -0,0 +1,16 @@
+import datetime
+
+from sqlalchemy import func, Float
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.base import Base
+
+
+class TradingDay(Base):
+    __tablename__ = 'trading_days'
+
+    date: Mapped[datetime.date] = mapped_column(primary_key=True)
+    row_count: Mapped[int]
+    total_volume: Mapped[float] = mapped_column(Float, nullable=False)
+    total_value: Mapped[float] = mapped_column(Float, nullable=False)
+    ingested_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
@@ -0,0 +1,28 @@
+import base64
+import datetime
+
+
+def encode_cursor(trade_date: datetime.date, row_id: int) -> str:
+    """
+    Кодирует ключ (date, id) последней записи страницы в непрозрачный токен курсора.
+
+    :param trade_date: Дата торгов последней записи.
+    :param row_id: Идентификатор последней записи.
+    :return: Токен курсора.
+    """
+    return base64.urlsafe_b64encode(f"{trade_date.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.date, int]:
+    """
+    Декодирует токен курсора обратно в ключ (date, id).
+
+    :param cursor: Токен курсора.
+    :return: Ключ (date, id) последней записи предыдущей страницы.
+    :raises ValueError: если токен повреждён.
+    """
+    try:
+        trade_date, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.date.fromisoformat(trade_date), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Некорректный курсор: {cursor}") from e
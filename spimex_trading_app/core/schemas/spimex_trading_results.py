@@ -1,4 +1,6 @@
 import datetime
+from dataclasses import dataclass
+from enum import Enum
 
 from pydantic import BaseModel, Field
 
@@ -19,3 +21,60 @@ class SpimexTradingResultsSchema(BaseModel):
     total: str = Field(default="-")
     count: str = Field(default="-")
     date: datetime.date
+
+
+@dataclass(slots=True, frozen=True)
+class SpimexTradingResultRow:
+    """
+    Строка результата торгов для ответов API: лёгкая замена ORM-объекта,
+    которую orjson сериализует без промежуточных преобразований
+    """
+
+    id: int
+    exchange_product_id: str
+    exchange_product_name: str
+    oil_id: str
+    delivery_basis_id: str
+    delivery_basis_name: str
+    delivery_type_id: str
+    volume: float
+    total: float
+    count: float
+    date: datetime.date
+    created_on: datetime.datetime
+    updated_on: datetime.datetime
+
+
+class AggregationDimension(str, Enum):
+    """
+    Измерения, по которым группируются торги в агрегированной динамике
+    """
+
+    date = "date"
+    week = "week"
+    month = "month"
+    oil_id = "oil_id"
+    delivery_basis_id = "delivery_basis_id"
+    delivery_type_id = "delivery_type_id"
+
+
+class ExportFormat(str, Enum):
+    """
+    Форматы выгрузки торгов
+    """
+
+    csv = "csv"
+    arrow = "arrow"
+    parquet = "parquet"
+
+
+class ExportCompression(str, Enum):
+    """
+    Сжатие выгрузки: для csv - gzip всего потока, для arrow и parquet - сжатие буферов внутри файла
+    """
+
+    none = "none"
+    gzip = "gzip"
+    zstd = "zstd"
+    lz4 = "lz4"
+    snappy = "snappy"
@@ -1,14 +1,17 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-
-# from fastapi.responses import ORJSONResponse
+from starlette.responses import Response
 
 from core.config import settings
 
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from api import router as api_router
+from core.cache.backends import LocalCache, TwoTierBackend
+from core.cache.keys import trading_key_builder
+from core.metrics import MetricsMiddleware, metrics_payload
 from core.models import db_helper
 from redis import asyncio as aioredis
 
@@ -16,18 +19,64 @@ from redis import asyncio as aioredis
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
-    redis = aioredis.from_url(f"{settings.celery.broker}://{settings.celery.port}")
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    redis = aioredis.from_url(settings.cache.url)
+    invalidation_listener = None
+    if settings.cache.l1_enabled:
+        backend = TwoTierBackend(
+            redis,
+            LocalCache(settings.cache.l1_max_entries, settings.cache.l1_max_bytes, settings.cache.l1_ttl),
+            settings.cache.invalidation_channel,
+        )
+        invalidation_listener = asyncio.create_task(backend.listen_for_invalidations())
+    else:
+        backend = RedisBackend(redis)
+    FastAPICache.init(
+        backend,
+        prefix=settings.cache.prefix,
+        expire=settings.cache.expire,
+        key_builder=trading_key_builder,
+    )
+    replica_monitor = None
+    if db_helper.replicas:
+        replica_monitor = asyncio.create_task(db_helper.monitor_replicas(settings.db.replica_check_interval))
     yield
     # shutdown
+    if invalidation_listener is not None:
+        invalidation_listener.cancel()
+    if replica_monitor is not None:
+        replica_monitor.cancel()
     await db_helper.dispose()
 
 main_app = FastAPI(
     lifespan=lifespan,
-    # default_response_class=ORJSONResponse,
 )
+main_app.add_middleware(MetricsMiddleware)
 
 main_app.include_router(
     api_router,
     prefix=settings.api.prefix,
 )
+
+
+@main_app.get("/metrics", include_in_schema=False)
+async def metrics():
+    content, media_type = metrics_payload()
+    return Response(content=content, media_type=media_type)
+
+
+@main_app.get("/cache/stats", include_in_schema=False)
+async def cache_stats():
+    backend = FastAPICache.get_backend()
+    return backend.stats() if isinstance(backend, TwoTierBackend) else {}
+
+
+@main_app.get("/db/replicas", include_in_schema=False)
+async def replica_stats():
+    return [
+        {
+            "url": replica.url.render_as_string(),
+            "lag": lag,
+            "healthy": replica in db_helper.healthy_replicas,
+        }
+        for replica, lag in db_helper.replica_lags.items()
+    ]
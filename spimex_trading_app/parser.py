@@ -1,219 +1,483 @@
 import asyncio
 import datetime
+import json
 import re
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
 from urllib.parse import urljoin
 
 import aiohttp
 import pandas as pd
-from bs4 import BeautifulSoup
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from bs4 import BeautifulSoup, SoupStrainer
 
+from celery_app import invalidate_trading_dates
 from core.config import settings
-from core.models import SpimexTradingResults
+from core.models.db_helper import create_ingestion_db_helper
+from parsing.excel import parse_bulletin_in_worker
+from parsing.http import HostRateLimiter, HttpClient, create_http_session
+from parsing.stats import ParserStats
+from repository.dimension_repository import DeliveryBasisRepository, InstrumentRepository
+from repository.ingestion_ledger_repository import IngestionLedgerRepository, IngestionWatermarkRepository
+from repository.trading_day_repository import TradingDayRepository
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+# Столбцы, которые записываются в таблицу торгов; created_on и updated_on заполняются значениями по умолчанию в БД,
+# наименования инструмента и базиса поставки - в справочники
+COPY_COLUMNS = (
+    'exchange_product_id',
+    'oil_id',
+    'delivery_basis_id',
+    'delivery_type_id',
+    'volume',
+    'total',
+    'count',
+    'date',
+)
+
+BULLETIN_LINK_CLASS = 'accordeon-inner__item-title link xls'
+BULLETIN_DATE_RE = re.compile(r'_(\d{14})\.xls')
+LISTING_PAGE_RE = re.compile(r'page=page-(\d+)')
+# Дерево страницы списка строится только из ссылок на бюллетени и на другие страницы списка
+LISTING_STRAINER = SoupStrainer('a', href=re.compile(r'\.xls|page=page-\d+'))
+# Отметка обхода: все бюллетени списка с датой торгов не позже неё уже есть в журнале загрузок
+CRAWL_WATERMARK = 'crawl'
 
 
 class Parser:
     def __init__(self) -> None:
-        self.base_url = 'https://spimex.com/markets/oil_products/trades/results/'
-        self.engine = create_async_engine(str(settings.db.url), future=True, echo=True)
-        self.async_session = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.base_url = settings.parser.base_url
+        self.db_helper = create_ingestion_db_helper()
+        self.engine = self.db_helper.engine
+        self.async_session = self.db_helper.session_factory
+        self.stats = ParserStats()
+        self.ingested_dates: set[datetime.date] = set()
+        # Самая поздняя дата торгов в списке бюллетеней за этот запуск
+        self.newest_listed_date: Optional[datetime.date] = None
+        # Месяцы, секции которых уже созданы в этом запуске
+        self.partition_months: set[datetime.date] = set()
+        # Уже записанные в справочники инструменты и базисы поставки: код -> (дата бюллетеня, значения столбцов)
+        self.known_instruments: dict[str, tuple[datetime.date, tuple]] = {}
+        self.known_delivery_bases: dict[str, tuple[datetime.date, tuple]] = {}
+        self.parse_executor = ProcessPoolExecutor(max_workers=settings.parser.parse_processes)
+
+    def create_http_client(self, session: aiohttp.ClientSession) -> HttpClient:
+        """
+        Создаёт HTTP-клиент с повторами и раздельными ограничениями частоты загрузки страниц списка
+        и скачивания бюллетеней из настроек парсера.
+        :param session: Общая сессия aiohttp.
+        """
+        return HttpClient(
+            session,
+            HostRateLimiter(settings.parser.requests_per_second),
+            self.stats,
+            retries=settings.parser.retries,
+            retry_backoff=settings.parser.retry_backoff,
+            page_rate_limiter=HostRateLimiter(settings.parser.listing_requests_per_second),
+        )
 
     @staticmethod
-    async def fetch(session: aiohttp.ClientSession, url: str) -> Optional[str]:
+    async def fetch(client: HttpClient, url: str) -> Optional[str]:
         """
         Загружает содержимое страницы по указанному URL.
-        :param session: Сессия aiohttp для выполнения запросов.
+        :param client: HTTP-клиент для выполнения запросов.
         :param url: URL страницы, которую нужно загрузить.
         :return: Содержимое страницы в виде строки или None в случае ошибки.
         """
         try:
-            async with session.get(url) as response:
-                response.raise_for_status()  # Вызывает исключение для статусов 4xx/5xx
-                return await response.text()
-        except aiohttp.ClientError as e:
+            content = await client.get(url)
+            return content.decode('utf-8', errors='replace')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             print(f"Ошибка при загрузке страницы {url}: {e}")
             return None
 
-    @staticmethod
-    async def get_data_from_excel(file_content: bytes, trade_date: datetime.date) -> Optional[pd.DataFrame]:
+    async def get_data_from_excel(
+        self, file_content: Union[bytes, str], trade_date: datetime.date
+    ) -> Optional[pd.DataFrame]:
         """
         Загружает данные из Excel-файла и возвращает DataFrame с нужной структурой.
-        :param file_content: Содержимое Excel-файла в байтовом формате.
+        Разбор выполняется в пуле процессов, чтобы не блокировать цикл событий.
+        :param file_content: Содержимое Excel-файла в байтовом формате или путь к временному файлу с ним.
         :param trade_date: Дата торговли.
         :return: DataFrame с данными торговли или None, если данные отсутствуют.
         """
-        from io import BytesIO
+        loop = asyncio.get_running_loop()
+        with self.stats.stage('parse'):
+            spimex_trading_results, process_peak_rss_kb = await loop.run_in_executor(
+                self.parse_executor, parse_bulletin_in_worker, file_content, trade_date
+            )
+        self.stats.parse_process_peak_rss_kb = max(self.stats.parse_process_peak_rss_kb, process_peak_rss_kb)
+        return spimex_trading_results
 
-        try:
-            temp_df = pd.read_excel(BytesIO(file_content), header=None)
-        except Exception as e:
-            print(f"Ошибка при чтении Excel-файла: {e}")
-            return None
+    async def save_dimensions(self, spimex_trading_results: pd.DataFrame) -> None:
+        """
+        Записывает в справочники инструменты и базисы поставки бюллетеня, которых в них ещё нет,
+        наименования которых изменились или которые уже записаны из более старого бюллетеня.
+        Справочники обновляются в отдельной короткой транзакции, чтобы параллельные загрузки бюллетеней
+        с общими инструментами не ждали друг друга.
+        :param spimex_trading_results: DataFrame с данными торговли.
+        """
+        new_delivery_bases = self._new_dimension_records(
+            spimex_trading_results, DeliveryBasisRepository, self.known_delivery_bases
+        )
+        new_instruments = self._new_dimension_records(
+            spimex_trading_results, InstrumentRepository, self.known_instruments
+        )
+        if not new_delivery_bases and not new_instruments:
+            return
+        async with self.async_session() as session:
+            await DeliveryBasisRepository(session=session).upsert(new_delivery_bases)
+            await InstrumentRepository(session=session).upsert(new_instruments)
+            await session.commit()
+        for records, repository, known in (
+            (new_delivery_bases, DeliveryBasisRepository, self.known_delivery_bases),
+            (new_instruments, InstrumentRepository, self.known_instruments),
+        ):
+            for record in records:
+                known[record[repository.key]] = (
+                    record['trade_date'], tuple(record[name] for name in repository.attributes)
+                )
 
-        # Поиск строки, где начинается нужная информация
-        row_start = temp_df[temp_df.apply(
-            lambda x: x.astype(str).str.contains('Единица измерения: Метрическая тонна', na=False).any(), axis=1
-        )].index
-        if row_start.empty:
-            print("Не удалось найти строку с 'Единица измерения: Метрическая тонна'")
-            return None
-        row_start = row_start[0]
+    @staticmethod
+    def _new_dimension_records(
+        spimex_trading_results: pd.DataFrame, repository, known: dict[str, tuple[datetime.date, tuple]]
+    ) -> list[dict]:
+        columns = [repository.key, *repository.attributes]
+        rows = spimex_trading_results[columns].drop_duplicates(subset=repository.key, keep='last')
+        trade_date = spimex_trading_results['date'].iloc[0]
+        records = []
+        for row in rows.itertuples(index=False, name=None):
+            known_date, known_values = known.get(row[0], (None, None))
+            # Более старый бюллетень не меняет значения из более нового, а повтор того же бюллетеня ничего не меняет
+            if known_date is not None and (
+                known_date > trade_date or known_date == trade_date and known_values == row[1:]
+            ):
+                continue
+            records.append({**dict(zip(columns, row)), 'trade_date': trade_date})
+        return records
 
-        header_row = row_start + 1
-        df = pd.read_excel(BytesIO(file_content), header=header_row)
+    async def save_data_to_db(
+        self, spimex_trading_results: pd.DataFrame, link: str, content_hash: str
+    ) -> None:
+        """
+        Сохраняет данные из DataFrame в базу данных, пересчитывает итоги торгового дня
+        и отмечает бюллетень в журнале загрузок в одной транзакции. Строки записываются через INSERT ... ON CONFLICT по ключу
+        (exchange_product_id, date), поэтому повторная загрузка бюллетеня не создаёт дублей.
+        Способ записи задаётся settings.parser.save_mode: "copy" - бинарный COPY через
+        временную таблицу, "insert" - многострочные INSERT ... VALUES.
+        Справочники инструментов и месячная секция таблицы для даты бюллетеня обновляются заранее
+        в отдельных транзакциях.
+        :param spimex_trading_results: DataFrame с данными торговли для сохранения.
+        :param link: Ссылка на файл бюллетеня.
+        :param content_hash: Хеш содержимого файла бюллетеня.
+        """
+        spimex_trading_results = spimex_trading_results.drop_duplicates(
+            subset=['exchange_product_id', 'date'], keep='last'
+        )
+        records = spimex_trading_results[list(COPY_COLUMNS)].astype(object).itertuples(index=False, name=None)
+        trade_date = spimex_trading_results['date'].iloc[0]
 
-        # Преобразование типов
-        df['Количество\nДоговоров,\nшт.'] = pd.to_numeric(df['Количество\nДоговоров,\nшт.'], errors='coerce')
+        await self.save_dimensions(spimex_trading_results)
+        month = trade_date.replace(day=1)
+        if month not in self.partition_months:
+            async with self.async_session() as session:
+                await SpimexTradingResultsRepository(session=session).ensure_partitions([trade_date])
+                await session.commit()
+            self.partition_months.add(month)
 
-        filtered_data = df[
-            (df['Количество\nДоговоров,\nшт.'] > 0) &
-            (df['Наименование\nИнструмента'].notna())
-        ]
+        async with self.async_session() as session:
+            try:
+                repository = SpimexTradingResultsRepository(session=session)
+                if settings.parser.save_mode == 'insert':
+                    await repository.bulk_upsert(COPY_COLUMNS, records, batch_size=settings.parser.insert_batch_size)
+                else:
+                    await repository.copy_upsert(COPY_COLUMNS, records)
+                await TradingDayRepository(session=session).refresh(trade_date)
+                await IngestionLedgerRepository(session=session).register(
+                    link, trade_date, content_hash, len(spimex_trading_results)
+                )
+                await session.commit()
+                self.stats.files_saved += 1
+                self.stats.rows_saved += len(spimex_trading_results)
+                self.ingested_dates.add(trade_date)
+                print('Данные успешно сохранены в базу данных')
+            except Exception as e:
+                await session.rollback()
+                self.stats.files_failed += 1
+                print(f"Ошибка при сохранении данных в базу данных: {e}")
 
-        if filtered_data.empty:
-            print("Нет данных для сохранения в базу данных.")
-            return None
+    async def get_ingested_files(self) -> dict[str, str]:
+        """
+        Загружает журнал уже обработанных бюллетеней.
+        :return: Словарь {ссылка на файл: хеш содержимого}.
+        """
+        async with self.async_session() as session:
+            return await IngestionLedgerRepository(session=session).get_ingested_files()
 
-        # Создание нового DataFrame с нужной структурой
-        spimex_trading_results = pd.DataFrame({
-            'exchange_product_id': filtered_data['Код\nИнструмента'],
-            'exchange_product_name': filtered_data['Наименование\nИнструмента'],
-            'oil_id': filtered_data['Код\nИнструмента'].str[:4],
-            'delivery_basis_id': filtered_data['Код\nИнструмента'].str[4:7],
-            'delivery_basis_name': filtered_data['Базис\nпоставки'],
-            'delivery_type_id': filtered_data['Код\nИнструмента'].str[-1],
-            'volume': pd.to_numeric(filtered_data['Объем\nДоговоров\nв единицах\nизмерения']),
-            'total': pd.to_numeric(filtered_data['Обьем\nДоговоров,\nруб.']),
-            'count': pd.to_numeric(filtered_data['Количество\nДоговоров,\nшт.']),
-            'date': trade_date,
-            'created_on': pd.to_datetime('now'),
-            'updated_on': pd.to_datetime('now')
-        })
-
-        print('Данные готовы для сохранения в базу данных')
-        return spimex_trading_results
+    async def register_empty(self, link: str, trade_date: datetime.date, content_hash: str) -> None:
+        """
+        Отмечает в журнале загрузок бюллетень без сделок, чтобы следующие запуски не скачивали его снова.
+        :param link: Ссылка на файл бюллетеня.
+        :param trade_date: Дата торговли.
+        :param content_hash: Хеш содержимого файла бюллетеня.
+        """
+        async with self.async_session() as session:
+            await IngestionLedgerRepository(session=session).register(link, trade_date, content_hash, 0)
+            await session.commit()
+        self.stats.files_empty += 1
 
-    async def save_data_to_db(self, spimex_trading_results: pd.DataFrame) -> None:
+    async def get_crawl_watermark(self) -> Optional[datetime.date]:
         """
-        Сохраняет данные из DataFrame в базу данных.
-        :param spimex_trading_results: DataFrame с данными торговли для сохранения.
+        Загружает отметку последнего завершённого обхода списка бюллетеней.
+        :return: Дата отметки или None, если ни один обход ещё не завершился.
         """
         async with self.async_session() as session:
-            async with session.begin():
-                try:
-                    for index, row in spimex_trading_results.iterrows():
-                        result = SpimexTradingResults(
-                            exchange_product_id=row['exchange_product_id'],
-                            exchange_product_name=row['exchange_product_name'],
-                            oil_id=row['oil_id'],
-                            delivery_basis_id=row['delivery_basis_id'],
-                            delivery_basis_name=row['delivery_basis_name'],
-                            delivery_type_id=row['delivery_type_id'],
-                            volume=row['volume'],
-                            total=row['total'],
-                            count=row['count'],
-                            date=row['date'],
-                            created_on=row['created_on'],
-                            updated_on=row['updated_on']
-                        )
-                        session.add(result)
-
-                    await session.commit()  # Коммитим все изменения после добавления всех объектов
-                    print('Данные успешно сохранены в базу данных')
-                except Exception as e:
-                    await session.rollback()  # Откат изменений в случае ошибки
-                    print(f"Ошибка при сохранении данных в базу данных: {e}")
-
-    async def get_trading_all_dates_and_files(self, queue: asyncio.Queue) -> None:
-        """
-        Извлекает все даты торгов и соответствующие ссылки на файлы с сайта,
-        добавляя их в асинхронную очередь.
+            return await IngestionWatermarkRepository(session=session).get_trade_date(CRAWL_WATERMARK)
 
+    async def get_ingested_at(self) -> Optional[datetime.datetime]:
+        """
+        Получает время последней загрузки из календаря торгов: по нему API проверяет,
+        что реплика уже видит загруженные данные.
+        :return: Время загрузки или None, если торгов ещё нет.
+        """
+        async with self.async_session() as session:
+            data_version = await TradingDayRepository(session=session).get_data_version()
+        return None if data_version is None else data_version[1]
+
+    async def save_crawl_watermark(self, trade_date: datetime.date) -> None:
+        async with self.async_session() as session:
+            await IngestionWatermarkRepository(session=session).advance(CRAWL_WATERMARK, trade_date)
+            await session.commit()
+
+    def parse_listing(self, html: str, page_number: int) -> tuple[list[tuple[datetime.date, str]], int]:
+        """
+        Извлекает из страницы списка ссылки на бюллетени и номер последней известной страницы.
+        Пагинация сайта содержит ссылки на последнюю страницу и на страницы рядом с текущей,
+        поэтому первая же страница сообщает их количество.
+        :param html: Содержимое страницы списка.
+        :param page_number: Номер страницы.
+        :return: Пары (дата торгов, ссылка на файл) в порядке на странице и номер последней страницы.
+        """
+        soup = BeautifulSoup(html, 'html.parser', parse_only=LISTING_STRAINER)
+        bulletins = []
+        for link_tag in soup.find_all('a', class_=BULLETIN_LINK_CLASS):
+            file_link = link_tag['href']
+            if not file_link.startswith('http'):
+                file_link = urljoin(self.base_url, file_link)
+            match = BULLETIN_DATE_RE.search(file_link)
+            if match:
+                trade_date = datetime.datetime.strptime(match.group(1), '%Y%m%d%H%M%S').date()
+                bulletins.append((trade_date, file_link))
+        last_page = max(
+            (int(match.group(1)) for link_tag in soup.find_all('a', href=LISTING_PAGE_RE)
+             if (match := LISTING_PAGE_RE.search(link_tag['href']))),
+            default=page_number,
+        )
+        return bulletins, max(last_page, page_number)
+
+    async def fetch_listing(
+        self, client: HttpClient, page_number: int
+    ) -> Optional[tuple[list[tuple[datetime.date, str]], int]]:
+        """
+        Загружает и разбирает страницу списка бюллетеней.
+        :param client: HTTP-клиент для выполнения запросов.
+        :param page_number: Номер страницы.
+        :return: Результат parse_listing или None, если страницу не удалось загрузить.
+        """
+        with self.stats.stage('crawl'):
+            response = await self.fetch(client, f"{self.base_url}?page=page-{page_number}")
+            if response is None:
+                return None
+            return self.parse_listing(response, page_number)
+
+    async def get_trading_all_dates_and_files(
+        self,
+        client: HttpClient,
+        queue: asyncio.Queue,
+        ingested_files: dict[str, str],
+        watermark: Optional[datetime.date] = None,
+    ) -> bool:
+        """
+        Извлекает даты торгов и соответствующие ссылки на файлы с сайта, добавляя их в асинхронную очередь.
+        Первая страница сообщает количество страниц, после чего следующие страницы загружаются
+        одновременно окном из settings.parser.listing_window страниц, а обрабатываются по порядку.
+        Бюллетени из журнала загрузок пропускаются. Обход прекращается при достижении торгов ранее
+        settings.parser.start_date или на первой странице, все бюллетени которой уже загружены и не новее отметки
+        завершённого обхода: страницы за ней уже пройдены целиком. Пока отметки нет (первая загрузка
+        прервалась), обход идёт до конца списка. Загрузка оставшихся страниц окна при остановке отменяется.
+
+        :param client: HTTP-клиент для выполнения запросов.
         :param queue: Асинхронная очередь для хранения ссылок на файлы.
+        :param ingested_files: Журнал уже загруженных бюллетеней {ссылка на файл: хеш содержимого}.
+        :param watermark: Отметка последнего завершённого обхода.
+        :return: True, если обход дошёл до конца списка или до уже пройденных страниц.
         """
         page_number = 1
+        last_page = 1
+        next_fetch = 1
+        start_date = settings.parser.start_date
+        # Номер страницы -> задача её загрузки
+        fetching: dict[int, asyncio.Task] = {}
 
-        async with aiohttp.ClientSession() as session:
+        try:
             while True:
-                response = await self.fetch(session, f"{self.base_url}?page=page-{page_number}")
-
-                if response:
-                    soup = BeautifulSoup(response, 'html.parser')
+                while next_fetch <= min(last_page, page_number + settings.parser.listing_window - 1):
+                    fetching[next_fetch] = asyncio.create_task(self.fetch_listing(client, next_fetch))
+                    next_fetch += 1
+                listing = await fetching.pop(page_number)
+                if listing is None:
+                    return False
+                bulletins, page_last = listing
+                if not bulletins:
+                    print(f"На странице {page_number} нет ссылок на файлы.")
+                    return True
 
-                    link_tags = soup.find_all('a', class_='accordeon-inner__item-title link xls')
-                    if not link_tags:
-                        print(f"На странице {page_number} нет ссылок на файлы.")
+                reached_known_files = True
+                reached_start_date = False
+                for trade_date, file_link in bulletins:
+                    if trade_date < start_date:
+                        reached_start_date = True
                         break
+                    if self.newest_listed_date is None or trade_date > self.newest_listed_date:
+                        self.newest_listed_date = trade_date
+                    if file_link in ingested_files:
+                        self.stats.files_skipped += 1
+                        continue
+                    reached_known_files = False
+                    await queue.put((trade_date, file_link))  # Добавляем в очередь
+
+                if reached_start_date:
+                    print(f"Достигнуты торги ранее {start_date}.")
+                    return True
+                if reached_known_files and watermark is not None and max(
+                    trade_date for trade_date, _ in bulletins
+                ) <= watermark:
+                    print(f"Все бюллетени на странице {page_number} уже загружены.")
+                    return True
 
-                    for link_tag in link_tags:
-                        file_link = link_tag['href']
-                        if not file_link.startswith('http'):
-                            file_link = urljoin(self.base_url, file_link)
-                        match = re.search(r'_(\d{14})\.xls', file_link)
-                        if match:
-                            date_str = match.group(1)
-                            trade_date = datetime.datetime.strptime(date_str, '%Y%m%d%H%M%S').date()
-                            if trade_date >= datetime.datetime(2023, 1, 1).date():
-                                await queue.put((trade_date, file_link))  # Добавляем в очередь
-                            else:
-                                break
-
-                    # Проверка на наличие следующей страницы
-                    next_page = soup.select_one('.bx-pag-next a')
-                    if next_page:
-                        next_page_url = next_page['href']
-                        match = re.search(r'page=page-(\d+)', next_page_url)
-                        if match:
-                            page_number = int(match.group(1))  # Переходим к следующей странице
-                            print(f"Переход на страницу {page_number}...")
-                        else:
-                            print("Не удалось извлечь номер следующей страницы.")
-                            break
+                # Проверка на наличие следующей страницы
+                last_page = max(last_page, page_last)
+                if page_number >= last_page:
+                    print("Следующая страница не найдена.")
+                    return True
+                page_number += 1
+        finally:
+            for task in fetching.values():
+                task.cancel()
+            await asyncio.gather(*fetching.values(), return_exceptions=True)
+
+    async def download_worker(self, client: HttpClient, queue: asyncio.Queue) -> None:
+        """
+        Скачивает файлы из очереди и сохраняет данные в БД, пока не получит сигнальную метку завершения.
+        Бюллетени из журнала загрузок в очередь не попадают: их отбрасывает обход списка.
+        :param client: HTTP-клиент для выполнения запросов.
+        :param queue: Асинхронная очередь для получения ссылок на файлы и дат торговли.
+        """
+        while True:
+            trade_date, link = await queue.get()  # Получаем ссылку из очереди
+            if link is None:  # Если получена сигнальная метка завершения
+                break
+            try:
+                # Файл скачивается по частям: в памяти не больше spool_memory_limit байт, остальное - на диске
+                with self.stats.stage('download'):
+                    spooled = await client.download(
+                        link,
+                        max_memory=settings.parser.spool_memory_limit,
+                        max_size=settings.parser.max_file_size,
+                        chunk_size=settings.parser.download_chunk_size,
+                        directory=settings.parser.spool_dir,
+                    )
+                with spooled as file_content:
+                    content_hash = file_content.hexdigest()
+                    self.stats.files_spooled += file_content.path is not None
+                    spimex_trading_results = await self.get_data_from_excel(file_content.source(), trade_date)
+                with self.stats.stage('db_write'):
+                    if spimex_trading_results is None:
+                        await self.register_empty(link, trade_date, content_hash)
                     else:
-                        print("Следующая страница не найдена.")
-                        break
-                else:
-                    break
+                        await self.save_data_to_db(spimex_trading_results, link, content_hash)  # Сохраняем данные в БД
+            except Exception as e:
+                self.stats.files_failed += 1
+                print(f"Ошибка при обработке файла {link}: {e}")
 
-    async def process_files(self, queue: asyncio.Queue) -> None:
+    async def process_files(self, client: HttpClient, queue: asyncio.Queue) -> None:
         """
-        Асинхронно обрабатывает скачивание файлов и сохранение данных в БД.
+        Асинхронно обрабатывает скачивание файлов и сохранение данных в БД пулом из
+        settings.parser.workers воркеров. Каждый воркер завершается по своей сигнальной метке.
+        :param client: HTTP-клиент для выполнения запросов.
         :param queue: Асинхронная очередь для получения ссылок на файлы и дат торговли.
         """
-        async with aiohttp.ClientSession() as session:
-            while True:
-                trade_date, link = await queue.get()  # Получаем ссылку из очереди
-                if link is None:  # Если получена сигнальная метка завершения
-                    break
-                try:
-                    async with session.get(link) as file_response:
-                        file_response.raise_for_status()  # Проверка на статус ответа
-                        file_content = await file_response.read()  # Читаем содержимое файла
-                        spimex_trading_results = await self.get_data_from_excel(file_content, trade_date)
-                        if spimex_trading_results is not None:
-                            await self.save_data_to_db(spimex_trading_results)  # Сохраняем данные в БД
-                except Exception as e:
-                    print(f"Ошибка при обработке файла {link}: {e}")
-
-
-async def main():
+        await asyncio.gather(*(self.download_worker(client, queue) for _ in range(settings.parser.workers)))
+
+
+def publish_ingested_dates(
+    trade_dates: set[datetime.date], ingested_at: Optional[datetime.datetime] = None
+) -> None:
+    """
+    Публикует событие о загруженных датах торгов: задача Celery сбросит затронутые ключи кэша
+    и прогреет популярные маршруты.
+    :param trade_dates: Даты торгов, данные за которые были записаны в БД.
+    :param ingested_at: Время загрузки из календаря торгов.
+    """
+    if not trade_dates:
+        return
+    try:
+        invalidate_trading_dates.apply_async(
+            args=[
+                sorted(trade_date.isoformat() for trade_date in trade_dates),
+                ingested_at.isoformat() if ingested_at is not None else None,
+            ],
+            retry=False,
+        )
+    except Exception as e:
+        print(f"Не удалось отправить событие о загрузке торгов: {e}")
+
+
+async def main() -> ParserStats:
     """
     Основная функция, которая запускает асинхронные задачи для извлечения ссылок на файлы
-    и загрузки данных в базу данных.
+    и загрузки данных в базу данных. Уже загруженные бюллетени берутся из журнала загрузок,
+    поэтому повторный запуск скачивает только новые файлы.
+    :return: Статистика запуска.
     """
     parser = Parser()
-    queue = asyncio.Queue()
+    queue = asyncio.Queue(maxsize=settings.parser.workers * 2)
+    ingested_files = await parser.get_ingested_files()
+    watermark = await parser.get_crawl_watermark()
+    crawl_complete = False
+
+    async with create_http_session(
+        settings.parser.connection_limit, settings.parser.keepalive_timeout, settings.parser.request_timeout
+    ) as session:
+        client = parser.create_http_client(session)
 
-    # Запускаем задачи для загрузки файлов
-    processing_task = asyncio.create_task(parser.process_files(queue))
+        # Запускаем задачи для загрузки файлов
+        processing_task = asyncio.create_task(parser.process_files(client, queue))
 
-    # Запускаем задачу для извлечения ссылок на файлы
-    await parser.get_trading_all_dates_and_files(queue)
+        try:
+            # Запускаем задачу для извлечения ссылок на файлы
+            crawl_complete = await parser.get_trading_all_dates_and_files(client, queue, ingested_files, watermark)
+        finally:
+            # Завершаем задачу обработки: по одной сигнальной метке на каждый воркер
+            for _ in range(settings.parser.workers):
+                await queue.put((None, None))
+            await processing_task  # Ждем завершения обработки
 
-    # Завершаем задачу обработки
-    await queue.put((None, None))  # Отправляем сигнальную метку завершения
-    await processing_task  # Ждем завершения обработки
+    # Отметка сдвигается, только если весь список пройден и каждый найденный бюллетень попал в журнал:
+    # иначе следующий запуск остановился бы на уже загруженных страницах, не дойдя до пропущенных.
+    # Запуск без новых бюллетеней отметку не переписывает и ничего не пишет в БД
+    if not crawl_complete or parser.stats.files_failed:
+        print("Обход не завершён или есть ошибки: следующий запуск пройдёт список до конца.")
+    elif parser.newest_listed_date is not None and (watermark is None or parser.newest_listed_date > watermark):
+        await parser.save_crawl_watermark(parser.newest_listed_date)
+    ingested_at = await parser.get_ingested_at() if parser.ingested_dates else None
+    parser.parse_executor.shutdown()
+    await parser.db_helper.dispose()
+    # Статистика выводится одной строкой JSON, чтобы её разбирали сборщики логов
+    print(json.dumps({'event': 'parser_stats', **parser.stats.as_dict()}))
+    if settings.parser.metrics_textfile:
+        parser.stats.write_textfile(settings.parser.metrics_textfile)
+    publish_ingested_dates(parser.ingested_dates, ingested_at)
+    return parser.stats
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import tempfile
+from typing import Optional, Union
+
+
+class DownloadTooLarge(ValueError):
+    """
+    Файл превысил допустимый размер загрузки.
+    """
+
+
+class SpooledDownload:
+    """
+    Буфер скачиваемого файла: первые max_memory байт держатся в памяти, остаток переносится
+    во временный файл на диске. Хеш содержимого считается по мере записи, поэтому файл
+    не перечитывается ради него целиком.
+    """
+
+    def __init__(self, max_memory: int, max_size: int, directory: Optional[str] = None) -> None:
+        self.max_memory = max_memory
+        self.max_size = max_size
+        self.directory = directory
+        self.size = 0
+        self.path: Optional[str] = None
+        self._chunks: list[bytes] = []
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    def __enter__(self) -> 'SpooledDownload':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Дописывает фрагмент ответа.
+        :raises DownloadTooLarge: если размер файла превысил max_size.
+        """
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise DownloadTooLarge(f"Файл больше {self.max_size} байт")
+        self._hash.update(chunk)
+        if self._file is None and self.size > self.max_memory:
+            self._file = tempfile.NamedTemporaryFile(dir=self.directory, suffix='.xls', delete=False)
+            self.path = self._file.name
+            self._file.writelines(self._chunks)
+            self._chunks.clear()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def source(self) -> Union[bytes, str]:
+        """
+        Возвращает содержимое для разбора: байты, если файл поместился в память,
+        иначе путь к временному файлу, который процесс разбора откроет сам.
+        """
+        if self._file is None:
+            content = b''.join(self._chunks)
+            self._chunks = [content]
+            return content
+        self._file.flush()
+        return self.path
+
+    def close(self) -> None:
+        self._chunks.clear()
+        if self._file is not None:
+            self._file.close()
+            os.unlink(self.path)
+            self._file = None
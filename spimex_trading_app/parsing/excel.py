@@ -0,0 +1,118 @@
+import datetime
+import resource
+from typing import Optional, Union
+
+import pandas as pd
+import xlrd
+
+HEADER_MARKER = 'Единица измерения: Метрическая тонна'
+
+CODE_COLUMN = 'Код\nИнструмента'
+NAME_COLUMN = 'Наименование\nИнструмента'
+BASIS_COLUMN = 'Базис\nпоставки'
+VOLUME_COLUMN = 'Объем\nДоговоров\nв единицах\nизмерения'
+TOTAL_COLUMN = 'Обьем\nДоговоров,\nруб.'
+COUNT_COLUMN = 'Количество\nДоговоров,\nшт.'
+
+
+def parse_bulletin(source: Union[bytes, str], trade_date: datetime.date) -> Optional[pd.DataFrame]:
+    """
+    Разбирает Excel-файл бюллетеня и возвращает DataFrame только с сохраняемыми столбцами.
+    Книга читается через xlrd без промежуточного DataFrame всего листа: строка заголовка ищется
+    построчно, затем читаются только шесть нужных столбцов, и строки без сделок отбрасываются
+    до чтения остальных столбцов.
+    Функция выполняется в отдельном процессе, поэтому должна оставаться на уровне модуля.
+    :param source: Содержимое Excel-файла в байтовом формате или путь к временному файлу с ним.
+    :param trade_date: Дата торговли.
+    :return: DataFrame с данными торговли или None, если данные отсутствуют.
+    """
+    try:
+        if isinstance(source, str):
+            # Файл с диска отображается в память (mmap), а не читается в буфер процесса
+            book = xlrd.open_workbook(source, on_demand=True)
+        else:
+            book = xlrd.open_workbook(file_contents=source, on_demand=True)
+    except Exception as e:
+        print(f"Ошибка при чтении Excel-файла: {e}")
+        return None
+    try:
+        return _read_trading_results(book.sheet_by_index(0), trade_date)
+    finally:
+        book.release_resources()
+
+
+def parse_bulletin_in_worker(
+    source: Union[bytes, str], trade_date: datetime.date
+) -> tuple[Optional[pd.DataFrame], int]:
+    """
+    Разбирает бюллетень в процессе пула и сообщает пиковый RSS этого процесса
+    за всё время его работы, включая разбор предыдущих файлов.
+    :return: Пара (результат parse_bulletin, пиковый RSS процесса разбора в КиБ).
+    """
+    return parse_bulletin(source, trade_date), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _read_trading_results(sheet, trade_date: datetime.date) -> Optional[pd.DataFrame]:
+    # Поиск строки, где начинается нужная информация; заголовок таблицы идёт сразу за ней
+    header_row = next((
+        row + 1 for row in range(sheet.nrows)
+        if any(isinstance(value, str) and HEADER_MARKER in value for value in sheet.row_values(row))
+    ), None)
+    if header_row is None or header_row >= sheet.nrows:
+        print(f"Не удалось найти строку с '{HEADER_MARKER}'")
+        return None
+
+    headers = sheet.row_values(header_row)
+    try:
+        columns = {name: headers.index(name) for name in (
+            CODE_COLUMN, NAME_COLUMN, BASIS_COLUMN, VOLUME_COLUMN, TOTAL_COLUMN, COUNT_COLUMN
+        )}
+    except ValueError as e:
+        print(f"В заголовке таблицы нет нужного столбца: {e}")
+        return None
+
+    def column(name: str) -> list:
+        return sheet.col_values(columns[name], header_row + 1)
+
+    # Преобразование типов и отбор строк со сделками
+    counts = [_to_number(value) for value in column(COUNT_COLUMN)]
+    selected = [
+        row for row, (count, name) in enumerate(zip(counts, column(NAME_COLUMN)))
+        if count is not None and count > 0 and name != ''
+    ]
+    if not selected:
+        print("Нет данных для сохранения в базу данных.")
+        return None
+
+    def selected_values(name: str) -> list:
+        values = column(name)
+        return [values[row] for row in selected]
+
+    # Создание нового DataFrame с нужной структурой
+    codes = pd.Series([str(code) for code in selected_values(CODE_COLUMN)])
+    spimex_trading_results = pd.DataFrame({
+        'exchange_product_id': codes,
+        'exchange_product_name': selected_values(NAME_COLUMN),
+        'oil_id': codes.str[:4],
+        'delivery_basis_id': codes.str[4:7],
+        'delivery_basis_name': selected_values(BASIS_COLUMN),
+        'delivery_type_id': codes.str[-1],
+        # Пустые ячейки, прочерки и пробелы в объёме и сумме становятся NaN, а не прерывают разбор бюллетеня
+        'volume': pd.to_numeric(pd.Series(selected_values(VOLUME_COLUMN)), errors='coerce').astype(float),
+        'total': pd.to_numeric(pd.Series(selected_values(TOTAL_COLUMN)), errors='coerce').astype(float),
+        'count': [counts[row] for row in selected],
+        'date': trade_date,
+    })
+
+    print('Данные готовы для сохранения в базу данных')
+    return spimex_trading_results
+
+
+def _to_number(value) -> Optional[float]:
+    # Пустые ячейки и прочерки в столбце количества договоров означают отсутствие сделок
+    if isinstance(value, float):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,154 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from parsing.download import DownloadTooLarge, SpooledDownload
+from parsing.stats import ParserStats
+
+
+class HostRateLimiter:
+    """
+    Ограничивает частоту запросов к каждому хосту: не чаще requests_per_second запросов в секунду.
+    """
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval = 1 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: dict[str, float] = {}
+        self._locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def wait(self, url: str) -> None:
+        """
+        Ожидает, пока для хоста из url освободится слот на запрос.
+        :param url: URL, по которому будет выполнен запрос.
+        """
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        async with self._locks[host]:
+            loop = asyncio.get_running_loop()
+            delay = self._next_slot.get(host, 0.0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot[host] = loop.time() + self.interval
+
+
+class HttpClient:
+    """
+    Обёртка над общей aiohttp.ClientSession с ограничением частоты запросов к хосту
+    и повторами с экспоненциальной задержкой при ответах 5xx, таймаутах и обрывах соединения.
+    Страницы (get) ограничиваются page_rate_limiter, если он задан, файлы (download) - rate_limiter.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        rate_limiter: HostRateLimiter,
+        stats: ParserStats,
+        retries: int = 3,
+        retry_backoff: float = 0.5,
+        page_rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> None:
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.page_rate_limiter = page_rate_limiter or rate_limiter
+        self.stats = stats
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status >= 500
+        return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+    async def get(self, url: str) -> bytes:
+        """
+        Загружает содержимое по указанному URL.
+        :param url: URL, который нужно загрузить.
+        :return: Тело ответа.
+        :raises aiohttp.ClientError, asyncio.TimeoutError: если все попытки завершились ошибкой.
+        """
+
+        async def read(response: aiohttp.ClientResponse) -> bytes:
+            content = await response.read()
+            self.stats.bytes_downloaded += len(content)
+            return content
+
+        return await self._request(url, read, self.page_rate_limiter)
+
+    async def download(
+        self,
+        url: str,
+        max_memory: int,
+        max_size: int,
+        chunk_size: int = 64 * 1024,
+        directory: Optional[str] = None,
+    ) -> SpooledDownload:
+        """
+        Скачивает файл по частям в SpooledDownload: тело ответа не собирается в памяти целиком,
+        а файлы больше max_memory байт переносятся во временный файл.
+        Вызывающий код закрывает возвращённый буфер.
+        :param url: URL файла.
+        :param max_memory: Сколько байт файла держать в памяти.
+        :param max_size: Максимальный размер файла, байты.
+        :param chunk_size: Размер читаемого фрагмента ответа, байты.
+        :param directory: Папка временных файлов; по умолчанию системная.
+        :raises DownloadTooLarge: если файл больше max_size.
+        :raises aiohttp.ClientError, asyncio.TimeoutError: если все попытки завершились ошибкой.
+        """
+
+        async def spool(response: aiohttp.ClientResponse) -> SpooledDownload:
+            if response.content_length is not None and response.content_length > max_size:
+                raise DownloadTooLarge(f"Файл {url} больше {max_size} байт")
+            # Каждая попытка пишет в новый буфер, поэтому оборванная загрузка не оставляет хвостов
+            spooled = SpooledDownload(max_memory, max_size, directory)
+            try:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    spooled.write(chunk)
+            except BaseException:
+                spooled.close()
+                raise
+            self.stats.bytes_downloaded += spooled.size
+            return spooled
+
+        return await self._request(url, spool, self.rate_limiter)
+
+    async def _request(
+        self,
+        url: str,
+        handle: Callable[[aiohttp.ClientResponse], Awaitable[Any]],
+        rate_limiter: HostRateLimiter,
+    ) -> Any:
+        attempt = 0
+        while True:
+            await rate_limiter.wait(url)
+            self.stats.requests += 1
+            try:
+                async with self.session.get(url) as response:
+                    response.raise_for_status()  # Вызывает исключение для статусов 4xx/5xx
+                    return await handle(response)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries or not self._is_retryable(e):
+                    self.stats.failed_requests += 1
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                attempt += 1
+                self.stats.retries += 1
+                print(f"Повтор {attempt}/{self.retries} запроса {url} через {delay:.1f} с: {e}")
+                await asyncio.sleep(delay)
+
+
+def create_http_session(
+    connection_limit: int, keepalive_timeout: float, request_timeout: float
+) -> aiohttp.ClientSession:
+    """
+    Создаёт сессию aiohttp с ограниченным пулом соединений и keep-alive.
+    :param connection_limit: Максимальное число одновременных соединений.
+    :param keepalive_timeout: Время удержания простаивающего соединения, секунды.
+    :param request_timeout: Общий таймаут запроса, секунды.
+    """
+    connector = aiohttp.TCPConnector(limit=connection_limit, keepalive_timeout=keepalive_timeout)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=request_timeout))
@@ -0,0 +1,91 @@
+import resource
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from prometheus_client import CollectorRegistry, Gauge, write_to_textfile
+
+# Этапы загрузки, время которых замеряется отдельно
+STAGES = ('crawl', 'download', 'parse', 'db_write')
+
+
+@dataclass
+class ParserStats:
+    """
+    Счётчики пропускной способности и повторов запросов парсера.
+    Время этапов суммируется по всем воркерам, поэтому при нескольких воркерах
+    сумма этапов может превышать общее время работы.
+    """
+
+    requests: int = 0
+    retries: int = 0
+    failed_requests: int = 0
+    bytes_downloaded: int = 0
+    files_saved: int = 0
+    files_skipped: int = 0
+    # Бюллетени без сделок: записываются в журнал загрузок без строк
+    files_empty: int = 0
+    files_failed: int = 0
+    rows_saved: int = 0
+    files_spooled: int = 0
+    # Наибольший пиковый RSS процессов пула разбора Excel за всё время их работы, КиБ.
+    # ru_maxrss не сбрасывается между файлами, поэтому это не расход памяти на разбор отдельного файла
+    parse_process_peak_rss_kb: int = 0
+    stage_seconds: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Добавляет время выполнения блока к времени этапа.
+        :param name: Этап из STAGES.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] += time.perf_counter() - started
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def as_dict(self) -> dict[str, float]:
+        """
+        Возвращает счётчики вместе с производными показателями пропускной способности.
+        """
+        elapsed = self.elapsed
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failed_requests': self.failed_requests,
+            'bytes_downloaded': self.bytes_downloaded,
+            'files_saved': self.files_saved,
+            'files_skipped': self.files_skipped,
+            'files_empty': self.files_empty,
+            'files_failed': self.files_failed,
+            'rows_saved': self.rows_saved,
+            'files_spooled': self.files_spooled,
+            # ru_maxrss в Linux - в КиБ; пик основного процесса включает буферы скачиваемых файлов
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'parse_process_peak_rss_kb': self.parse_process_peak_rss_kb,
+            'elapsed_seconds': round(elapsed, 3),
+            'files_per_second': round(self.files_saved / elapsed, 3) if elapsed else 0.0,
+            'rows_per_second': round(self.rows_saved / elapsed, 1) if elapsed else 0.0,
+            **{f'{name}_seconds': round(seconds, 3) for name, seconds in self.stage_seconds.items()},
+        }
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Записывает статистику в текстовом формате Prometheus для textfile collector node_exporter:
+        каждый показатель as_dict становится метрикой spimex_parser_<имя>.
+        Файл заменяется атомарно, поэтому коллектор не прочитает его наполовину записанным.
+        :param path: Путь к файлу .prom.
+        """
+        registry = CollectorRegistry()
+        for name, value in self.as_dict().items():
+            Gauge(f'spimex_parser_{name}', f'Статистика последнего запуска парсера: {name}', registry=registry).set(value)
+        Gauge('spimex_parser_last_run_timestamp_seconds', 'Время завершения запуска парсера',
+              registry=registry).set_to_current_time()
+        write_to_textfile(path, registry)
@@ -0,0 +1,61 @@
+from typing import Sequence
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from core.models import DeliveryBasis, Instrument
+from repository.trading_result_repository import SqlAlchemyRepository
+
+
+class DimensionRepository(SqlAlchemyRepository):
+    """
+    Справочник, ключом которого служит биржевой код.
+    """
+
+    key: str
+    attributes: Sequence[str]
+
+    async def upsert(self, records: list[dict]) -> None:
+        """
+        Добавляет новые записи справочника и обновляет существующие значениями из более свежих бюллетеней.
+        Бюллетени загружаются параллельно и не по порядку, поэтому запись из более старого бюллетеня
+        не перезаписывает значения, взятые из более нового.
+        Записи сортируются по коду, чтобы параллельные загрузки блокировали строки в одном порядке.
+
+        :param records: Записи справочника, словари {столбец: значение} с датой бюллетеня trade_date.
+        """
+        if not records:
+            return
+        stmt = pg_insert(self.model).values(sorted(records, key=lambda record: record[self.key]))
+        columns = [getattr(self.model, name) for name in self.attributes]
+        trade_date = self.model.trade_date
+        await self.session.execute(stmt.on_conflict_do_update(
+            index_elements=[self.key],
+            set_={
+                **{name: stmt.excluded[name] for name in self.attributes},
+                'trade_date': stmt.excluded.trade_date,
+                'updated_on': func.now(),
+            },
+            # Неизменившиеся записи того же бюллетеня не переписываются и не оставляют мёртвых версий строк
+            where=or_(
+                stmt.excluded.trade_date > trade_date,
+                and_(
+                    stmt.excluded.trade_date == trade_date,
+                    or_(*(column.is_distinct_from(stmt.excluded[column.key]) for column in columns)),
+                ),
+            ),
+        ))
+
+
+class DeliveryBasisRepository(DimensionRepository):
+
+    model = DeliveryBasis
+    key = 'delivery_basis_id'
+    attributes = ('delivery_basis_name',)
+
+
+class InstrumentRepository(DimensionRepository):
+
+    model = Instrument
+    key = 'exchange_product_id'
+    attributes = ('exchange_product_name', 'oil_id', 'delivery_basis_id', 'delivery_type_id')
@@ -0,0 +1,75 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from core.models import IngestionLedger, IngestionWatermark
+from repository.trading_result_repository import SqlAlchemyRepository
+
+
+class IngestionLedgerRepository(SqlAlchemyRepository):
+
+    model = IngestionLedger
+
+    async def get_ingested_files(self) -> dict[str, str]:
+        """
+        Получает уже загруженные бюллетени.
+
+        :return: Словарь {ссылка на файл: хеш содержимого}.
+        """
+        result = await self.session.execute(select(self.model.url, self.model.content_hash))
+        return dict(result.tuples().all())
+
+    async def register(self, url: str, trade_date: date, content_hash: str, row_count: int) -> None:
+        """
+        Записывает загруженный бюллетень в журнал или обновляет существующую запись.
+
+        :param url: Ссылка на файл бюллетеня.
+        :param trade_date: Дата торговли.
+        :param content_hash: Хеш содержимого файла.
+        :param row_count: Количество сохранённых строк.
+        """
+        stmt = pg_insert(self.model).values(
+            url=url, trade_date=trade_date, content_hash=content_hash, row_count=row_count
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.url],
+            set_={
+                'trade_date': stmt.excluded.trade_date,
+                'content_hash': stmt.excluded.content_hash,
+                'row_count': stmt.excluded.row_count,
+                'ingested_at': func.now(),
+            },
+        )
+        await self.session.execute(stmt)
+
+
+class IngestionWatermarkRepository(SqlAlchemyRepository):
+
+    model = IngestionWatermark
+
+    async def get_trade_date(self, name: str) -> Optional[date]:
+        """
+        Получает дату отметки.
+
+        :param name: Название отметки.
+        :return: Дата отметки или None, если отметка ещё не записана.
+        """
+        return await self.session.scalar(select(self.model.trade_date).where(self.model.name == name))
+
+    async def advance(self, name: str, trade_date: date) -> None:
+        """
+        Записывает отметку; отметка только сдвигается вперёд и не откатывается более ранней датой.
+        Если дата не новее записанной, строка не обновляется.
+
+        :param name: Название отметки.
+        :param trade_date: Новая дата отметки.
+        """
+        stmt = pg_insert(self.model).values(name=name, trade_date=trade_date)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.name],
+            set_={'trade_date': stmt.excluded.trade_date, 'updated_at': func.now()},
+            where=self.model.trade_date < stmt.excluded.trade_date,
+        )
+        await self.session.execute(stmt)
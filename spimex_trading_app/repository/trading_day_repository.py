@@ -0,0 +1,47 @@
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from core.models import SpimexTradingResults, TradingDay
+from repository.trading_result_repository import SqlAlchemyRepository
+
+
+class TradingDayRepository(SqlAlchemyRepository):
+
+    model = TradingDay
+
+    async def refresh(self, trade_date: date) -> None:
+        """
+        Пересчитывает итоги торгового дня по таблице результатов торгов.
+
+        :param trade_date: Дата торгов, итоги которой нужно обновить.
+        """
+        totals = select(
+            SpimexTradingResults.date,
+            func.count(),
+            func.sum(SpimexTradingResults.volume),
+            func.sum(SpimexTradingResults.total),
+        ).where(SpimexTradingResults.date == trade_date).group_by(SpimexTradingResults.date)
+        stmt = pg_insert(self.model).from_select(['date', 'row_count', 'total_volume', 'total_value'], totals)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.date],
+            set_={
+                'row_count': stmt.excluded.row_count,
+                'total_volume': stmt.excluded.total_volume,
+                'total_value': stmt.excluded.total_value,
+                'ingested_at': func.now(),
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def get_data_version(self) -> Optional[tuple[date, datetime]]:
+        """
+        Получает последнюю дату торгов и время последней загрузки.
+
+        :return: Пара (дата торгов, время загрузки) или None, если торгов ещё нет.
+        """
+        result = await self.session.execute(select(func.max(self.model.date), func.max(self.model.ingested_at)))
+        trade_date, ingested_at = result.one()
+        return None if trade_date is None else (trade_date, ingested_at)
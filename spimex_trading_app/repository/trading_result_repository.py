@@ -1,12 +1,19 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Sequence
+from dataclasses import fields
+from datetime import date
+from typing import AsyncIterator, Iterable, Optional, Sequence
 
-from sqlalchemy import insert, select
+from sqlalchemy import (
+    Date, Float, cast, column, func, insert, literal_column, select, table, text, tuple_,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from core.models import SpimexTradingResults
+from core.models import DeliveryBasis, Instrument, SpimexTradingResults, TradingDay
+from core.schemas.spimex_trading_results import AggregationDimension, SpimexTradingResultRow
 from filters.trading_filters import SpimexTradingResultsFilter
 
+MAX_QUERY_PARAMETERS = 32767
+
 
 class AbstractRepository(ABC):
 
@@ -38,42 +45,208 @@ class SpimexTradingResultsRepository(SqlAlchemyRepository):
 
     model = SpimexTradingResults
 
-    async def get_last_trading_dates(self, days: int) -> list[datetime.date]:
+    natural_key = ('exchange_product_id', 'date')
+
+    def _upsert_statement(self, columns: Sequence[str], values=None, select_from=None):
+        """
+        Строит INSERT ... ON CONFLICT по естественному ключу (exchange_product_id, date).
+
+        :param columns: Названия загружаемых столбцов.
+        :param values: Список словарей со значениями строк для многострочного INSERT ... VALUES.
+        :param select_from: Таблица, из которой строки выбираются для INSERT ... SELECT.
+        :return: Оператор вставки с обновлением существующих строк.
+        """
+        stmt = pg_insert(self.model)
+        stmt = stmt.values(values) if values is not None else stmt.from_select(list(columns), select(select_from))
+        update_columns = {name: stmt.excluded[name] for name in columns if name not in self.natural_key}
+        return stmt.on_conflict_do_update(
+            index_elements=list(self.natural_key),
+            set_={**update_columns, 'updated_on': func.now()},
+        )
+
+    async def bulk_upsert(self, columns: Sequence[str], records: Iterable[tuple], batch_size: int = 1000) -> None:
+        """
+        Сохраняет записи многострочными INSERT ... VALUES ... ON CONFLICT пачками по batch_size строк.
+
+        :param columns: Названия столбцов в порядке следования значений в записях.
+        :param records: Записи для загрузки, каждая запись - кортеж значений столбцов.
+        :param batch_size: Количество строк в одном операторе INSERT.
+        """
+        # Протокол Postgres ограничивает число параметров одного запроса 32767
+        batch_size = min(batch_size, MAX_QUERY_PARAMETERS // len(columns))
+        batch = []
+        for record in records:
+            batch.append(dict(zip(columns, record)))
+            if len(batch) == batch_size:
+                await self.session.execute(self._upsert_statement(columns, values=batch))
+                batch = []
+        if batch:
+            await self.session.execute(self._upsert_statement(columns, values=batch))
+
+    async def copy_upsert(self, columns: Sequence[str], records: Iterable[tuple]) -> None:
+        """
+        Загружает записи бинарным COPY во временную таблицу и переносит их в основную
+        одним INSERT ... SELECT ... ON CONFLICT.
+
+        :param columns: Названия столбцов в порядке следования значений в записях.
+        :param records: Записи для загрузки, каждая запись - кортеж значений столбцов.
+        """
+        staging_name = f'{self.model.__tablename__}_staging'
+        # Временная таблица создаётся через сессию, чтобы COPY выполнялся уже внутри её транзакции
+        await self.session.execute(text(
+            f'CREATE TEMP TABLE {staging_name} ON COMMIT DROP AS '
+            f'SELECT {", ".join(columns)} FROM {self.model.__tablename__} WITH NO DATA'
+        ))
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            staging_name, records=records, columns=list(columns)
+        )
+        staging = table(staging_name, *(column(name) for name in columns))
+        await self.session.execute(self._upsert_statement(columns, select_from=staging))
+
+    async def ensure_partitions(self, trade_dates: Iterable[date]) -> None:
+        """
+        Создаёт недостающие месячные секции таблицы для указанных дат.
+        Создание секции блокирует таблицу, поэтому вызывается в отдельной короткой транзакции
+        до записи бюллетеня, а не внутри неё. Строки месяца без секции не теряются: они попадают
+        в секцию DEFAULT и переносятся в месячную секцию при её создании.
+
+        :param trade_dates: Даты торгов, которые будут загружены.
+        """
+        months = sorted({trade_date.replace(day=1) for trade_date in trade_dates})
+        for month in months:
+            await self.session.execute(select(func.ensure_spimex_trading_results_partition(month)))
+
+    async def get_last_trading_dates(self, days: int) -> list[date]:
         """
-        Получает список дат последних торговых дней
+        Получает список дат последних торговых дней из календаря торгов trading_days,
+        не обращаясь к таблице результатов торгов.
 
         :param days: количество дней, за которые нужно полученить даты торгов
         :return: list[datetime.date] список дат последних торговых дней
         """
-        stmt = select(self.model.date).distinct().order_by(self.model.date.desc()).limit(days)
+        stmt = select(TradingDay.date).order_by(TradingDay.date.desc()).limit(days)
         result = await self.session.scalars(stmt)
         return result.all()
 
-    async def get_dynamics(self, start_date, end_date, str_filter: SpimexTradingResultsFilter) -> Sequence[type(model)]:
+    def _rows_query(self):
+        """
+        Строит выборку строк ответа: наименования инструмента и базиса поставки берутся
+        из справочников соединением по первичному ключу. Внешние ключи таблицы торгов на оба справочника
+        гарантируют, что внутреннее соединение не теряет строк.
+        """
+        dimension_columns = {
+            'exchange_product_name': Instrument.exchange_product_name,
+            'delivery_basis_name': DeliveryBasis.delivery_basis_name,
+        }
+        columns = [
+            dimension_columns[field.name] if field.name in dimension_columns else getattr(self.model, field.name)
+            for field in fields(SpimexTradingResultRow)
+        ]
+        return (
+            select(*columns)
+            .join(Instrument, Instrument.exchange_product_id == self.model.exchange_product_id)
+            .join(DeliveryBasis, DeliveryBasis.delivery_basis_id == self.model.delivery_basis_id)
+        )
+
+    def _dynamics_query(self, start_date, end_date, str_filter: SpimexTradingResultsFilter):
+        query = self._rows_query().where(self.model.date.between(start_date, end_date))
+        return str_filter.filter(query).order_by(self.model.date, self.model.id)
+
+    async def get_dynamics(
+        self,
+        start_date,
+        end_date,
+        str_filter: SpimexTradingResultsFilter,
+        limit: Optional[int] = None,
+        after: Optional[tuple[date, int]] = None,
+    ) -> list[SpimexTradingResultRow]:
         """
         Получает список торгов за заданный период.
 
         :param start_date: Дата в формате 'YYYY-MM-DD', начиная с которой нужно получить список торгов.
         :param end_date: Дата в формате 'YYYY-MM-DD', заканчивая которой нужно получить список торгов.
         :param str_filter: Объект фильтра типа SpimexTradingResultsFilter, содержащий параметры фильтрации данных.
+        :param limit: Максимальное количество торгов в ответе.
+        :param after: Ключ (date, id) последней полученной записи: возвращаются только записи после неё.
+
+        :return: Список торгов за указанный период, отсортированный по дате и id.
+                 Возвращает строки, соответствующие заданным критериям.
+        """
+        query = self._dynamics_query(start_date, end_date, str_filter)
+        if after is not None:
+            query = query.where(tuple_(self.model.date, self.model.id) > tuple_(*after))
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.session.execute(query)
+        return [SpimexTradingResultRow(*row) for row in result]
+
+    async def stream_dynamics(
+        self, start_date, end_date, str_filter: SpimexTradingResultsFilter, batch_size: int = 1000
+    ) -> AsyncIterator[list[SpimexTradingResultRow]]:
+        """
+        Построчно читает торги за заданный период серверным курсором, пачками по batch_size строк.
 
-        :return: Список торгов за указанный период, отсортированный по дате.
-                 Возвращает последовательность объектов модели, соответствующих заданным критериям.
+        :param start_date: Дата, начиная с которой нужно получить список торгов.
+        :param end_date: Дата, заканчивая которой нужно получить список торгов.
+        :param str_filter: Объект фильтра типа SpimexTradingResultsFilter, содержащий параметры фильтрации данных.
+        :param batch_size: Количество строк, читаемых из курсора за раз.
+        :return: Асинхронный итератор пачек строк.
         """
-        # start_date = datetime.strptime(start_date, '%Y-%m-%d')
-        # end_date = datetime.strptime(end_date, '%Y-%m-%d')
-        query = str_filter.filter(select(self.model).where(self.model.date.between(start_date, end_date)))
-        result = await self.session.execute(query.order_by(self.model.date))
-        return result.scalars().all()
+        query = self._dynamics_query(start_date, end_date, str_filter)
+        result = await self.session.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield [SpimexTradingResultRow(*row) for row in partition]
+
+    def _aggregation_dimension(self, dimension: AggregationDimension):
+        if dimension in (AggregationDimension.week, AggregationDimension.month):
+            # Единица усечения подставляется литералом, чтобы выражения в SELECT и GROUP BY совпадали
+            unit = literal_column(f"'{dimension.value}'")
+            return cast(func.date_trunc(unit, self.model.date), Date).label(dimension.value)
+        return getattr(self.model, dimension.value).label(dimension.value)
+
+    async def get_aggregated_dynamics(
+        self,
+        start_date,
+        end_date,
+        str_filter: SpimexTradingResultsFilter,
+        group_by: Sequence[AggregationDimension],
+    ) -> list[dict]:
+        """
+        Получает суммарные объёмы торгов за заданный период, сгруппированные на стороне БД.
 
-    async def get_trading_results(self, str_filter: SpimexTradingResultsFilter) -> Sequence[type(model)]:
+        :param start_date: Дата, начиная с которой нужно получить торги.
+        :param end_date: Дата, заканчивая которой нужно получить торги.
+        :param str_filter: Объект фильтра типа SpimexTradingResultsFilter, содержащий параметры фильтрации данных.
+        :param group_by: Измерения группировки; неделя и месяц обозначаются датой своего начала.
+        :return: Строки с полями измерений и мерами volume, total, count и vwap (total / volume),
+                 отсортированные по измерениям.
+        """
+        dimensions = [self._aggregation_dimension(dimension) for dimension in dict.fromkeys(group_by)]
+        volume = func.sum(self.model.volume)
+        total = func.sum(self.model.total)
+        query = select(
+            *dimensions,
+            volume.label('volume'),
+            total.label('total'),
+            func.sum(self.model.count).label('count'),
+            (total / func.nullif(volume, 0, type_=Float)).label('vwap'),
+        ).where(self.model.date.between(start_date, end_date))
+        query = str_filter.filter(query).group_by(*dimensions).order_by(*dimensions)
+        result = await self.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def get_trading_results(self, str_filter: SpimexTradingResultsFilter) -> list[SpimexTradingResultRow]:
         """
-        Получает список последних торгов.
+        Получает результаты всех инструментов за последний торговый день.
 
         :param str_filter: Объект фильтра типа SpimexTradingResultsFilter, содержащий параметры фильтрации данных.
-        :return: Список последних торгов, отсортированный по дате.
-             Возвращает последовательность объектов модели, соответствующих заданным критериям.
+        :return: Список торгов за последнюю дату, на которую есть торги, подходящие под фильтр,
+                 отсортированный по id.
         """
-        query = str_filter.filter(select(self.model))
-        result = await self.session.execute(query.order_by(self.model.date.desc()).limit(1))
-        return result.scalars().all()
+        # Последняя дата берётся из того же индекса, что и строки за неё: один запрос без полного сканирования
+        latest_date = str_filter.filter(select(func.max(self.model.date))).correlate(None).scalar_subquery()
+        query = str_filter.filter(self._rows_query()).where(self.model.date == latest_date)
+        result = await self.session.execute(query.order_by(self.model.id))
+        return [SpimexTradingResultRow(*row) for row in result]
@@ -0,0 +1,141 @@
+import datetime
+import io
+
+import pandas as pd
+import pytest
+
+from parsing.excel import (
+    BASIS_COLUMN,
+    CODE_COLUMN,
+    COUNT_COLUMN,
+    HEADER_MARKER,
+    NAME_COLUMN,
+    TOTAL_COLUMN,
+    VOLUME_COLUMN,
+    parse_bulletin,
+)
+
+xlwt = pytest.importorskip("xlwt")
+
+TRADE_DATE = datetime.date(2025, 1, 17)
+COMPARED_COLUMNS = [
+    'exchange_product_id', 'exchange_product_name', 'oil_id', 'delivery_basis_id',
+    'delivery_basis_name', 'delivery_type_id', 'volume', 'total', 'count', 'date',
+]
+
+
+def get_data_from_excel(file_content: bytes, trade_date: datetime.date):
+    """
+    Прежний разбор бюллетеня через pd.read_excel: эталон для parse_bulletin.
+    """
+    temp_df = pd.read_excel(io.BytesIO(file_content), header=None)
+    row_start = temp_df[temp_df.apply(
+        lambda x: x.astype(str).str.contains(HEADER_MARKER, na=False).any(), axis=1
+    )].index
+    if row_start.empty:
+        return None
+    df = pd.read_excel(io.BytesIO(file_content), header=row_start[0] + 1)
+    df[COUNT_COLUMN] = pd.to_numeric(df[COUNT_COLUMN], errors='coerce')
+    filtered_data = df[(df[COUNT_COLUMN] > 0) & (df[NAME_COLUMN].notna())]
+    if filtered_data.empty:
+        return None
+    return pd.DataFrame({
+        'exchange_product_id': filtered_data[CODE_COLUMN],
+        'exchange_product_name': filtered_data[NAME_COLUMN],
+        'oil_id': filtered_data[CODE_COLUMN].str[:4],
+        'delivery_basis_id': filtered_data[CODE_COLUMN].str[4:7],
+        'delivery_basis_name': filtered_data[BASIS_COLUMN],
+        'delivery_type_id': filtered_data[CODE_COLUMN].str[-1],
+        'volume': pd.to_numeric(filtered_data[VOLUME_COLUMN]),
+        'total': pd.to_numeric(filtered_data[TOTAL_COLUMN]),
+        'count': pd.to_numeric(filtered_data[COUNT_COLUMN]),
+        'date': trade_date,
+    })
+
+
+def make_bulletin(rows: list[tuple]) -> bytes:
+    """
+    XLS в разметке бюллетеня: шапка, строка с единицей измерения, заголовок, строки инструментов
+    (код, наименование, базис, объём, сумма, количество договоров; None - пустая ячейка) и итог.
+    """
+    workbook = xlwt.Workbook(encoding='utf-8')
+    sheet = workbook.add_sheet('TRADE_SUMMARY')
+    sheet.write(2, 1, 'Бюллетень по итогам торгов в Секции «Нефтепродукты»')
+    sheet.write(5, 1, HEADER_MARKER)
+    headers = ('№', CODE_COLUMN, NAME_COLUMN, BASIS_COLUMN, VOLUME_COLUMN, TOTAL_COLUMN, COUNT_COLUMN)
+    for column, header in enumerate(headers, start=1):
+        sheet.write(6, column, header)
+    for row, values in enumerate(rows):
+        sheet.write(7 + row, 1, row + 1)
+        for column, value in enumerate(values, start=2):
+            if value is not None:
+                sheet.write(7 + row, column, value)
+    sheet.write(7 + len(rows), 2, 'Итого:')
+    sheet.write(7 + len(rows), 7, len(rows))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+BULLETIN_ROWS = [
+    ('PCS7UFM040S', 'Ацетон технический высший сорт', 'Уфа-группа станций', 40, 3240000.0, 1),
+    ('A100ANK060F', 'Бензин (АИ-100-К5)', 'Ангарск-группа станций', 60, 4842120.0, '-'),
+    ('A100NVY060F', 'Бензин (АИ-100-К5)', 'ст. Новоярославская', 120, 9370920.0, 2),
+    ('A100STI060F', 'Бензин (АИ-100-К5)', 'ст. Стенькино II', None, 4757220.0, 1),
+    ('A592ACH005A', 'Бензин (АИ-92-К5)', 'ст. Ачинск', 5, None, 3),
+    ('A592SPB005A', None, 'Санкт-Петербург', 5, 100.0, 4),
+]
+
+
+def compare_with_read_excel(content: bytes) -> pd.DataFrame:
+    expected = get_data_from_excel(content, TRADE_DATE)[COMPARED_COLUMNS].reset_index(drop=True)
+    actual = parse_bulletin(content, TRADE_DATE)[COMPARED_COLUMNS].reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    return actual
+
+
+def test_parse_bulletin_matches_read_excel():
+    actual = compare_with_read_excel(make_bulletin(BULLETIN_ROWS))
+    # Строки без сделок и без наименования отброшены, пустые объём и сумма стали NaN
+    assert list(actual['exchange_product_id']) == ['PCS7UFM040S', 'A100NVY060F', 'A100STI060F', 'A592ACH005A']
+    assert actual['volume'].isna().tolist() == [False, False, True, False]
+    assert actual['total'].isna().tolist() == [False, False, False, True]
+
+
+def test_parse_bulletin_coerces_text_in_volume_and_total():
+    content = make_bulletin([
+        ('A100ANK060F', 'Бензин (АИ-100-К5)', 'Ангарск-группа станций', '-', ' ', 1),
+        ('A100NVY060F', 'Бензин (АИ-100-К5)', 'ст. Новоярославская', 120, 9370920.0, 2),
+    ])
+    actual = parse_bulletin(content, TRADE_DATE)
+    assert actual['volume'].isna().tolist() == [True, False]
+    assert actual['total'].isna().tolist() == [True, False]
+
+
+def test_parse_bulletin_matches_read_excel_on_generated_bulletin():
+    from benchmarks.bulletin_parse import make_bulletin_xls
+
+    compare_with_read_excel(make_bulletin_xls(300))
+
+
+def test_parse_bulletin_from_file(tmp_path):
+    content = make_bulletin(BULLETIN_ROWS)
+    path = tmp_path / 'bulletin.xls'
+    path.write_bytes(content)
+    pd.testing.assert_frame_equal(parse_bulletin(str(path), TRADE_DATE), parse_bulletin(content, TRADE_DATE))
+
+
+def test_parse_bulletin_without_trades():
+    assert parse_bulletin(make_bulletin([('A100ANK060F', 'Бензин', 'Ангарск', 60, 1.0, '-')]), TRADE_DATE) is None
+
+
+def test_parse_bulletin_without_header():
+    workbook = xlwt.Workbook(encoding='utf-8')
+    workbook.add_sheet('TRADE_SUMMARY').write(0, 0, 'Нет таблицы')
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    assert parse_bulletin(buffer.getvalue(), TRADE_DATE) is None
+
+
+def test_parse_bulletin_rejects_non_excel():
+    assert parse_bulletin(b'<html></html>', TRADE_DATE) is None
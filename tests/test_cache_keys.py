@@ -0,0 +1,173 @@
+import asyncio
+import datetime
+
+import pytest
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache.keys import DYNAMICS_NAMESPACE, params_digest, parse_range_key, trading_key_builder
+from core.cache.single_flight import SingleFlight, locked_compute
+from filters.trading_filters import SpimexTradingResultsFilter
+
+
+async def get_dynamics(start_date, end_date, str_filter, session):
+    pass
+
+
+def test_params_digest_ignores_parameter_order():
+    assert params_digest("scope", {"a": 1, "b": 2}) == params_digest("scope", {"b": 2, "a": 1})
+
+
+def test_params_digest_depends_on_scope_and_values():
+    digest = params_digest("scope", {"a": 1})
+    assert params_digest("other", {"a": 1}) != digest
+    assert params_digest("scope", {"a": 2}) != digest
+
+
+def test_params_digest_canonicalises_filters():
+    by_model = params_digest("scope", {"filter": SpimexTradingResultsFilter(oil_id="A100")})
+    by_dict = params_digest("scope", {"filter": {"oil_id": "A100", "delivery_type_id": None, "delivery_basis_id": None}})
+    assert by_model == by_dict
+
+
+def test_trading_key_builder_ignores_session_and_exposes_range():
+    kwargs = {
+        "start_date": datetime.date(2025, 1, 1),
+        "end_date": datetime.date(2025, 1, 31),
+        "str_filter": SpimexTradingResultsFilter(oil_id="A100"),
+    }
+    key = trading_key_builder(get_dynamics, DYNAMICS_NAMESPACE, args=(), kwargs={**kwargs, "session": AsyncSession()})
+    other_session_key = trading_key_builder(
+        get_dynamics, DYNAMICS_NAMESPACE, args=(), kwargs={**kwargs, "session": AsyncSession()}
+    )
+    assert key == other_session_key
+    assert key.startswith(f"{DYNAMICS_NAMESPACE}:2025-01-01:2025-01-31:")
+    assert parse_range_key(key, DYNAMICS_NAMESPACE) == (datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))
+
+
+def test_trading_key_builder_distinguishes_filters():
+    def key(oil_id):
+        return trading_key_builder(
+            get_dynamics, DYNAMICS_NAMESPACE, args=(), kwargs={"str_filter": SpimexTradingResultsFilter(oil_id=oil_id)}
+        )
+
+    assert key("A100") == key("A100")
+    assert key("A100") != key("PCS7")
+    assert parse_range_key(key("A100"), DYNAMICS_NAMESPACE) is None
+
+
+async def test_single_flight_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return b"body"
+
+    waiters = [asyncio.create_task(single_flight.do("key", compute)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert single_flight.in_flight("key")
+    release.set()
+    assert await asyncio.gather(*waiters) == [b"body"] * 5
+    assert calls == 1
+    assert not single_flight.in_flight("key")
+
+
+async def test_single_flight_survives_cancelled_waiter():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return b"body"
+
+    cancelled = asyncio.create_task(single_flight.do("key", compute))
+    waiter = asyncio.create_task(single_flight.do("key", compute))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    release.set()
+    assert await waiter == b"body"
+
+
+class LockingRedis:
+    """
+    Redis с блокировками SET NX: хранит только ключи блокировок.
+    """
+
+    def __init__(self) -> None:
+        self.locks: dict[str, str] = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.locks:
+            return None
+        self.locks[key] = value
+        return True
+
+    async def exists(self, key):
+        return int(key in self.locks)
+
+    async def eval(self, script, numkeys, key, token):
+        if self.locks.get(key) == token:
+            del self.locks[key]
+
+
+class LockingBackend:
+    def __init__(self) -> None:
+        self.redis = LockingRedis()
+        self.store: dict[str, bytes] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+
+@pytest.fixture
+def fast_lock_poll(monkeypatch):
+    from core.config import settings
+
+    monkeypatch.setattr(settings.cache, "lock_poll_interval", 0.001)
+
+
+async def test_locked_compute_waits_for_worker_holding_lock(fast_lock_poll):
+    backend = LockingBackend()
+    backend.redis.locks["key:lock"] = "other worker"
+
+    async def compute():
+        raise AssertionError("значение вычисляет воркер, держащий блокировку")
+
+    async def other_worker():
+        await asyncio.sleep(0.01)
+        backend.store["key"] = b"packed:body"
+        del backend.redis.locks["key:lock"]
+
+    asyncio.create_task(other_worker())
+    assert await locked_compute(backend, "key", compute, lambda entry: entry.split(b":", 1)[1]) == b"body"
+
+
+async def test_locked_compute_computes_and_releases_lock(fast_lock_poll):
+    backend = LockingBackend()
+
+    async def compute():
+        assert "key:lock" in backend.redis.locks
+        backend.store["key"] = b"body"
+        return b"body"
+
+    assert await locked_compute(backend, "key", compute) == b"body"
+    assert backend.redis.locks == {}
+
+
+async def test_locked_compute_takes_over_when_lock_released_without_value(fast_lock_poll):
+    backend = LockingBackend()
+    backend.redis.locks["key:lock"] = "other worker"
+
+    async def other_worker():
+        await asyncio.sleep(0.01)
+        del backend.redis.locks["key:lock"]
+
+    async def compute():
+        return b"body"
+
+    asyncio.create_task(other_worker())
+    assert await locked_compute(backend, "key", compute) == b"body"
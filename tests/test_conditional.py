@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from starlette.requests import Request
+
+from core.cache.conditional import is_not_modified, validator_headers
+
+INGESTED_AT = datetime(2025, 1, 24, 6, 37, 4, tzinfo=timezone.utc)
+VERSION = b"2025-01-17|2025-01-24T06:37:04"
+
+
+def make_request(**headers: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.fixture
+def validators() -> dict[str, str]:
+    return validator_headers(VERSION, INGESTED_AT, "api:dynamics:2025-01-01:2025-01-31:digest")
+
+
+def test_validators_depend_on_version_and_key(validators):
+    assert validators["Last-Modified"] == "Fri, 24 Jan 2025 06:37:04 GMT"
+    other_version = validator_headers(b"other", INGESTED_AT, "api:dynamics:2025-01-01:2025-01-31:digest")
+    assert other_version["ETag"] != validators["ETag"]
+    assert validator_headers(VERSION, INGESTED_AT, "api:last_tradings:digest")["ETag"] != validators["ETag"]
+
+
+def test_no_conditional_headers(validators):
+    assert not is_not_modified(make_request(), validators)
+
+
+@pytest.mark.parametrize("if_none_match", [
+    "{etag}",
+    "W/{etag}",
+    '"other", {etag}',
+    "*",
+])
+def test_matching_etag(validators, if_none_match):
+    request = make_request(If_None_Match=if_none_match.format(etag=validators["ETag"]))
+    assert is_not_modified(request, validators)
+
+
+def test_changed_etag(validators):
+    assert not is_not_modified(make_request(If_None_Match='"other"'), validators)
+
+
+@pytest.mark.parametrize("since, expected", [
+    (INGESTED_AT, True),
+    (INGESTED_AT + timedelta(hours=1), True),
+    (INGESTED_AT - timedelta(seconds=1), False),
+])
+def test_if_modified_since(validators, since, expected):
+    request = make_request(If_Modified_Since=format_datetime(since, usegmt=True))
+    assert is_not_modified(request, validators) is expected
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(validators):
+    request = make_request(
+        If_None_Match='"other"',
+        If_Modified_Since=format_datetime(INGESTED_AT + timedelta(hours=1), usegmt=True),
+    )
+    assert not is_not_modified(request, validators)
+
+
+def test_invalid_if_modified_since(validators):
+    assert not is_not_modified(make_request(If_Modified_Since="yesterday"), validators)
+
+
+def test_if_modified_since_without_data(validators):
+    headers = validator_headers(b"empty", None, "api:last_tradings:digest")
+    assert "Last-Modified" not in headers
+    request = make_request(If_Modified_Since=format_datetime(INGESTED_AT, usegmt=True))
+    assert not is_not_modified(request, headers)
@@ -0,0 +1,39 @@
+import hashlib
+import os
+
+import pytest
+
+from parsing.download import DownloadTooLarge, SpooledDownload
+
+
+def test_spooled_download_stays_in_memory_below_limit():
+    with SpooledDownload(max_memory=10, max_size=100) as spooled:
+        spooled.write(b'12345')
+        spooled.write(b'67890')
+        assert spooled.path is None
+        assert spooled.source() == b'1234567890'
+        assert spooled.size == 10
+
+
+def test_spooled_download_rolls_over_to_file(tmp_path):
+    chunks = [b'a' * 6, b'b' * 6, b'c' * 6]
+    with SpooledDownload(max_memory=10, max_size=100, directory=str(tmp_path)) as spooled:
+        spooled.write(chunks[0])
+        assert spooled.path is None
+        spooled.write(chunks[1])
+        path = spooled.path
+        assert path is not None and os.path.dirname(path) == str(tmp_path)
+        spooled.write(chunks[2])
+        assert spooled.source() == path
+        with open(path, 'rb') as file:
+            assert file.read() == b''.join(chunks)
+        assert spooled.hexdigest() == hashlib.sha256(b''.join(chunks)).hexdigest()
+    assert not os.path.exists(path)
+
+
+def test_spooled_download_rejects_oversized_file(tmp_path):
+    with SpooledDownload(max_memory=4, max_size=8, directory=str(tmp_path)) as spooled:
+        spooled.write(b'1234')
+        with pytest.raises(DownloadTooLarge):
+            spooled.write(b'56789')
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,80 @@
+import csv
+import gzip
+import io
+
+import pytest
+
+from core.export import COLUMNS, SUPPORTED_COMPRESSION, check_export, export_filename, export_rows
+from core.schemas.spimex_trading_results import ExportCompression, ExportFormat
+
+pa = pytest.importorskip("pyarrow")
+
+
+async def batches(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+    # Пустая пачка не должна ломать выгрузку
+    yield []
+
+
+async def export(rows, export_format, compression, size=3) -> bytes:
+    return b"".join([chunk async for chunk in export_rows(batches(rows, size), export_format, compression)])
+
+
+def as_records(rows) -> list[dict]:
+    return [{column: getattr(row, column) for column in COLUMNS} for row in rows]
+
+
+@pytest.mark.parametrize("compression", sorted(SUPPORTED_COMPRESSION[ExportFormat.csv]))
+async def test_csv(trading_rows, compression):
+    data = await export(trading_rows, ExportFormat.csv, compression)
+    if compression == ExportCompression.gzip:
+        data = gzip.decompress(data)
+    records = list(csv.DictReader(io.StringIO(data.decode())))
+    assert list(records[0]) == COLUMNS
+    assert [record["exchange_product_id"] for record in records] == [row.exchange_product_id for row in trading_rows]
+    assert records[0]["date"] == trading_rows[0].date.isoformat()
+    assert float(records[0]["total"]) == trading_rows[0].total
+
+
+@pytest.mark.parametrize("compression", sorted(SUPPORTED_COMPRESSION[ExportFormat.arrow]))
+async def test_arrow(trading_rows, compression):
+    data = await export(trading_rows, ExportFormat.arrow, compression)
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.column_names == COLUMNS
+    assert table.to_pylist() == as_records(trading_rows)
+
+
+@pytest.mark.parametrize("compression", sorted(SUPPORTED_COMPRESSION[ExportFormat.parquet]))
+async def test_parquet(trading_rows, compression):
+    import pyarrow.parquet as pq
+
+    data = await export(trading_rows, ExportFormat.parquet, compression)
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+    # Каждая непустая пачка - отдельная группа строк
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.read().to_pylist() == as_records(trading_rows)
+
+
+@pytest.mark.parametrize("export_format", list(ExportFormat))
+async def test_empty_export_is_readable(export_format):
+    data = await export([], export_format, ExportCompression.none)
+    if export_format == ExportFormat.csv:
+        assert data.decode() == ",".join(COLUMNS) + "\n"
+    elif export_format == ExportFormat.arrow:
+        assert pa.ipc.open_stream(data).read_all().num_rows == 0
+    else:
+        import pyarrow.parquet as pq
+
+        assert pq.ParquetFile(io.BytesIO(data)).metadata.num_rows == 0
+
+
+def test_check_export_rejects_unsupported_compression():
+    with pytest.raises(ValueError):
+        check_export(ExportFormat.csv, ExportCompression.zstd)
+    check_export(ExportFormat.parquet, ExportCompression.snappy)
+
+
+def test_export_filename():
+    assert export_filename("dynamics", ExportFormat.csv, ExportCompression.gzip) == "dynamics.csv.gz"
+    assert export_filename("dynamics", ExportFormat.arrow, ExportCompression.zstd) == "dynamics.arrows"
@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+
+from parsing.http import HostRateLimiter, HttpClient
+from parsing.stats import ParserStats
+
+URL = "https://spimex.com/upload/reports/oil_xls/oil_xls_20250117162000.xls"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Подменяет asyncio.sleep: задержки записываются, а не выполняются.
+    """
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        if delay:
+            delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return delays
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: bytes = b"") -> None:
+        self.status = status
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(SimpleNamespace(real_url=URL), (), status=self.status)
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+class FakeSession:
+    """
+    Сессия aiohttp, отвечающая по очереди заданными ответами; исключение в очереди выбрасывается при запросе.
+    """
+
+    def __init__(self, *outcomes) -> None:
+        self.outcomes = list(outcomes)
+        self.requests = 0
+
+    def get(self, url: str):
+        self.requests += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def make_client(session, retries=3, retry_backoff=0.5, **kwargs) -> HttpClient:
+    return HttpClient(session, HostRateLimiter(0), ParserStats(), retries=retries, retry_backoff=retry_backoff, **kwargs)
+
+
+async def test_rate_limiter_spaces_requests_to_same_host(sleeps):
+    limiter = HostRateLimiter(0.1)
+    await asyncio.gather(*(limiter.wait(URL) for _ in range(3)))
+    assert len(sleeps) == 2
+    assert all(delay == pytest.approx(10, abs=0.5) for delay in sleeps)
+
+
+async def test_rate_limiter_keeps_hosts_independent(sleeps):
+    limiter = HostRateLimiter(0.1)
+    await limiter.wait("https://spimex.com/a")
+    await limiter.wait("https://example.com/a")
+    assert sleeps == []
+    await limiter.wait("https://spimex.com/b")
+    assert len(sleeps) == 1
+
+
+async def test_rate_limiter_without_limit_never_waits(sleeps):
+    limiter = HostRateLimiter(0)
+    for _ in range(5):
+        await limiter.wait(URL)
+    assert sleeps == []
+
+
+async def test_retries_5xx_with_exponential_backoff(sleeps):
+    session = FakeSession(FakeResponse(503), FakeResponse(502), FakeResponse(200, b"bulletin"))
+    client = make_client(session)
+    assert await client.get(URL) == b"bulletin"
+    assert sleeps == [0.5, 1.0]
+    assert client.stats.requests == 3
+    assert client.stats.retries == 2
+    assert client.stats.failed_requests == 0
+    assert client.stats.bytes_downloaded == len(b"bulletin")
+
+
+async def test_retries_timeouts_and_connection_errors(sleeps):
+    session = FakeSession(
+        asyncio.TimeoutError(), aiohttp.ServerDisconnectedError(), FakeResponse(200, b"bulletin")
+    )
+    client = make_client(session)
+    assert await client.get(URL) == b"bulletin"
+    assert client.stats.retries == 2
+
+
+async def test_gives_up_after_max_attempts(sleeps):
+    session = FakeSession(*(FakeResponse(503) for _ in range(3)))
+    client = make_client(session, retries=2)
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        await client.get(URL)
+    assert error.value.status == 503
+    assert session.requests == 3
+    assert sleeps == [0.5, 1.0]
+    assert client.stats.failed_requests == 1
+
+
+async def test_does_not_retry_client_errors(sleeps):
+    session = FakeSession(FakeResponse(404))
+    client = make_client(session)
+    with pytest.raises(aiohttp.ClientResponseError):
+        await client.get(URL)
+    assert session.requests == 1
+    assert sleeps == []
+    assert client.stats.retries == 0
+
+
+async def test_pages_and_files_use_their_own_rate_limiters(sleeps):
+    page_limiter = HostRateLimiter(0.1)
+    session = FakeSession(FakeResponse(200, b"page"), FakeResponse(200, b"page"))
+    client = make_client(session, page_rate_limiter=page_limiter)
+    await client.get(URL)
+    await client.get(URL)
+    assert len(sleeps) == 1
+    assert URL.split("/")[2] in page_limiter._next_slot
+    assert client.rate_limiter._next_slot == {}
@@ -0,0 +1,92 @@
+import datetime
+import json
+from fnmatch import fnmatchcase
+
+from core.cache.invalidation import invalidate_trade_dates
+
+PREFIX = "api"
+
+
+class FakeRedis:
+    """
+    Синхронный Redis в памяти: SCAN по шаблону, транзакция из MSET и DEL и PUBLISH.
+    """
+
+    def __init__(self, keys) -> None:
+        self.store: dict[bytes, bytes] = {key.encode(): b"1" for key in keys}
+        self.messages: list[tuple[str, dict]] = []
+
+    def scan_iter(self, match):
+        return [key for key in list(self.store) if fnmatchcase(key.decode(), match)]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def publish(self, channel, message):
+        self.messages.append((channel, json.loads(message)))
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def mset(self, mapping):
+        self.commands.append(lambda: self.redis.store.update(
+            {key.encode(): value.encode() for key, value in mapping.items()}
+        ) or True)
+
+    def delete(self, *keys):
+        self.commands.append(lambda: sum(self.redis.store.pop(key, None) is not None for key in keys))
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+
+KEYS = [
+    f"{PREFIX}:data_version",
+    f"{PREFIX}:last_tradings:digest",
+    f"{PREFIX}:dynamics:2025-01-01:2025-03-31:digest",
+    f"{PREFIX}:aggregated_dynamics:2025-01-01:2025-01-31:digest",
+    f"{PREFIX}:aggregated_dynamics:2025-03-01:2025-03-31:digest",
+    f"{PREFIX}:dynamics_tile:2025-01:digest",
+    f"{PREFIX}:dynamics_tile:2025-03:digest",
+    f"{PREFIX}:dynamics_tile:2025-03:other",
+]
+
+
+def test_invalidates_only_tiles_of_ingested_months():
+    redis = FakeRedis(KEYS)
+    ingested_at = datetime.datetime(2025, 3, 3, 16, 20)
+    deleted = invalidate_trade_dates(redis, PREFIX, [datetime.date(2025, 3, 3)], "invalidation", ingested_at)
+
+    assert deleted == 6
+    assert set(redis.store) == {
+        f"{PREFIX}:aggregated_dynamics:2025-01-01:2025-01-31:digest".encode(),
+        f"{PREFIX}:dynamics_tile:2025-01:digest".encode(),
+        f"{PREFIX}:dynamics_tile_version:2025-03".encode(),
+    }
+    assert redis.store[f"{PREFIX}:dynamics_tile_version:2025-03".encode()] == b"2025-03-03T16:20:00"
+
+    (channel, message), = redis.messages
+    assert channel == "invalidation"
+    assert f"{PREFIX}:dynamics_tile_version:2025-03" in message["keys"]
+    assert f"{PREFIX}:dynamics_tile:2025-01:digest" not in message["keys"]
+
+
+def test_month_version_without_ingestion_time_is_current_time():
+    redis = FakeRedis([])
+    before = datetime.datetime.now(datetime.timezone.utc)
+    invalidate_trade_dates(redis, PREFIX, [datetime.date(2025, 2, 28), datetime.date(2025, 3, 3)])
+    versions = {key: datetime.datetime.fromisoformat(value.decode()) for key, value in redis.store.items()}
+    assert set(versions) == {
+        f"{PREFIX}:dynamics_tile_version:2025-02".encode(), f"{PREFIX}:dynamics_tile_version:2025-03".encode(),
+    }
+    assert all(version >= before for version in versions.values())
+    assert redis.messages == []
@@ -0,0 +1,174 @@
+import asyncio
+import datetime
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+import pytest
+
+from benchmarks.spimex_server import FILE_PATH, listing_html, trade_dates
+from core.config import settings
+from parser import Parser
+
+BASE_URL = "https://spimex.com/markets/oil_products/trades/results/"
+
+# Фрагмент страницы списка в разметке сайта: ссылки на бюллетени, посторонние ссылки и пагинация Bitrix
+LISTING_HTML = """
+<html><body>
+<div class="accordeon-inner">
+  <div class="accordeon-inner__wrap-item">
+    <a class="accordeon-inner__item-title link xls"
+       href="/upload/reports/oil_xls/oil_xls_20250117162000.xls?r=4821">Бюллетень за 17.01.2025</a>
+  </div>
+  <div class="accordeon-inner__wrap-item">
+    <a class="accordeon-inner__item-title link xls"
+       href="https://spimex.com/upload/reports/oil_xls/oil_xls_20250116162000.xls">Бюллетень за 16.01.2025</a>
+  </div>
+  <div class="accordeon-inner__wrap-item">
+    <a class="accordeon-inner__item-title link xls" href="/upload/reports/oil_xls/archive.xls">Архив</a>
+  </div>
+  <a class="link pdf" href="/upload/reports/oil_xls/oil_xls_20250115162000.xls">Без класса бюллетеня</a>
+  <a href="/markets/oil_products/">Нефтепродукты</a>
+</div>
+<div class="bx-pagination"><div class="bx-pagination-container"><ul>
+  <li class="bx-pag-prev"><a href="/markets/oil_products/trades/results/?page=page-1"><span>Назад</span></a></li>
+  <li><a href="/markets/oil_products/trades/results/?page=page-1"><span>1</span></a></li>
+  <li class="bx-active"><span>2</span></li>
+  <li><a href="/markets/oil_products/trades/results/?page=page-3"><span>3</span></a></li>
+  <li><a href="/markets/oil_products/trades/results/?page=page-57"><span>57</span></a></li>
+  <li class="bx-pag-next"><a href="/markets/oil_products/trades/results/?page=page-3"><span>Вперед</span></a></li>
+</ul></div></div>
+</body></html>
+"""
+
+PER_PAGE = 3
+# 18 бюллетеней на 6 страницах, от новых к старым: 2025-01-24 ... 2025-01-01
+DATES = trade_dates(18, datetime.date(2025, 1, 1))
+
+
+def bulletin_link(trade_date: datetime.date, page: int) -> str:
+    return urljoin(BASE_URL, f"{FILE_PATH}oil_xls_{trade_date:%Y%m%d}162000.xls?r={page}")
+
+
+def page_of(trade_date: datetime.date) -> int:
+    return DATES.index(trade_date) // PER_PAGE + 1
+
+
+class ListingClient:
+    """
+    HTTP-клиент, отдающий страницы списка из DATES и запоминающий запрошенные страницы.
+    """
+
+    def __init__(self) -> None:
+        self.pages = -(-len(DATES) // PER_PAGE)
+        self.requested: list[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get(self, url: str) -> bytes:
+        page = int(parse_qs(urlsplit(url).query)["page"][0].removeprefix("page-"))
+        self.requested.append(page)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+        finally:
+            self.in_flight -= 1
+        dates = DATES[(page - 1) * PER_PAGE:page * PER_PAGE]
+        return listing_html(dates, page, self.pages).encode()
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    monkeypatch.setattr(settings.parser, "base_url", BASE_URL)
+    monkeypatch.setattr(settings.parser, "start_date", datetime.date(2023, 1, 1))
+    monkeypatch.setattr(settings.parser, "listing_window", 2)
+    parser = Parser()
+    yield parser
+    parser.parse_executor.shutdown()
+
+
+async def crawl(parser, ingested_files=(), watermark=None):
+    client = ListingClient()
+    queue = asyncio.Queue()
+    complete = await parser.get_trading_all_dates_and_files(
+        client, queue, {link: "hash" for link in ingested_files}, watermark
+    )
+    queued = []
+    while not queue.empty():
+        queued.append(queue.get_nowait())
+    return complete, queued, client
+
+
+def test_parse_listing_extracts_bulletin_links_and_last_page(parser):
+    bulletins, last_page = parser.parse_listing(LISTING_HTML, 2)
+    assert bulletins == [
+        (datetime.date(2025, 1, 17), "https://spimex.com/upload/reports/oil_xls/oil_xls_20250117162000.xls?r=4821"),
+        (datetime.date(2025, 1, 16), "https://spimex.com/upload/reports/oil_xls/oil_xls_20250116162000.xls"),
+    ]
+    assert last_page == 57
+
+
+def test_parse_listing_without_pagination(parser):
+    bulletins, last_page = parser.parse_listing(listing_html(DATES[:2], 1, 1), 1)
+    assert [trade_date for trade_date, _ in bulletins] == DATES[:2]
+    assert last_page == 1
+    assert parser.parse_listing("<html><body></body></html>", 4) == ([], 4)
+
+
+async def test_crawl_queues_every_bulletin_of_every_page(parser):
+    complete, queued, client = await crawl(parser)
+    assert complete
+    assert queued == [(trade_date, bulletin_link(trade_date, page_of(trade_date))) for trade_date in DATES]
+    assert sorted(client.requested) == [1, 2, 3, 4, 5, 6]
+    assert parser.newest_listed_date == DATES[0]
+
+
+async def test_crawl_fetches_pages_within_window_and_last_page(parser):
+    _, _, client = await crawl(parser)
+    assert client.max_in_flight <= settings.parser.listing_window
+    assert max(client.requested) == client.pages
+
+
+async def test_crawl_stops_at_known_page_behind_watermark(parser):
+    # Последний завершённый обход дошёл до DATES[3]: страницы со 2-й уже загружены целиком
+    known = [bulletin_link(trade_date, page_of(trade_date)) for trade_date in DATES[3:]]
+    complete, queued, client = await crawl(parser, known, watermark=DATES[3])
+    assert complete
+    assert queued == [(trade_date, bulletin_link(trade_date, 1)) for trade_date in DATES[:3]]
+    # Страница 2 - первая, все бюллетени которой известны; дальше загружается не больше окна
+    assert max(client.requested) <= 2 + settings.parser.listing_window - 1
+    assert parser.stats.files_skipped == 3
+
+
+async def test_crawl_without_watermark_passes_known_pages(parser):
+    # Прерванная первая загрузка: известны бюллетени начала списка, но отметки обхода ещё нет
+    known = [bulletin_link(trade_date, page_of(trade_date)) for trade_date in DATES[:6]]
+    complete, queued, client = await crawl(parser, known)
+    assert complete
+    assert [trade_date for trade_date, _ in queued] == DATES[6:]
+    assert sorted(client.requested) == [1, 2, 3, 4, 5, 6]
+
+
+async def test_crawl_does_not_stop_at_known_page_newer_than_watermark(parser):
+    known = [bulletin_link(trade_date, page_of(trade_date)) for trade_date in DATES[:6]]
+    complete, queued, _ = await crawl(parser, known, watermark=DATES[9])
+    assert complete
+    assert [trade_date for trade_date, _ in queued] == DATES[6:]
+
+
+async def test_crawl_stops_before_start_date(parser, monkeypatch):
+    monkeypatch.setattr(settings.parser, "start_date", DATES[7])
+    complete, queued, client = await crawl(parser)
+    assert complete
+    assert [trade_date for trade_date, _ in queued] == DATES[:8]
+    # DATES[8] - на странице 3
+    assert max(client.requested) <= 3 + settings.parser.listing_window - 1
+
+
+async def test_crawl_reports_incomplete_listing_when_page_fails(parser, monkeypatch):
+    async def get(self, url):
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(ListingClient, "get", get)
+    complete, queued, _ = await crawl(parser)
+    assert not complete
+    assert queued == []
@@ -0,0 +1,77 @@
+import time
+
+from redis import asyncio as aioredis
+
+from core.cache.backends import LocalCache, TwoTierBackend
+
+
+def test_evicts_least_recently_used_entry_over_max_entries():
+    cache = LocalCache(max_entries=2, max_bytes=1024, ttl=60)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") is not None
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a")[1] == b"1"
+    assert cache.get("c")[1] == b"3"
+    assert len(cache) == 2
+
+
+def test_evicts_until_total_size_fits_max_bytes():
+    cache = LocalCache(max_entries=10, max_bytes=10, ttl=60)
+    cache.set("a", b"xxxx")
+    cache.set("b", b"yyyy")
+    cache.set("c", b"zzzz")
+    assert cache.get("a") is None
+    assert cache.size == 8
+    assert len(cache) == 2
+
+
+def test_skips_values_larger_than_max_bytes():
+    cache = LocalCache(max_entries=10, max_bytes=4, ttl=60)
+    cache.set("a", b"12")
+    cache.set("big", b"12345")
+    assert cache.get("big") is None
+    assert cache.get("a")[1] == b"12"
+
+
+def test_overwrite_keeps_size_accurate():
+    cache = LocalCache(max_entries=10, max_bytes=100, ttl=60)
+    cache.set("a", b"1234")
+    cache.set("a", b"12")
+    assert cache.size == 2
+    cache.delete("a")
+    assert cache.size == 0
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache = LocalCache(max_entries=10, max_bytes=100, ttl=60)
+    cache.set("short", b"1", expire=5)
+    cache.set("long", b"2", expire=3600)
+    assert cache.get("long")[0] == 60
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert cache.get("short") is None
+    assert cache.size == 1
+    assert cache.get("long")[1] == b"2"
+
+
+def test_delete_prefix():
+    cache = LocalCache(max_entries=10, max_bytes=100, ttl=60)
+    cache.set("api:dynamics:1", b"1")
+    cache.set("api:dynamics:2", b"2")
+    cache.set("api:last_tradings:1", b"3")
+    cache.delete_prefix("api:dynamics:")
+    assert len(cache) == 1
+    assert cache.size == 1
+
+
+def test_two_tier_backend_applies_invalidation_messages():
+    backend = TwoTierBackend(aioredis.Redis(), LocalCache(max_entries=10, max_bytes=100, ttl=60), "invalidation")
+    for key in ("api:dynamics:1", "api:dynamics:2", "api:last_tradings:1", "api:data_version"):
+        backend.local_cache.set(key, b"1")
+    backend.apply_invalidation({"keys": ["api:data_version"], "prefixes": ["api:dynamics:"]})
+    assert backend.local_cache.get("api:last_tradings:1") is not None
+    assert len(backend.local_cache) == 1
@@ -0,0 +1,25 @@
+import datetime
+
+import pytest
+
+from core.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("key", [
+    (datetime.date(2025, 1, 16), 936),
+    (datetime.date(2023, 1, 9), 0),
+    (datetime.date(2024, 12, 31), 2 ** 40),
+])
+def test_cursor_round_trip(key):
+    assert decode_cursor(encode_cursor(*key)) == key
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime.date(2025, 1, 16), 936)
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "MjAyNS0wMS0xNg==", "MjAyNS0xMy0wMXwx", "//79"])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
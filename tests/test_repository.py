@@ -0,0 +1,76 @@
+import dataclasses
+import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from core.schemas.spimex_trading_results import AggregationDimension, SpimexTradingResultRow
+from filters.trading_filters import SpimexTradingResultsFilter
+from repository.ingestion_ledger_repository import IngestionWatermarkRepository
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+ROW_FIELDS = [field.name for field in dataclasses.fields(SpimexTradingResultRow)]
+
+
+class EmptyResult(list):
+    def mappings(self):
+        return self
+
+
+class RecordingSession:
+    """
+    Сессия без БД: запоминает выполненные запросы и возвращает пустой результат.
+    """
+
+    def __init__(self) -> None:
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return EmptyResult()
+
+
+def compile_query(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+@pytest.fixture
+def repository() -> SpimexTradingResultsRepository:
+    return SpimexTradingResultsRepository(RecordingSession())
+
+
+def test_rows_query_selects_row_fields_with_dimension_names(repository):
+    query = repository._rows_query()
+    assert list(query.selected_columns.keys()) == ROW_FIELDS
+    sql = compile_query(query)
+    assert "spimex_instruments.exchange_product_name" in sql
+    assert "spimex_delivery_bases.delivery_basis_name" in sql
+
+
+def test_dynamics_query_filters_and_orders_by_date_and_id(repository):
+    query = repository._dynamics_query(
+        datetime.date(2025, 1, 1), datetime.date(2025, 1, 31), SpimexTradingResultsFilter(oil_id="A100")
+    )
+    sql = compile_query(query)
+    assert "spimex_trading_results.date BETWEEN" in sql
+    assert "spimex_trading_results.oil_id =" in sql
+    assert sql.endswith("ORDER BY spimex_trading_results.date, spimex_trading_results.id")
+
+
+async def test_read_methods_build_compilable_queries(repository):
+    period = (datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))
+    assert await repository.get_dynamics(*period, SpimexTradingResultsFilter(), limit=10, after=(period[0], 5)) == []
+    assert await repository.get_trading_results(SpimexTradingResultsFilter(delivery_basis_id="ANK")) == []
+    assert await repository.get_aggregated_dynamics(
+        *period, SpimexTradingResultsFilter(), [AggregationDimension.month, AggregationDimension.oil_id]
+    ) == []
+    for statement in repository.session.statements:
+        compile_query(statement)
+
+
+async def test_watermark_advance_updates_only_newer_date():
+    repository = IngestionWatermarkRepository(RecordingSession())
+    await repository.advance("crawl", datetime.date(2025, 1, 17))
+    sql = compile_query(repository.session.statements[0])
+    assert "ON CONFLICT (name) DO UPDATE" in sql
+    assert sql.endswith("WHERE spimex_ingestion_watermarks.trade_date < excluded.trade_date")
@@ -0,0 +1,194 @@
+import dataclasses
+import datetime
+
+import orjson
+import pytest
+from fastapi_cache import FastAPICache
+from starlette.requests import Request
+
+from core.cache import tiles
+from core.cache.keys import DATA_VERSION_KEY, DYNAMICS_TILE_VERSION_NAMESPACE
+from core.cache.tiles import dynamics_page, month_end, month_starts
+from core.pagination import decode_cursor
+from filters.trading_filters import SpimexTradingResultsFilter
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+PREFIX = "test"
+
+
+class MemoryBackend:
+    def __init__(self) -> None:
+        self.store: dict[str, bytes] = {}
+
+    async def get(self, key: str):
+        return self.store.get(key)
+
+    async def set(self, key: str, value: bytes, expire=None) -> None:
+        self.store[key] = value
+
+
+@pytest.fixture
+def rows(trading_rows):
+    """
+    Торги с конца декабря по начало марта: по несколько строк в каждом месяце, включая границы месяцев.
+    """
+    dates = [
+        datetime.date(2024, 12, 30), datetime.date(2024, 12, 31), datetime.date(2025, 1, 1),
+        datetime.date(2025, 1, 31), datetime.date(2025, 2, 1), datetime.date(2025, 2, 28),
+        datetime.date(2025, 3, 1), datetime.date(2025, 3, 3),
+    ]
+    template = trading_rows[0]
+    return [
+        dataclasses.replace(template, id=row_id, date=trade_date, exchange_product_id=f"PCS7UFM{row_id:03d}S")
+        for trade_date in dates
+        for row_id in (100 + dates.index(trade_date) * 2, 101 + dates.index(trade_date) * 2)
+    ]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = MemoryBackend()
+    FastAPICache.init(backend, prefix=PREFIX)
+    set_data_version(backend, "2025-03-03|2025-03-03T16:20:00")
+
+    async def is_current(session, ingested_at):
+        return True
+
+    monkeypatch.setattr(tiles, "is_current", is_current)
+    yield backend
+    FastAPICache.reset()
+
+
+@pytest.fixture
+def month_loads(monkeypatch, rows):
+    """
+    Подменяет чтение торгов из БД выборкой из rows и записывает запрошенные периоды.
+    """
+    loads = []
+
+    async def get_dynamics(self, start_date, end_date, str_filter, limit=None, after=None):
+        loads.append((start_date, end_date))
+        return [row for row in rows if start_date <= row.date <= end_date]
+
+    monkeypatch.setattr(SpimexTradingResultsRepository, "get_dynamics", get_dynamics)
+    return loads
+
+
+def set_data_version(backend: MemoryBackend, version: str) -> None:
+    backend.store[f"{PREFIX}:{DATA_VERSION_KEY}"] = version.encode()
+
+
+def make_request(**headers: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+async def fetch_page(start_date, end_date, limit, after=None, **headers):
+    return await dynamics_page(
+        make_request(**headers), None, start_date, end_date, SpimexTradingResultsFilter(), limit, after
+    )
+
+
+def test_month_starts_crosses_year_boundary():
+    assert month_starts(datetime.date(2024, 11, 15), datetime.date(2025, 2, 1)) == [
+        datetime.date(2024, 11, 1), datetime.date(2024, 12, 1), datetime.date(2025, 1, 1), datetime.date(2025, 2, 1),
+    ]
+    assert month_starts(datetime.date(2025, 1, 31), datetime.date(2025, 1, 31)) == [datetime.date(2025, 1, 1)]
+
+
+def test_month_end():
+    assert month_end(datetime.date(2024, 2, 1)) == datetime.date(2024, 2, 29)
+    assert month_end(datetime.date(2025, 2, 1)) == datetime.date(2025, 2, 28)
+    assert month_end(datetime.date(2024, 12, 1)) == datetime.date(2024, 12, 31)
+
+
+async def test_pages_across_month_boundaries_match_rows(backend, month_loads, rows):
+    start_date, end_date = datetime.date(2024, 12, 31), datetime.date(2025, 3, 1)
+    expected = [row.id for row in rows if start_date <= row.date <= end_date]
+
+    received, after = [], None
+    while True:
+        page = orjson.loads((await fetch_page(start_date, end_date, 3, after)).body)
+        received.extend(item["id"] for item in page["items"])
+        if page["next_cursor"] is None:
+            break
+        after = decode_cursor(page["next_cursor"])
+
+    assert received == expected
+    # Каждый месяц читается из БД один раз, дальше страницы собираются из фрагментов
+    assert sorted(month_loads) == [
+        (datetime.date(2024, 12, 1), datetime.date(2024, 12, 31)),
+        (datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)),
+        (datetime.date(2025, 2, 1), datetime.date(2025, 2, 28)),
+        (datetime.date(2025, 3, 1), datetime.date(2025, 3, 31)),
+    ]
+
+
+async def test_first_page_reads_only_needed_months(backend, month_loads, monkeypatch):
+    monkeypatch.setattr(tiles.settings.cache, "tile_window", 1)
+    page = orjson.loads((await fetch_page(datetime.date(2024, 12, 1), datetime.date(2025, 3, 31), 3)).body)
+    assert [item["date"] for item in page["items"]] == ["2024-12-30", "2024-12-30", "2024-12-31"]
+    assert page["next_cursor"] is not None
+    assert month_loads == [(datetime.date(2024, 12, 1), datetime.date(2024, 12, 31))]
+
+
+async def test_repeated_page_is_served_from_page_cache(backend, month_loads):
+    period = (datetime.date(2025, 1, 1), datetime.date(2025, 2, 28))
+    first = await fetch_page(*period, 4)
+    loads = len(month_loads)
+    tile_keys = [key for key in backend.store if key.startswith(f"{PREFIX}:dynamics_tile:")]
+    for key in tile_keys:
+        del backend.store[key]
+
+    second = await fetch_page(*period, 4)
+    assert second.body == first.body
+    assert second.headers["X-FastAPI-Cache"] == "HIT"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(month_loads) == loads
+
+    not_modified = await fetch_page(*period, 4, If_None_Match=first.headers["ETag"])
+    assert not_modified.status_code == 304
+
+
+async def test_new_data_version_keeps_tiles_of_closed_months(backend, month_loads):
+    period = (datetime.date(2025, 1, 1), datetime.date(2025, 2, 28))
+    first = await fetch_page(*period, 10)
+    assert len(month_loads) == 2
+
+    # Загрузка торгов за март меняет версию данных, но не версии января и февраля
+    set_data_version(backend, "2025-03-04|2025-03-04T16:20:00")
+    second = await fetch_page(*period, 10)
+    assert len(month_loads) == 2
+    assert second.body == first.body
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+async def test_new_month_version_rebuilds_only_its_tile(backend, month_loads):
+    period = (datetime.date(2025, 1, 1), datetime.date(2025, 2, 28))
+    await fetch_page(*period, 10)
+
+    # Фрагменты прежней версии февраля остаются в кэше, но запросы новой версии их не читают
+    set_data_version(backend, "2025-03-04|2025-03-04T16:20:00")
+    backend.store[f"{PREFIX}:{DYNAMICS_TILE_VERSION_NAMESPACE}:2025-02"] = b"2025-03-04T16:20:00"
+    await fetch_page(*period, 10)
+    assert month_loads[2:] == [(datetime.date(2025, 2, 1), datetime.date(2025, 2, 28))]
+
+
+async def test_tile_is_built_by_session_that_saw_month_ingestion(backend, month_loads, monkeypatch):
+    checks = []
+
+    async def is_current(session, ingested_at):
+        checks.append(ingested_at)
+        return True
+
+    monkeypatch.setattr(tiles, "is_current", is_current)
+    backend.store[f"{PREFIX}:{DYNAMICS_TILE_VERSION_NAMESPACE}:2025-02"] = b"2025-02-28T16:20:00"
+    await fetch_page(datetime.date(2025, 1, 1), datetime.date(2025, 2, 28), 10)
+    assert checks == [
+        datetime.datetime(2025, 3, 3, 16, 20, tzinfo=datetime.timezone.utc),
+        datetime.datetime(2025, 2, 28, 16, 20, tzinfo=datetime.timezone.utc),
+    ]
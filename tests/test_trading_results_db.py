@@ -0,0 +1,151 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from core.config import settings
+from core.models import DeliveryBasis, Instrument, SpimexTradingResults
+from core.schemas.spimex_trading_results import AggregationDimension
+from filters.trading_filters import SpimexTradingResultsFilter
+from repository.trading_result_repository import SpimexTradingResultsRepository
+
+START, END = datetime.date(1970, 1, 1), datetime.date(1970, 2, 28)
+MON_05, TUE_06, MON_12, MON_FEB_02 = (
+    datetime.date(1970, 1, 5), datetime.date(1970, 1, 6), datetime.date(1970, 1, 12), datetime.date(1970, 2, 2),
+)
+
+BASES = {"ZZT": "Тестовый базис Т", "ZZU": "Тестовый базис У"}
+# exchange_product_id: (oil_id, delivery_basis_id)
+INSTRUMENTS = {"ZZT001F": ("ZZA", "ZZT"), "ZZT002F": ("ZZB", "ZZT"), "ZZU001F": ("ZZA", "ZZU")}
+# (дата, инструмент, volume, total, count)
+TRADES = [
+    (MON_05, "ZZT001F", 10, 1000, 2),
+    (MON_05, "ZZT002F", 20, 3000, 3),
+    (MON_05, "ZZU001F", 5, 600, 1),
+    (TUE_06, "ZZT001F", 30, 3300, 4),
+    (TUE_06, "ZZU001F", 0, 0, 0),
+    (MON_12, "ZZT001F", 40, 4000, 5),
+    (MON_12, "ZZT002F", 10, 1600, 1),
+    (MON_FEB_02, "ZZT001F", 5, 500, 1),
+    (MON_FEB_02, "ZZT002F", 15, 1800, 2),
+]
+
+
+@pytest.fixture
+async def session():
+    """
+    Сессия тестовой БД (APP_CONFIG__DB__URL, схема по alembic upgrade head) с торгами из TRADES
+    за январь-февраль 1970 года. Всё выполняется в одной транзакции, которая откатывается после теста.
+    """
+    engine = create_async_engine(str(settings.db.url))
+    try:
+        try:
+            connection = await asyncio.wait_for(engine.connect(), 5)
+        except Exception as error:
+            pytest.skip(f"Тестовая БД недоступна: {error!r}")
+        transaction = await connection.begin()
+        try:
+            if await connection.scalar(text("SELECT to_regclass('spimex_trading_results')")) is None:
+                pytest.skip("В тестовой БД нет схемы: выполните alembic upgrade head")
+            session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+            try:
+                await add_trades(session)
+                yield session
+            finally:
+                await session.close()
+        finally:
+            await transaction.rollback()
+            await connection.close()
+    finally:
+        await engine.dispose()
+
+
+async def add_trades(session: AsyncSession) -> None:
+    await session.execute(insert(DeliveryBasis), [
+        {"delivery_basis_id": basis_id, "delivery_basis_name": name, "trade_date": START}
+        for basis_id, name in BASES.items()
+    ])
+    await session.execute(insert(Instrument), [
+        {
+            "exchange_product_id": product_id, "exchange_product_name": f"Инструмент {product_id}",
+            "oil_id": oil_id, "delivery_basis_id": basis_id, "delivery_type_id": "F", "trade_date": START,
+        }
+        for product_id, (oil_id, basis_id) in INSTRUMENTS.items()
+    ])
+    await session.execute(insert(SpimexTradingResults), [
+        {
+            "exchange_product_id": product_id, "oil_id": INSTRUMENTS[product_id][0],
+            "delivery_basis_id": INSTRUMENTS[product_id][1], "delivery_type_id": "F",
+            "volume": volume, "total": total, "count": count, "date": trade_date,
+        }
+        for trade_date, product_id, volume, total, count in TRADES
+    ])
+
+
+async def aggregate(session, group_by, **filters):
+    return await SpimexTradingResultsRepository(session=session).get_aggregated_dynamics(
+        START, END, SpimexTradingResultsFilter(**filters), group_by
+    )
+
+
+async def test_aggregates_by_date(session):
+    assert await aggregate(session, [AggregationDimension.date]) == [
+        {"date": MON_05, "volume": 35, "total": 4600, "count": 6, "vwap": pytest.approx(4600 / 35)},
+        {"date": TUE_06, "volume": 30, "total": 3300, "count": 4, "vwap": 110},
+        {"date": MON_12, "volume": 50, "total": 5600, "count": 6, "vwap": 112},
+        {"date": MON_FEB_02, "volume": 20, "total": 2300, "count": 3, "vwap": 115},
+    ]
+
+
+async def test_aggregates_by_week_starting_on_monday(session):
+    assert await aggregate(session, [AggregationDimension.week]) == [
+        {"week": MON_05, "volume": 65, "total": 7900, "count": 10, "vwap": pytest.approx(7900 / 65)},
+        {"week": MON_12, "volume": 50, "total": 5600, "count": 6, "vwap": 112},
+        {"week": MON_FEB_02, "volume": 20, "total": 2300, "count": 3, "vwap": 115},
+    ]
+
+
+async def test_aggregates_by_month_and_oil_id(session):
+    january, february = datetime.date(1970, 1, 1), datetime.date(1970, 2, 1)
+    assert await aggregate(session, [AggregationDimension.month, AggregationDimension.oil_id]) == [
+        {"month": january, "oil_id": "ZZA", "volume": 85, "total": 8900, "count": 12,
+         "vwap": pytest.approx(8900 / 85)},
+        {"month": january, "oil_id": "ZZB", "volume": 30, "total": 4600, "count": 4,
+         "vwap": pytest.approx(4600 / 30)},
+        {"month": february, "oil_id": "ZZA", "volume": 5, "total": 500, "count": 1, "vwap": 100},
+        {"month": february, "oil_id": "ZZB", "volume": 15, "total": 1800, "count": 2, "vwap": 120},
+    ]
+
+
+async def test_aggregation_applies_filter_and_leaves_vwap_empty_without_volume(session):
+    assert await aggregate(session, [AggregationDimension.date], delivery_basis_id="ZZU") == [
+        {"date": MON_05, "volume": 5, "total": 600, "count": 1, "vwap": 120},
+        {"date": TUE_06, "volume": 0, "total": 0, "count": 0, "vwap": None},
+    ]
+
+
+async def last_tradings(session, **filters):
+    return await SpimexTradingResultsRepository(session=session).get_trading_results(
+        SpimexTradingResultsFilter(**filters)
+    )
+
+
+async def test_last_tradings_return_every_instrument_of_latest_day(session):
+    rows = await last_tradings(session, delivery_basis_id="ZZT")
+    assert [(row.date, row.exchange_product_id, row.volume, row.total, row.count) for row in rows] == [
+        (MON_FEB_02, "ZZT001F", 5, 500, 1),
+        (MON_FEB_02, "ZZT002F", 15, 1800, 2),
+    ]
+    assert [row.id for row in rows] == sorted(row.id for row in rows)
+    assert {row.delivery_basis_name for row in rows} == {BASES["ZZT"]}
+    assert [row.exchange_product_name for row in rows] == ["Инструмент ZZT001F", "Инструмент ZZT002F"]
+
+
+async def test_last_tradings_take_latest_day_of_filtered_rows(session):
+    # ZZU001F последний раз торговался 6 января и в последний день торгов марки ZZA не попадает
+    rows = await last_tradings(session, oil_id="ZZA")
+    assert [(row.date, row.exchange_product_id) for row in rows] == [(MON_FEB_02, "ZZT001F")]
+    rows = await last_tradings(session, delivery_basis_id="ZZU")
+    assert [(row.date, row.exchange_product_id, row.volume) for row in rows] == [(TUE_06, "ZZU001F", 0)]